@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import click
 
+if TYPE_CHECKING:
+    from uuid import UUID
+
 
 @click.group(
     name="users",
@@ -223,3 +226,366 @@ def create_default_roles() -> None:
 
     console.rule("Creating default roles.")
     anyio.run(_create_default_roles)
+
+
+@click.group(
+    name="claims",
+    invoke_without_command=False,
+    help="Manage claim processing.",
+)
+@click.pass_context
+def claim_management_group(_: dict[str, Any]) -> None:
+    """Manage claim processing."""
+
+
+@claim_management_group.command(
+    name="rerun", help="Re-run the pipeline of a claim from its checkpoints"
+)
+@click.option(
+    "--request-id",
+    help="ID of the claim request",
+    type=click.UUID,
+    required=True,
+)
+@click.option(
+    "--from-stage",
+    help="Stage to run again, with every stage depending on it",
+    type=click.STRING,
+    required=False,
+    show_default=False,
+)
+def rerun_claim(request_id: UUID, from_stage: str | None) -> None:
+    """Re-run a claim pipeline.
+
+    Args:
+        request_id (UUID): The claim request to process again.
+        from_stage (str | None): The first stage to recompute.
+    """
+    import anyio
+    from rich import get_console
+    from saq import Queue
+
+    from agentric.config import get_settings
+    from agentric.config.app import alchemy
+    from agentric.db.models.enums import SubmissionStatus
+    from agentric.domain.accounts.services import UserService
+    from agentric.domain.requests.services import RequestService
+    from agentric.domain.requests.tasks import (
+        CLAIM_PIPELINE_STAGES,
+        claim_pipeline_function,
+        enqueue_claim_rerun,
+    )
+
+    settings = get_settings()
+    console = get_console()
+
+    async def _rerun_claim(request_id: UUID, from_stage: str | None) -> None:
+        async with RequestService.new(config=alchemy) as requests_service:
+            request = await requests_service.get_one_or_none(id=request_id)
+            if request is None:
+                console.print(f"Request not found: {request_id}")
+                return
+            stages = CLAIM_PIPELINE_STAGES[
+                claim_pipeline_function(request.owner_organization)
+            ]
+            if from_stage is not None and from_stage not in stages:
+                console.print(
+                    f"Unknown stage {from_stage}, expected one of {', '.join(stages)}"
+                )
+                return
+            if request.created_by_id is None:
+                console.print(f"Request {request_id} has no submitting user")
+                return
+            async with UserService.new(
+                session=requests_service.repository.session
+            ) as users_service:
+                user = await users_service.get(request.created_by_id)
+            request = await requests_service.update(
+                item_id=request.id,
+                data={"submission_status": SubmissionStatus.PROCESSING},
+                auto_commit=True,
+            )
+            queue = Queue.from_url(url=settings.redis.URL, name="agentric_submissions")
+            try:
+                job = await enqueue_claim_rerun(
+                    queue,
+                    request=request,
+                    user_id=str(user.id),
+                    user_email=user.email,
+                    from_stage=from_stage,
+                )
+            finally:
+                await queue.disconnect()
+            console.print(f"Enqueued {job.function} for request {request_id}")
+
+    console.rule("Re-run claim pipeline.")
+    anyio.run(_rerun_claim, request_id, from_stage)
+
+
+@claim_management_group.command(
+    name="classifier-report",
+    help="Precision and recall of the local document classifier against the model",
+)
+@click.option(
+    "--pipeline",
+    help="Claim pipeline",
+    type=click.Choice(["travelguard", "covermore"]),
+    default="travelguard",
+    show_default=True,
+)
+@click.option(
+    "--threshold",
+    "thresholds",
+    help="Confidence threshold to evaluate, in steps of 0.1 (repeatable)",
+    type=click.FloatRange(0.5, 0.9),
+    multiple=True,
+)
+def classifier_report(pipeline: str, thresholds: tuple[float, ...]) -> None:
+    """Print the local classifier report.
+
+    Args:
+        pipeline (str): The claim pipeline whose counters are reported.
+        thresholds (tuple[float, ...]): Confidence thresholds to evaluate.
+    """
+    import anyio
+    from rich import get_console
+    from rich.table import Table
+
+    from agentric.domain.requests.doc_classifier import classifier_report as build_report
+
+    console = get_console()
+
+    def _fmt(value: float | None) -> str:
+        return "-" if value is None else f"{value:.2f}"
+
+    async def _classifier_report() -> None:
+        report = await build_report(pipeline, thresholds or (0.5, 0.6, 0.7, 0.8, 0.9))
+        for threshold, result in report.items():
+            table = Table(
+                title=f"threshold {threshold:.1f}, labelled locally {_fmt(result['coverage'])}"
+            )
+            table.add_column("label")
+            table.add_column("precision", justify="right")
+            table.add_column("recall", justify="right")
+            table.add_column("support", justify="right")
+            for label, stats in result["labels"].items():
+                table.add_row(
+                    label, _fmt(stats["precision"]), _fmt(stats["recall"]), str(stats["support"])
+                )
+            console.print(table)
+
+    console.rule(f"Document classifier report ({pipeline}).")
+    anyio.run(_classifier_report)
+
+
+@claim_management_group.command(
+    name="backfill-attachments",
+    help="Fill in size, hash, MIME type and page count of existing attachments",
+)
+@click.option(
+    "--batch-size",
+    help="Attachments loaded per batch",
+    type=click.IntRange(1, 1000),
+    default=100,
+    show_default=True,
+)
+@click.option(
+    "--concurrency",
+    help="Attachments read from storage at a time",
+    type=click.IntRange(1, 64),
+    default=8,
+    show_default=True,
+)
+def backfill_attachments(batch_size: int, concurrency: int) -> None:
+    """Backfill the metadata columns of request attachments.
+
+    Args:
+        batch_size (int): Attachments loaded per batch.
+        concurrency (int): Attachments read from storage at a time.
+    """
+    import anyio
+    from rich import get_console
+
+    from agentric.domain.requests.attachment_metadata import backfill_attachment_metadata
+    from agentric.lib.executor import shutdown_process_pool
+
+    console = get_console()
+
+    async def _backfill_attachments() -> None:
+        try:
+            updated, failed = await backfill_attachment_metadata(batch_size, concurrency)
+        finally:
+            await shutdown_process_pool()
+        console.print(f"Updated {updated} attachments, {failed} failed")
+
+    console.rule("Backfill attachment metadata.")
+    anyio.run(_backfill_attachments)
+
+
+@claim_management_group.command(
+    name="collect-blobs",
+    help="Delete attachment objects that no attachment references",
+)
+@click.option(
+    "--grace-period",
+    help="Keep objects modified within this many seconds (default: MINIO_BLOB_GC_GRACE_PERIOD)",
+    type=click.IntRange(0),
+    required=False,
+)
+@click.option(
+    "--dry-run",
+    help="Only count the objects that would be deleted",
+    is_flag=True,
+    default=False,
+)
+def collect_blobs(grace_period: int | None, dry_run: bool) -> None:
+    """Garbage collect unreferenced attachment objects.
+
+    Args:
+        grace_period (int | None): Seconds an unreferenced object is kept.
+        dry_run (bool): Only count the objects that would be deleted.
+    """
+    import anyio
+    from rich import get_console
+
+    from agentric.domain.requests.blobs import collect_unreferenced_objects
+
+    console = get_console()
+
+    async def _collect_blobs() -> None:
+        stats = await collect_unreferenced_objects(grace_period, dry_run=dry_run)
+        verb = "Would delete" if dry_run else "Deleted"
+        console.print(
+            f"Scanned {stats['scanned']} objects. {verb} {stats['deleted']}, {stats['failed']} failed"
+        )
+
+    console.rule("Collect unreferenced attachment objects.")
+    anyio.run(_collect_blobs)
+
+
+@claim_management_group.command(
+    name="benchmark-routing",
+    help="Replay recorded claims through candidate model routings",
+)
+@click.option(
+    "--routing",
+    "routings",
+    help="Candidate routing as NAME=PATH to a JSON file shaped like PIPELINE_MODEL_ROUTES (repeatable)",
+    type=click.STRING,
+    multiple=True,
+)
+@click.option(
+    "--request-id",
+    "request_ids",
+    help="Claim to replay (repeatable)",
+    type=click.UUID,
+    multiple=True,
+)
+@click.option(
+    "--team",
+    help="Replay the latest processed claims of this team when no request id is given",
+    type=click.Choice(["travelguard", "covermore"]),
+    default="travelguard",
+    show_default=True,
+)
+@click.option(
+    "--limit",
+    help="Number of latest claims replayed with --team",
+    type=click.IntRange(1, 500),
+    default=10,
+    show_default=True,
+)
+@click.option(
+    "--repeat",
+    help="Runs of every claim per routing",
+    type=click.IntRange(1, 20),
+    default=1,
+    show_default=True,
+)
+def benchmark_routing(
+    routings: tuple[str, ...],
+    request_ids: tuple[UUID, ...],
+    team: str,
+    limit: int,
+    repeat: int,
+) -> None:
+    """Report per stage latency and token cost of model routings on recorded claims.
+
+    The configured routing is always replayed as ``current``. Every run calls the
+    models, the response cache is not used.
+
+    Args:
+        routings (tuple[str, ...]): Candidate routings as ``NAME=PATH``.
+        request_ids (tuple[UUID, ...]): Claims to replay.
+        team (str): Team whose latest claims are replayed without request ids.
+        limit (int): Number of latest claims.
+        repeat (int): Runs of every claim per routing.
+    """
+    import json
+    from pathlib import Path
+
+    import anyio
+    from rich import get_console
+    from rich.table import Table
+
+    from agentric.domain.requests.routing import get_routes, parse_routes
+    from agentric.domain.requests.routing_benchmark import benchmark_routes, recent_claims
+    from agentric.lib.executor import shutdown_process_pool
+
+    console = get_console()
+
+    tables = {"current": get_routes()}
+    for routing in routings:
+        name, sep, path = routing.partition("=")
+        if not sep or not name or name in tables:
+            msg = f"Expected a unique NAME=PATH, got {routing!r}"
+            raise click.BadParameter(msg, param_hint="--routing")
+        try:
+            tables[name] = parse_routes(json.loads(Path(path).read_text(encoding="utf-8")))
+        except (OSError, ValueError) as e:
+            raise click.BadParameter(f"{routing}: {e}", param_hint="--routing") from e
+
+    def _fmt(value: float | None, spec: str) -> str:
+        return "-" if value is None else format(value, spec)
+
+    async def _benchmark_routing() -> None:
+        ids = list(request_ids) or await recent_claims(team, limit)
+        if not ids:
+            console.print("No claims to replay")
+            return
+        try:
+            reports = await benchmark_routes(ids, tables, repeat)
+        finally:
+            await shutdown_process_pool()
+        for report in reports.values():
+            summary = report.to_dict()
+            table = Table(
+                title=(
+                    f"{report.name}: {summary['runs']} runs, {summary['failed']} failed, "
+                    f"claim p50 {summary['p50']:.1f}s p95 {summary['p95']:.1f}s, "
+                    f"${_fmt(summary['cost_per_claim'], '.4f')} per claim"
+                )
+            )
+            table.add_column("stage")
+            table.add_column("model")
+            table.add_column("calls", justify="right")
+            table.add_column("p50 s", justify="right")
+            table.add_column("p95 s", justify="right")
+            table.add_column("input tokens / claim", justify="right")
+            table.add_column("output tokens / claim", justify="right")
+            table.add_column("$ / claim", justify="right")
+            for stage, stats in summary["stages"].items():
+                table.add_row(
+                    stage,
+                    ", ".join(stats["models"]),
+                    str(stats["calls"]),
+                    f"{stats['p50']:.1f}",
+                    f"{stats['p95']:.1f}",
+                    f"{stats['input_tokens']:.0f}",
+                    f"{stats['output_tokens']:.0f}",
+                    _fmt(stats["cost"], ".4f"),
+                )
+            console.print(table)
+
+    console.rule("Benchmark model routing.")
+    anyio.run(_benchmark_routing)
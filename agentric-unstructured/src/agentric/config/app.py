@@ -25,7 +25,7 @@ from litestar.plugins.sqlalchemy import (
 )
 from litestar.plugins.structlog import StructlogConfig
 from litestar.template import TemplateConfig
-from litestar_saq import QueueConfig, SAQConfig
+from litestar_saq import CronJob, QueueConfig, SAQConfig
 from litestar_vite import ViteConfig
 
 from agentric.lib.otel import configure_instrumentation
@@ -83,6 +83,26 @@ saq = SAQConfig(
             tasks=[
                 "agentric.domain.requests.tasks.process_travelguard_claims",
                 "agentric.domain.requests.tasks.process_covermore_claims",
+                "agentric.domain.requests.tasks.cleanup_gemini_files",
+                "agentric.domain.requests.tasks.collect_attachment_blobs",
+                "agentric.domain.requests.tasks.preprocess_attachment",
+            ],
+            scheduled_tasks=[
+                CronJob(
+                    function="agentric.domain.requests.tasks.cleanup_gemini_files",
+                    cron="*/30 * * * *",
+                    timeout=600,
+                ),
+                CronJob(
+                    function="agentric.domain.requests.tasks.collect_attachment_blobs",
+                    cron="15 3 * * *",
+                    timeout=3600,
+                ),
+            ],
+            startup=["agentric.lib.storage.start_object_storage"],
+            shutdown=[
+                "agentric.lib.storage.stop_object_storage",
+                "agentric.lib.executor.shutdown_process_pool",
             ],
 
         ),
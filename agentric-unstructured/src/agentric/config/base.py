@@ -279,6 +279,24 @@ class SaqSettings:
     """Auto start and stop `saq` processes when starting the Litestar application."""
 
 
+@dataclass
+class ExecutorSettings:
+    """Process pool used for CPU bound document parsing."""
+
+    MAX_WORKERS: int = field(default_factory=get_env("EXECUTOR_MAX_WORKERS", 2))
+    """The number of parser processes per API or worker process."""
+    TIMEOUT: float = field(default_factory=get_env("EXECUTOR_TIMEOUT", 60.0))
+    """Seconds a parsing task may run before its process is killed."""
+    MEMORY_LIMIT: int = field(
+        default_factory=get_env("EXECUTOR_MEMORY_LIMIT", 1024 * 1024 * 1024)
+    )
+    """Address space limit (in bytes) of every parser process. 0 disables the limit."""
+    MAX_TASKS_PER_CHILD: int = field(
+        default_factory=get_env("EXECUTOR_MAX_TASKS_PER_CHILD", 50)
+    )
+    """Parser processes are replaced after this many tasks to return fragmented memory."""
+
+
 @dataclass
 class OTEL:
     """Open Telemetry + Jaeger configurations."""
@@ -423,6 +441,34 @@ class MinioSettings:
     PUBLIC_ENDPOINT_URL: str = field(
         default_factory=get_env("MINIO_PUBLIC_ENDPOINT", "http://localhost:9100/")
     )
+    MAX_POOL_CONNECTIONS: int = field(
+        default_factory=get_env("MINIO_MAX_POOL_CONNECTIONS", 50)
+    )
+    """Size of the connection pool of the process wide S3 client."""
+    UPLOAD_PART_SIZE: int = field(
+        default_factory=get_env("MINIO_UPLOAD_PART_SIZE", 8 * 1024 * 1024)
+    )
+    """Part size (in bytes, at least 5 MiB) of streamed multipart uploads, the memory held per upload."""
+    PRESIGNED_URL_EXPIRY: int = field(
+        default_factory=get_env("MINIO_PRESIGNED_URL_EXPIRY", 900)
+    )
+    """Lifetime in seconds of presigned upload and download URLs."""
+    PRESIGNED_UPLOAD_MAX_SIZE: int = field(
+        default_factory=get_env("MINIO_PRESIGNED_UPLOAD_MAX_SIZE", 1_073_741_824)
+    )
+    """Largest object (in bytes) accepted when a presigned upload is completed."""
+    BLOB_GC_GRACE_PERIOD: int = field(
+        default_factory=get_env("MINIO_BLOB_GC_GRACE_PERIOD", 86400)
+    )
+    """Seconds an unreferenced attachment blob is kept before it is garbage collected."""
+    RANGE_READ_BLOCK_SIZE: int = field(
+        default_factory=get_env("MINIO_RANGE_READ_BLOCK_SIZE", 64 * 1024)
+    )
+    """Size (in bytes) of the blocks fetched by ranged reads of stored PDFs."""
+    RANGE_READ_CACHE_BLOCKS: int = field(
+        default_factory=get_env("MINIO_RANGE_READ_CACHE_BLOCKS", 64)
+    )
+    """Number of blocks a ranged read keeps in memory."""
 
     @property
     def client(self) -> S3FileSystem:
@@ -441,6 +487,146 @@ class MinioSettings:
 
 
 
+@dataclass
+class PipelineSettings:
+    """Claim processing pipeline configurations."""
+
+    ATTACHMENT_MEMORY_LIMIT: int = field(
+        default_factory=get_env("PIPELINE_ATTACHMENT_MEMORY_LIMIT", 256 * 1024 * 1024)
+    )
+    """Maximum number of attachment bytes a single claim job keeps in memory.
+
+    Attachments fetched once the limit is reached are spilled to a temporary file.
+    """
+    ATTACHMENT_SPILL_THRESHOLD: int = field(
+        default_factory=get_env("PIPELINE_ATTACHMENT_SPILL_THRESHOLD", 32 * 1024 * 1024)
+    )
+    """Attachments larger than this (in bytes) are always spilled to a temporary file."""
+    ATTACHMENT_FETCH_CONCURRENCY: int = field(
+        default_factory=get_env("PIPELINE_ATTACHMENT_FETCH_CONCURRENCY", 8)
+    )
+    """The number of attachments fetched from object storage at the same time per job."""
+    PREFETCH_MAX_PDF_SIZE: int = field(
+        default_factory=get_env("PIPELINE_PREFETCH_MAX_PDF_SIZE", 4 * 1024 * 1024)
+    )
+    """PDFs larger than this (in bytes) are not prefetched.
+
+    Classification reads their first pages with ranged requests, the whole file is only
+    fetched when a later stage needs it.
+    """
+    UPLOAD_CONCURRENCY: int = field(
+        default_factory=get_env("PIPELINE_UPLOAD_CONCURRENCY", 8)
+    )
+    """The number of attachments uploaded to the model file service at the same time per stage."""
+    GEMINI_FILE_EXPIRY_MARGIN: int = field(
+        default_factory=get_env("PIPELINE_GEMINI_FILE_EXPIRY_MARGIN", 3600)
+    )
+    """Seconds before its remote expiry that an uploaded Gemini file stops being reused."""
+    GEMINI_FILE_ORPHAN_GRACE: int = field(
+        default_factory=get_env("PIPELINE_GEMINI_FILE_ORPHAN_GRACE", 3600)
+    )
+    """Minimum age (in seconds) of an unregistered Gemini file of the registry before the janitor deletes it."""
+    SPECULATIVE_EVALUATION: bool = field(
+        default_factory=get_env("PIPELINE_SPECULATIVE_EVALUATION", False)
+    )
+    """Start the claim decision while the missing document check is still running.
+
+    The decision is cancelled when documents turn out to be missing.
+    """
+    PROMPT_CACHE_ENABLED: bool = field(
+        default_factory=get_env("PIPELINE_PROMPT_CACHE_ENABLED", True)
+    )
+    """Register static prompt prefixes as Gemini cached contents."""
+    PROMPT_CACHE_TTL: int = field(
+        default_factory=get_env("PIPELINE_PROMPT_CACHE_TTL", 3600)
+    )
+    """Lifetime (in seconds) of a Gemini cached content holding a static prompt prefix."""
+    PROMPT_CACHE_EXPIRY_MARGIN: int = field(
+        default_factory=get_env("PIPELINE_PROMPT_CACHE_EXPIRY_MARGIN", 300)
+    )
+    """Seconds before its remote expiry that a cached prompt prefix stops being referenced."""
+    RESPONSE_CACHE_ENABLED: bool = field(
+        default_factory=get_env("PIPELINE_RESPONSE_CACHE_ENABLED", True)
+    )
+    """Return the stored response of a model call with ``temperature=0`` made before with the same inputs."""
+    RESPONSE_CACHE_TTL: int = field(
+        default_factory=get_env("PIPELINE_RESPONSE_CACHE_TTL", 7 * 24 * 3600)
+    )
+    """Lifetime (in seconds) of a cached model response."""
+    RESPONSE_CACHE_MAX_ENTRIES: int = field(
+        default_factory=get_env("PIPELINE_RESPONSE_CACHE_MAX_ENTRIES", 50000)
+    )
+    """Maximum number of cached model responses, the least recently used ones are evicted first."""
+    RESPONSE_CACHE_MAX_ENTRY_SIZE: int = field(
+        default_factory=get_env("PIPELINE_RESPONSE_CACHE_MAX_ENTRY_SIZE", 1024 * 1024)
+    )
+    """Responses larger than this (in bytes, serialised) are not cached."""
+    MODEL_ROUTES: str = field(
+        default_factory=get_env("PIPELINE_MODEL_ROUTES", "")
+    )
+    """JSON overrides of the model, thinking budget and output limit of each pipeline stage.
+
+    A ``default`` object and optional ``travelguard`` and ``covermore`` objects mapping stage
+    names to route fields, see :mod:`agentric.domain.requests.routing`.
+    """
+    POLICY_RETRIEVAL_ENABLED: bool = field(
+        default_factory=get_env("PIPELINE_POLICY_RETRIEVAL_ENABLED", True)
+    )
+    """Send the relevant sections of the full policy to the claim decision instead of the whole file."""
+    POLICY_SECTION_LIMIT: int = field(
+        default_factory=get_env("PIPELINE_POLICY_SECTION_LIMIT", 8)
+    )
+    """The number of policy sections retrieved for a claim decision, on top of the pinned ones."""
+    CLASSIFIER_ENABLED: bool = field(
+        default_factory=get_env("PIPELINE_CLASSIFIER_ENABLED", True)
+    )
+    """Label attachments with the local cue classifier before asking the model."""
+    CLASSIFIER_CONFIDENCE: float = field(
+        default_factory=get_env("PIPELINE_CLASSIFIER_CONFIDENCE", 0.8)
+    )
+    """Minimum local classifier confidence for a label to skip the model."""
+    CLASSIFIER_AUDIT_RATE: float = field(
+        default_factory=get_env("PIPELINE_CLASSIFIER_AUDIT_RATE", 0.05)
+    )
+    """Share of jobs that also send locally labelled files to the model to measure precision and recall."""
+    TEXT_FIRST_STAGES: str = field(
+        default_factory=get_env("PIPELINE_TEXT_FIRST_STAGES", "")
+    )
+    """Comma separated stages that send the text of PDFs with a good text layer instead of uploading the file.
+
+    Any of ``extract_all_info``, ``check_missing_travelguard_documents``,
+    ``check_missing_covermore_documents``, ``handle_claims`` and ``handle_missing``.
+    Scans, images and other files are always uploaded.
+    """
+    TEXT_FIRST_MIN_PAGE_CHARS: int = field(
+        default_factory=get_env("PIPELINE_TEXT_FIRST_MIN_PAGE_CHARS", 40)
+    )
+    """Minimum number of characters on every page of a PDF for its text to replace the file."""
+    TEXT_FIRST_MIN_TEXT_RATIO: float = field(
+        default_factory=get_env("PIPELINE_TEXT_FIRST_MIN_TEXT_RATIO", 0.9)
+    )
+    """Minimum share of letters, digits, punctuation and symbols in the text of a PDF for it to replace the file.
+
+    Text layers with broken font encodings extract to control and private use characters.
+    """
+    IMAGE_NORMALIZATION_ENABLED: bool = field(
+        default_factory=get_env("PIPELINE_IMAGE_NORMALIZATION_ENABLED", True)
+    )
+    """Downscale and re-encode image attachments, and drop duplicate images, before sending them to the model."""
+    IMAGE_MAX_SIDE: int = field(
+        default_factory=get_env("PIPELINE_IMAGE_MAX_SIDE", 1536)
+    )
+    """Longest side (in pixels) of an image sent to the model.
+
+    Gemini bills larger images per 768x768 tile, 1536 pixels keep a photographed receipt
+    legible in at most four tiles.
+    """
+    IMAGE_QUALITY: int = field(
+        default_factory=get_env("PIPELINE_IMAGE_QUALITY", 85)
+    )
+    """WebP quality (0-100) of images sent to the model."""
+
+
 @dataclass
 class AppSettings:
     """Application configuration"""
@@ -554,6 +740,8 @@ class Settings:
     saq: SaqSettings = field(default_factory=SaqSettings)
     stats: SaqSettings = field(default_factory=SaqSettings)
     minio: MinioSettings = field(default_factory=MinioSettings)
+    pipeline: PipelineSettings = field(default_factory=PipelineSettings)
+    executor: ExecutorSettings = field(default_factory=ExecutorSettings)
 
     @classmethod
     def from_env(cls, dotenv_filename: str = ".env") -> Settings:
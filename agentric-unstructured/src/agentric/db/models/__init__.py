@@ -1,7 +1,10 @@
 from .chat import Chat
 from .chat_message import ChatMessage
+from .claim_checkpoint import ClaimCheckpoint
 from .customer import Customer
+from .document_text import DocumentText
 from .extraction import Extraction
+from .policy_document import PolicyDocument
 from .request import Request
 from .request_attachment import RequestAttachment
 from .role import Role
@@ -13,8 +16,11 @@ from .user_role import UserRole
 __all__ = (
     "Chat",
     "ChatMessage",
+    "ClaimCheckpoint",
     "Customer",
+    "DocumentText",
     "Extraction",
+    "PolicyDocument",
     "Request",
     "RequestAttachment",
     "Role",
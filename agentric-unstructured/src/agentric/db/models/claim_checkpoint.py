@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+from uuid import UUID  # noqa: TC003
+
+from advanced_alchemy.base import UUIDAuditBase
+from sqlalchemy import ForeignKey, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+if TYPE_CHECKING:
+    from .request import Request
+
+
+class ClaimCheckpoint(UUIDAuditBase):
+    """Output of one claim pipeline stage, used to resume or re-run a claim job."""
+
+    __tablename__ = "claim_checkpoints"
+    __table_args__ = (UniqueConstraint("request_id", "stage"),)
+
+    request_id: Mapped[UUID] = mapped_column(
+        ForeignKey("requests.id", ondelete="cascade"), nullable=False, index=True
+    )
+    pipeline: Mapped[str] = mapped_column(String(length=50), nullable=False)
+    stage: Mapped[str] = mapped_column(String(length=50), nullable=False)
+    output: Mapped[Any] = mapped_column(JSONB, nullable=True)
+
+    request: Mapped["Request"] = relationship(back_populates="checkpoints")
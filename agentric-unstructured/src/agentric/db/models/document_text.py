@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from advanced_alchemy.base import UUIDAuditBase
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class DocumentText(UUIDAuditBase):
+    """Text layer of a distinct PDF, one entry per page, extracted once and shared by every attachment."""
+
+    __tablename__ = "document_texts"
+
+    content_hash: Mapped[str] = mapped_column(
+        String(length=64), nullable=False, unique=True, index=True
+    )
+    page_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    has_text_layer: Mapped[bool] = mapped_column(nullable=False, default=False)
+    pages: Mapped[list[str]] = mapped_column(JSONB, nullable=False, default=list)
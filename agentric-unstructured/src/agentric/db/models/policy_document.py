@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from typing import Any
+
+from advanced_alchemy.base import UUIDAuditBase
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class PolicyDocument(UUIDAuditBase):
+    """A distinct policy wording, parsed once into sections and shared by every claim."""
+
+    __tablename__ = "policy_documents"
+
+    content_hash: Mapped[str] = mapped_column(
+        String(length=64), nullable=False, unique=True, index=True
+    )
+    file_name: Mapped[str] = mapped_column(String(length=255), nullable=False)
+    page_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    sections: Mapped[list[dict[str, Any]]] = mapped_column(JSONB, nullable=False, default=list)
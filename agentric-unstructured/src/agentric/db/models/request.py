@@ -13,12 +13,14 @@ from sqlalchemy import (
     Text,
     Float
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .enums import ClaimStatus, SubmissionStatus
 
 if TYPE_CHECKING:
     from .chat import Chat
+    from .claim_checkpoint import ClaimCheckpoint
     from .customer import Customer
     from .extraction import Extraction
 
@@ -103,6 +105,8 @@ class Request(UUIDAuditBase):
     )
     generated_decisions: Mapped[str | None] = mapped_column(Text, nullable=True)
     generated_thoughts: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Per stage timings of the last pipeline run, see `agentric.domain.requests.pipeline`
+    stage_timings: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     unique_identifier: Mapped[str | None] = mapped_column(Text, nullable=True)
     # Relations
     customer_id: Mapped[UUID] = mapped_column(ForeignKey("customer.id"), nullable=True)
@@ -114,3 +118,6 @@ class Request(UUIDAuditBase):
     chat: Mapped["Chat"] = relationship(
         back_populates="request", uselist=False, cascade="all, delete-orphan"
     )
+    checkpoints: Mapped[list["ClaimCheckpoint"]] = relationship(
+        back_populates="request", lazy="noload", passive_deletes=True
+    )
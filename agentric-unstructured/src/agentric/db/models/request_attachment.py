@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
 from typing import TYPE_CHECKING
 
 from advanced_alchemy.base import UUIDAuditBase
-from sqlalchemy import ForeignKey, String
+from advanced_alchemy.types import DateTimeUTC
+from sqlalchemy import BigInteger, Boolean, Float, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from agentric.db.models.request import Request
@@ -20,4 +22,18 @@ class RequestAttachment(UUIDAuditBase):
     )
     file_name: Mapped[str] = mapped_column(nullable=False)
     url: Mapped[str] = mapped_column(String(250), nullable=False)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, default=None)
+    size: Mapped[int | None] = mapped_column(BigInteger, nullable=True, default=None)
+    mime_type: Mapped[str | None] = mapped_column(String(100), nullable=True, default=None)
+    page_count: Mapped[int | None] = mapped_column(Integer, nullable=True, default=None)
+    has_text_layer: Mapped[bool | None] = mapped_column(Boolean, nullable=True, default=None)
+    provisional_label: Mapped[str | None] = mapped_column(String(50), nullable=True, default=None)
+    label_confidence: Mapped[float | None] = mapped_column(Float, nullable=True, default=None)
+    preprocessed_at: Mapped[datetime | None] = mapped_column(
+        DateTimeUTC(timezone=True), nullable=True, default=None
+    )
+    upload_key: Mapped[str | None] = mapped_column(
+        String(250), nullable=True, default=None, unique=True, index=True
+    )
+    """Object key of the presigned upload the attachment was registered from."""
     chat: Mapped["Chat | None"] = relationship(back_populates="attachments")
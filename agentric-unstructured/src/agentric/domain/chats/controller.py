@@ -1,12 +1,16 @@
 import json
+import mimetypes
 import random
 import re
 import warnings
 from collections.abc import AsyncGenerator
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime
+from pathlib import PurePosixPath
 from typing import Annotated, Literal
-from uuid import UUID
+from uuid import UUID, uuid4
 
+from advanced_alchemy.exceptions import IntegrityError
 from autogen_agentchat.conditions import ExternalTermination
 from autogen_core.models import ModelInfo
 from autogen_ext.models.openai import OpenAIChatCompletionClient
@@ -15,7 +19,7 @@ from litestar.background_tasks import BackgroundTask
 from litestar.datastructures import UploadFile
 from litestar.di import Provide
 from litestar.enums import RequestEncodingType
-from litestar.exceptions import NotFoundException
+from litestar.exceptions import ClientException, NotFoundException
 from litestar.params import Body
 from litestar.response import Stream
 from litestar.serialization import encode_json
@@ -35,6 +39,9 @@ from agentric.domain.chats.deps import (
 from agentric.domain.chats.schemas import (
     Chat,
     ChatMessage,
+    PresignedUpload,
+    PresignedUploadComplete,
+    PresignedUploadCreate,
     StreamChat,
     ToolMessageResponse,
 )
@@ -50,13 +57,28 @@ from agentric.domain.requests.deps import (
     provide_request_attachment_service,
     provide_request_service,
 )
+from agentric.domain.requests.attachment_metadata import (
+    AttachmentMetadata,
+    describe_content,
+    needs_preprocessing,
+    sniff_mime_type,
+)
 from agentric.domain.requests.schemas import CreateRequestScheama
 from agentric.domain.requests.schemas import Request as RequestSchema
 from agentric.domain.requests.services import RequestAttachmentService, RequestService
+from agentric.domain.requests.tasks import enqueue_attachment_preprocessing
 from agentric.domain.requests.utils import convert_docx_bytes_to_pdf_bytes
 from agentric.domain.teams.guards import requires_has_one_team
 from agentric.lib.otel import parse_jwt_token
-from agentric.lib.utils import read_minio_file, save_file_to_minio
+from agentric.lib.storage import object_size, presigned_post
+from agentric.lib.uploads import open_file_upload
+from agentric.lib.utils import (
+    delete_minio_file,
+    parse_minio_url,
+    read_minio_file,
+    save_file_to_minio,
+    stream_file_to_minio,
+)
 
 settings = get_settings()
 API_BASE_URL = settings.app.API_BASE_URL
@@ -92,6 +114,24 @@ class UploadFiles:
     files: list[UploadFile]
 
 
+def _upload_prefix(chat_id: UUID) -> str:
+    return f"uploads/{chat_id}/"
+
+
+async def _ensure_chat(chats_service: ChatService, chat_id: UUID, user: m.User) -> None:
+    if await chats_service.get_one_or_none(id=chat_id) is not None:
+        return
+    chat_number = str(random.randint(100000, 999999)).zfill(6)
+    await chats_service.create(
+        data={
+            "id": chat_id,
+            "title": f"#Chat-{chat_number}",
+            "user_id": user.id,
+        },
+        auto_commit=True,
+    )
+
+
 class ChatController(Controller):
     tags = ["Chat"]
     path = "/api/chats"
@@ -109,42 +149,136 @@ class ChatController(Controller):
     async def submit_claim(
         self,
         chat_id: Annotated[UUID, "The Chat ID"],
-        data: Annotated[UploadFile, Body(media_type=RequestEncodingType.MULTI_PART)],
+        request: Request,
         request_attachment_service: RequestAttachmentService,
         chats_service: ChatService,
         current_user: m.User,
     ) -> dict[str, str]:
-        file = await data.read()
-        chats_obj = await chats_service.get_one_or_none(id=chat_id)
-
-        if chats_obj is None:
-            chat_number = str(random.randint(100000, 999999)).zfill(6)
-            await chats_service.create(
-                data={
-                    "id": chat_id,
-                    "title": f"#Chat-{chat_number}",
-                    "user_id": current_user.id,
-                },
-                auto_commit=True,
-            )
-        content = file
-        content_type = data.content_type
-        file_name = data.filename
+        """Store the uploaded file, streaming it to object storage as it arrives."""
+        upload = await open_file_upload(request)
+        await _ensure_chat(chats_service, chat_id, current_user)
+        content_type = upload.content_type
+        file_name = upload.filename
 
         if (
             content_type
             == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         ):
+            # the conversion needs the whole document, only PDFs are streamed
+            file = b"".join([chunk async for chunk in upload.chunks])
             content_type = "application/pdf"
-            content = convert_docx_bytes_to_pdf_bytes(file)
+            content = await convert_docx_bytes_to_pdf_bytes(file)
             file_name = file_name.replace(".docx", ".pdf")
-        url = await save_file_to_minio(
-            filename=file_name, content=content, content_type=content_type
-        )
+            url = await save_file_to_minio(
+                filename=file_name, content=content, content_type=content_type
+            )
+            metadata = await describe_content(content, file_name)
+        else:
+            url, stored = await stream_file_to_minio(
+                filename=file_name, chunks=upload.chunks, content_type=content_type
+            )
+            metadata = AttachmentMetadata(
+                size=stored.size,
+                sha256=stored.sha256,
+                mime_type=sniff_mime_type(stored.head, file_name),
+            )
+            if not needs_preprocessing(metadata):
+                metadata = replace(metadata, preprocessed_at=datetime.now(UTC))
         attachment = await request_attachment_service.create(
-            data={"chat_id": chat_id, "url": url, "file_name": file_name},
+            data={"chat_id": chat_id, "url": url, "file_name": file_name, **metadata.to_dict()},
             auto_commit=True,
         )
+        if needs_preprocessing(metadata):
+            # page count, text and label need the whole document, a job reads it back
+            await enqueue_attachment_preprocessing(queue, attachment.id)
+        return {"attachment_id": str(attachment.id)}
+
+    @post("/{chat_id:uuid}/uploads")
+    async def create_upload(
+        self,
+        chat_id: Annotated[UUID, "The Chat ID"],
+        data: PresignedUploadCreate,
+    ) -> PresignedUpload:
+        """Issue a presigned form upload of one file, directly to MinIO.
+
+        The signed policy rejects files larger than ``MINIO_PRESIGNED_UPLOAD_MAX_SIZE``.
+        The upload is registered as attachment by ``uploads/complete``.
+        """
+        file_name = PurePosixPath(data.file_name.replace("\\", "/")).name or "upload"
+        content_type = (
+            data.content_type
+            or mimetypes.guess_type(file_name)[0]
+            or "application/octet-stream"
+        )
+        key = f"{_upload_prefix(chat_id)}{uuid4().hex}/{file_name}"
+        url, fields = presigned_post(
+            key, max_size=settings.minio.PRESIGNED_UPLOAD_MAX_SIZE, content_type=content_type
+        )
+        return PresignedUpload(
+            key=key,
+            url=url,
+            fields=fields,
+            expires_in=settings.minio.PRESIGNED_URL_EXPIRY,
+        )
+
+    @post("/{chat_id:uuid}/uploads/complete")
+    async def complete_upload(
+        self,
+        chat_id: Annotated[UUID, "The Chat ID"],
+        data: PresignedUploadComplete,
+        request_attachment_service: RequestAttachmentService,
+        chats_service: ChatService,
+        current_user: m.User,
+    ) -> dict[str, str]:
+        """Register a file uploaded through a presigned URL as attachment of the chat.
+
+        Completing the same upload again returns the attachment registered first.
+        """
+        if not data.key.startswith(_upload_prefix(chat_id)):
+            raise ClientException(detail="The upload does not belong to this chat")
+        # looked up by the upload key, the url moves to the content addressed blob
+        existing = await request_attachment_service.get_one_or_none(upload_key=data.key)
+        if existing is not None:
+            return {"attachment_id": str(existing.id)}
+        url = f"{settings.minio.BUCKET}/{data.key}"
+
+        size = await object_size(settings.minio.BUCKET, data.key)
+        if size is None:
+            raise NotFoundException(detail="The file has not been uploaded")
+        if size > settings.minio.PRESIGNED_UPLOAD_MAX_SIZE:
+            await delete_minio_file(url)
+            raise ClientException(detail="The file is too large", status_code=413)
+
+        await _ensure_chat(chats_service, chat_id, current_user)
+        file_name = data.file_name
+        if data.key.lower().endswith(".docx"):
+            # DOCX files are converted to PDF like in submit-claim, which needs the bytes here
+            content = await convert_docx_bytes_to_pdf_bytes(await read_minio_file(url))
+            pdf_url = await save_file_to_minio(
+                filename=f"{data.key[:-5]}.pdf", content=content, content_type="application/pdf"
+            )
+            await delete_minio_file(url)
+            url = pdf_url
+            file_name = file_name.replace(".docx", ".pdf")
+            values = (await describe_content(content, file_name)).to_dict()
+        else:
+            # the API never saw the bytes, the preprocessing job reads them
+            values = {"size": size}
+
+        try:
+            attachment = await request_attachment_service.create(
+                data={"chat_id": chat_id, "url": url, "file_name": file_name, "upload_key": data.key, **values},
+                auto_commit=True,
+            )
+        except IntegrityError:
+            # a concurrent completion of the same upload registered it first
+            await request_attachment_service.repository.session.rollback()
+            existing = await request_attachment_service.get_one_or_none(upload_key=data.key)
+            if existing is None:
+                raise
+            return {"attachment_id": str(existing.id)}
+        if values.get("preprocessed_at") is None:
+            await enqueue_attachment_preprocessing(queue, attachment.id)
         return {"attachment_id": str(attachment.id)}
 
     @post(
@@ -452,13 +586,17 @@ class ChatController(Controller):
 
                 if attachment is None:
                     continue
-                content_bytes = await read_minio_file(attachment.url)
+                file_size = attachment.size
+                if file_size is None:
+                    # uploaded before sizes were recorded
+                    bucket_name, key = parse_minio_url(attachment.url)
+                    file_size = await object_size(bucket_name, key) or 0
 
                 file_mesg = {
                     "type": "FILE",
                     "message": {
                         "file_name": attachment.file_name,
-                        "file_size": len(content_bytes),
+                        "file_size": file_size,
                     },
                 }
 
@@ -94,3 +94,22 @@ class ChatDetail(BaseModel):
     messages: list[ChatMessage] = Field(default_factory=list)
 
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
+
+
+class PresignedUploadCreate(BaseModel):
+    file_name: str = Field(min_length=1, max_length=120)
+    content_type: str | None = None
+
+
+class PresignedUpload(BaseModel):
+    key: str
+    url: str
+    method: Literal["POST"] = "POST"
+    fields: dict[str, str]
+    """Form fields sent before the ``file`` field of the ``multipart/form-data`` upload."""
+    expires_in: int
+
+
+class PresignedUploadComplete(BaseModel):
+    key: str
+    file_name: str = Field(min_length=1, max_length=120)
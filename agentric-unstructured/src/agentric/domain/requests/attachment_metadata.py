@@ -0,0 +1,230 @@
+"""Metadata and preprocessing of claim attachments, stored on ``request_attachments``.
+
+Size, sha256, the sniffed MIME type, the page count and whether a PDF has a text layer
+are recorded when a file is uploaded, so consumers read the columns instead of fetching
+the object. Uploads that need the whole document for that (PDFs) are finished by the
+``preprocess_attachment`` job, which also fills the document text cache and stores the
+local classifier's provisional label that the claim pipeline reuses.
+
+Rows uploaded before the columns existed are filled in, and their objects moved to
+content addressed keys, by :func:`backfill_attachment_metadata`
+(``agentric claims backfill-attachments``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from advanced_alchemy.filters import LimitOffset, OrderBy
+from sqlalchemy import or_
+
+from agentric.config.app import alchemy
+from agentric.db import models as m
+from agentric.domain.requests.attachments import PDF_MIME_TYPE, guess_mime_type
+from agentric.domain.requests.doc_classifier import classify_text
+from agentric.domain.requests.document_text import get_document_pages, join_pages
+from agentric.domain.requests.services import RequestAttachmentService
+from agentric.lib.concurrency import gather_bounded
+from agentric.lib.storage import BLOB_PREFIX, promote_to_blob
+
+if TYPE_CHECKING:
+    from uuid import UUID
+
+__all__ = (
+    "AttachmentMetadata",
+    "backfill_attachment_metadata",
+    "describe_content",
+    "needs_preprocessing",
+    "preprocess_attachment",
+    "sniff_mime_type",
+)
+
+logger = structlog.get_logger()
+
+_SIGNATURES: tuple[tuple[bytes, str], ...] = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+    (b"{\\rtf", "application/rtf"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/msword"),
+)
+_ZIP_MIME_TYPES = {
+    "application/zip",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+
+def sniff_mime_type(head: bytes, file_name: str) -> str:
+    """Detect the MIME type from the leading bytes of a file.
+
+    The file name is only used for formats without a signature (text) and to tell
+    apart the zip based Office formats.
+
+    Args:
+        head (bytes): The first bytes of the file, 4 KiB are enough
+        file_name (str): File name
+
+    Returns:
+        str: The MIME type, ``application/octet-stream`` when unknown.
+    """
+    guessed = guess_mime_type(file_name)
+    # PDF readers accept up to 1 KiB of garbage before the header
+    if b"%PDF-" in head[:1024]:
+        return PDF_MIME_TYPE
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"PK\x03\x04"):
+        return guessed if guessed in _ZIP_MIME_TYPES else "application/zip"
+    return guessed
+
+
+@dataclass(frozen=True)
+class AttachmentMetadata:
+    """Column values of one attachment."""
+
+    size: int
+    sha256: str | None
+    mime_type: str
+    page_count: int | None = None
+    has_text_layer: bool | None = None
+    provisional_label: str | None = None
+    label_confidence: float | None = None
+    preprocessed_at: datetime | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+async def describe_content(content: bytes, file_name: str) -> AttachmentMetadata:
+    """Compute the metadata of an attachment from its content.
+
+    The pages of a PDF are parsed in the process pool and stored in the document text
+    cache, the first two are labelled by the local classifier. A PDF that can not be
+    parsed keeps the page count, text layer and label unset.
+    """
+    sha256 = hashlib.sha256(content).hexdigest()
+    mime_type = sniff_mime_type(content[:4096], file_name)
+    page_count = has_text_layer = label = confidence = None
+    if mime_type == PDF_MIME_TYPE:
+        try:
+            pages = await get_document_pages(sha256, content)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to read PDF text", file_name=file_name, exc_info=True)
+        else:
+            page_count = len(pages)
+            first_pages_text = join_pages(pages, 2)
+            has_text_layer = bool(first_pages_text)
+            if has_text_layer:
+                label, confidence = classify_text(first_pages_text)
+    return AttachmentMetadata(
+        size=len(content),
+        sha256=sha256,
+        mime_type=mime_type,
+        page_count=page_count,
+        has_text_layer=has_text_layer,
+        provisional_label=label,
+        label_confidence=confidence,
+        preprocessed_at=datetime.now(UTC),
+    )
+
+
+def needs_preprocessing(metadata: AttachmentMetadata) -> bool:
+    """Whether an upload described from its leading bytes only still has to be preprocessed."""
+    return metadata.mime_type == PDF_MIME_TYPE and metadata.preprocessed_at is None
+
+
+async def _preprocess(service: RequestAttachmentService, attachment: m.RequestAttachment) -> None:
+    from agentric.lib.utils import parse_minio_url, read_minio_file
+
+    content = await read_minio_file(attachment.url)
+    metadata = await describe_content(content, attachment.file_name)
+    values = metadata.to_dict()
+    bucket_name, key = parse_minio_url(attachment.url)
+    if not key.startswith(BLOB_PREFIX) and metadata.sha256 is not None:
+        # presigned uploads and files stored before content addressing move to their blob.
+        # The old object stays, a claim job may have read the old url already; uploads/ is
+        # removed by collect_unreferenced_objects once it is past its grace period
+        blob = await promote_to_blob(key, metadata.sha256, bucket=bucket_name, delete_source=False)
+        values["url"] = f"{bucket_name}/{blob}"
+    await service.update(item_id=attachment.id, data=values, auto_commit=True)
+
+
+async def preprocess_attachment(attachment_id: UUID | str) -> bool:
+    """Read an attachment from storage and store its metadata, text and provisional label.
+
+    Returns:
+        bool: Whether the attachment exists.
+    """
+    async with RequestAttachmentService.new(config=alchemy) as service:
+        attachment = await service.get_one_or_none(id=attachment_id)
+        if attachment is None:
+            return False
+        await _preprocess(service, attachment)
+    return True
+
+
+async def backfill_attachment_metadata(
+    batch_size: int = 100, concurrency: int = 8
+) -> tuple[int, int]:
+    """Preprocess every attachment that has not been preprocessed yet.
+
+    Attachments whose object is not stored under its content hash yet are moved to it.
+
+    Attachments are read in batches of ``batch_size`` ordered by id, at most
+    ``concurrency`` objects are fetched at a time. Attachments that fail (e.g. a missing
+    object) are skipped and picked up again by the next run.
+
+    Returns:
+        tuple[int, int]: Number of updated and failed attachments.
+    """
+
+    async def _process(attachment: m.RequestAttachment) -> None:
+        # one session per attachment, sessions must not be shared between tasks
+        async with RequestAttachmentService.new(config=alchemy) as service:
+            await _preprocess(service, attachment)
+
+    updated = failed = 0
+    last_id: UUID | None = None
+    while True:
+        async with RequestAttachmentService.new(config=alchemy) as service:
+            filters: list[Any] = [
+                or_(
+                    m.RequestAttachment.preprocessed_at.is_(None),
+                    m.RequestAttachment.url.not_like(f"%/{BLOB_PREFIX}%"),
+                )
+            ]
+            if last_id is not None:
+                filters.append(m.RequestAttachment.id > last_id)
+            batch = await service.list(
+                *filters,
+                OrderBy(field_name="id", sort_order="asc"),
+                LimitOffset(limit=batch_size, offset=0),
+            )
+        if not batch:
+            return updated, failed
+        last_id = batch[-1].id
+
+        results = await gather_bounded(_process, batch, limit=concurrency)
+        for attachment, result in zip(batch, results, strict=True):
+            if isinstance(result, Exception):
+                failed += 1
+                logger.warning(
+                    "Failed to backfill attachment",
+                    attachment_id=str(attachment.id),
+                    error=str(result),
+                )
+            else:
+                updated += 1
+        logger.info("Backfilled attachment batch", updated=updated, failed=failed)
@@ -0,0 +1,436 @@
+"""Job scoped attachment store for the claim pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import mimetypes
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import aiofile
+import structlog
+from google.genai import types
+
+from agentric.config.base import get_settings
+from agentric.domain.requests.document_text import (
+    format_pages,
+    get_cached_pages,
+    get_document_pages,
+    join_pages,
+    read_first_pages,
+    usable_text_layer,
+)
+from agentric.domain.requests.file_registry import upload_file
+from agentric.domain.requests.llm import DEFAULT_MIME_TYPE
+from agentric.lib.concurrency import gather_bounded
+from agentric.lib.executor import run_in_process
+from agentric.lib.parsing import NormalizedImage, normalize_image, pdf_pages_text
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import TracebackType
+    from uuid import UUID
+
+    from agentric.db import models as m
+
+__all__ = ("PDF_MIME_TYPE", "AttachmentStore", "ModelContents", "duplicate_note", "guess_mime_type")
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+PDF_MIME_TYPE = "application/pdf"
+
+
+def guess_mime_type(file_name: str) -> str:
+    """Guess the MIME type of an attachment from its file name.
+
+    Args:
+        file_name (str): Attachment file name
+
+    Returns:
+        str: The MIME type, ``application/octet-stream`` when unknown.
+    """
+    mime_type, _ = mimetypes.guess_type(file_name)
+    return mime_type or DEFAULT_MIME_TYPE
+
+
+def duplicate_note(skipped: dict[str, str]) -> str:
+    """Prompt line telling the model that a skipped attachment is a copy of one it received."""
+    return f"[FILENAME:{skipped['filename']}] is an exact copy of [FILENAME:{skipped['duplicate_of']}], sent once."
+
+
+@dataclass
+class ModelContents:
+    """Attachments prepared for a model call by :meth:`AttachmentStore.model_contents`."""
+
+    parts: list[Any]
+    failed: list[dict[str, str]]
+    texts: int = 0
+    """Number of attachments sent as text."""
+    files: int = 0
+    """Number of attachments uploaded."""
+    skipped: list[dict[str, str]] = field(default_factory=list)
+    """``{"filename", "duplicate_of"}`` of every image left out as a copy, see :meth:`AttachmentStore.distinct`."""
+
+    @property
+    def mode(self) -> str:
+        """``text``, ``binary`` or ``mixed``, how the attachments are sent."""
+        if self.texts and self.files:
+            return "mixed"
+        return "text" if self.texts else "binary"
+
+
+@dataclass
+class _Entry:
+    attachment: m.RequestAttachment
+    mime_type: str
+    content: bytes | None = None
+    spill_path: Path | None = None
+    size: int = 0
+    error: Exception | None = None
+    pages: list[str] | None = None
+    first_pages: list[str] | None = None
+    image: NormalizedImage | None = None
+    image_checked: bool = False
+
+
+class AttachmentStore:
+    """Fetch every attachment of a claim once and serve it to all pipeline stages.
+
+    Objects are downloaded concurrently on :meth:`prefetch` (or lazily on first access).
+    PDFs above ``PIPELINE_PREFETCH_MAX_PDF_SIZE`` are only downloaded on first access, their
+    first pages are read with ranged requests for classification.
+    Content is kept in memory up to ``memory_limit`` bytes; objects above
+    ``spill_threshold`` or fetched once the limit is reached are written to a temporary
+    directory that is removed when the store is closed.
+    """
+
+    def __init__(
+        self,
+        attachments: Iterable[m.RequestAttachment],
+        *,
+        memory_limit: int | None = None,
+        spill_threshold: int | None = None,
+        concurrency: int | None = None,
+        upload_concurrency: int | None = None,
+    ) -> None:
+        self.memory_limit = memory_limit or settings.pipeline.ATTACHMENT_MEMORY_LIMIT
+        self.spill_threshold = spill_threshold or settings.pipeline.ATTACHMENT_SPILL_THRESHOLD
+        self.concurrency = concurrency or settings.pipeline.ATTACHMENT_FETCH_CONCURRENCY
+        self.upload_concurrency = upload_concurrency or settings.pipeline.UPLOAD_CONCURRENCY
+        self._entries: dict[UUID, _Entry] = {}
+        self._locks: dict[UUID, asyncio.Lock] = {}
+        self._memory_used = 0
+        self._spill_dir: Path | None = None
+        for attachment in attachments:
+            self._add(attachment)
+
+    async def __aenter__(self) -> AttachmentStore:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _loaded(self, entry: _Entry) -> bool:
+        return entry.content is not None or entry.spill_path is not None
+
+    def _add(self, attachment: m.RequestAttachment) -> _Entry:
+        entry = self._entries.get(attachment.id)
+        if entry is None:
+            entry = _Entry(
+                attachment=attachment,
+                mime_type=attachment.mime_type or guess_mime_type(attachment.file_name),
+            )
+            self._entries[attachment.id] = entry
+            self._locks[attachment.id] = asyncio.Lock()
+        return entry
+
+    @property
+    def memory_used(self) -> int:
+        """Number of attachment bytes currently held in memory."""
+        return self._memory_used
+
+    def mime_type(self, attachment: m.RequestAttachment) -> str:
+        """Return the MIME type of an attachment, sniffed on upload or guessed from its name."""
+        return self._add(attachment).mime_type
+
+    async def prefetch(self) -> None:
+        """Download all registered attachments concurrently, except large PDFs.
+
+        Failures are recorded per attachment and re-raised by :meth:`read`, so a single
+        broken object does not abort the whole job.
+        """
+        entries = [
+            entry
+            for entry in self._entries.values()
+            if entry.mime_type != PDF_MIME_TYPE
+            or entry.attachment.size is None
+            or entry.attachment.size <= settings.pipeline.PREFETCH_MAX_PDF_SIZE
+        ]
+        await gather_bounded(self._load, entries, limit=self.concurrency)
+        logger.info("Prefetched claim attachments", **self.stats())
+
+    async def _load(self, entry: _Entry) -> None:
+        from agentric.lib.utils import read_minio_file
+
+        async with self._locks[entry.attachment.id]:
+            if self._loaded(entry) or entry.error is not None:
+                return
+            try:
+                content = await read_minio_file(entry.attachment.url)
+            except Exception as e:  # noqa: BLE001
+                entry.error = e
+                return
+            entry.size = len(content)
+            if entry.size > self.spill_threshold or self._memory_used + entry.size > self.memory_limit:
+                entry.spill_path = await self._spill(entry, content)
+            else:
+                entry.content = content
+                self._memory_used += entry.size
+
+    async def _spill(self, entry: _Entry, content: bytes) -> Path:
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="agentric-attachments-"))
+        path = self._spill_dir / str(entry.attachment.id)
+        async with aiofile.async_open(path, "wb") as f:
+            await f.write(content)
+        return path
+
+    async def read(self, attachment: m.RequestAttachment) -> bytes:
+        """Return the content of an attachment, fetching it on first access.
+
+        Raises:
+            Exception: The error raised while fetching the object from storage.
+        """
+        entry = self._add(attachment)
+        await self._load(entry)
+        if entry.error is not None:
+            raise entry.error
+        if entry.content is not None:
+            return entry.content
+        assert entry.spill_path is not None
+        async with aiofile.async_open(entry.spill_path, "rb") as f:
+            return await f.read()
+
+    async def _normalized_image(self, attachment: m.RequestAttachment) -> NormalizedImage | None:
+        entry = self._add(attachment)
+        if (
+            not settings.pipeline.IMAGE_NORMALIZATION_ENABLED
+            or not entry.mime_type.startswith("image/")
+            or entry.mime_type == "image/svg+xml"
+        ):
+            return None
+        if not entry.image_checked:
+            content = await self.read(attachment)
+            try:
+                entry.image = await run_in_process(
+                    normalize_image,
+                    content,
+                    settings.pipeline.IMAGE_MAX_SIDE,
+                    settings.pipeline.IMAGE_QUALITY,
+                )
+            except Exception:  # noqa: BLE001
+                logger.warning("Failed to normalize image", file_name=attachment.file_name, exc_info=True)
+            entry.image_checked = True
+        return entry.image
+
+    async def model_file(self, attachment: m.RequestAttachment) -> tuple[bytes, str]:
+        """Return the content and MIME type of an attachment as it is sent to the model.
+
+        Images are downscaled to ``PIPELINE_IMAGE_MAX_SIDE`` pixels and re-encoded as WebP
+        without metadata, once per job. Images that can not be decoded and multi frame
+        images are sent unchanged.
+        """
+        image = await self._normalized_image(attachment)
+        if image is not None:
+            return image.content, image.mime_type
+        return await self.read(attachment), self.mime_type(attachment)
+
+    async def distinct(
+        self, attachments: Iterable[m.RequestAttachment]
+    ) -> tuple[list[m.RequestAttachment], list[dict[str, str]]]:
+        """Drop images that are exact copies of an earlier image of ``attachments``.
+
+        Copies are images whose normalized pixels are identical, e.g. the same file
+        uploaded twice or under another name. Similar looking images (a matching difference
+        hash) are all kept, they may be different receipts from the same template.
+
+        Returns:
+            tuple: The attachments to send, in order, and a ``{"filename", "duplicate_of"}``
+            entry for every image left out.
+        """
+        attachments = list(attachments)
+        images = await gather_bounded(self._normalized_image, attachments, limit=self.concurrency)
+        seen: dict[tuple[int, str], m.RequestAttachment] = {}
+        distinct: list[m.RequestAttachment] = []
+        skipped: list[dict[str, str]] = []
+        for attachment, image in zip(attachments, images, strict=True):
+            if isinstance(image, NormalizedImage):
+                original = seen.setdefault((image.dhash, image.pixels_sha256), attachment)
+                if original is not attachment:
+                    logger.info(
+                        "Skipped duplicate image",
+                        file_name=attachment.file_name,
+                        duplicate_of=original.file_name,
+                    )
+                    skipped.append({"filename": str(attachment.file_name), "duplicate_of": str(original.file_name)})
+                    continue
+            distinct.append(attachment)
+        return distinct, skipped
+
+    async def upload(self, attachment: m.RequestAttachment) -> types.File:
+        """Upload an attachment to the Gemini file service, see :meth:`model_file`."""
+        return await upload_file(*await self.model_file(attachment))
+
+    async def upload_all(
+        self, attachments: Iterable[m.RequestAttachment]
+    ) -> tuple[list[types.File], list[dict[str, str]], list[dict[str, str]]]:
+        """Upload attachments concurrently, at most ``upload_concurrency`` at a time.
+
+        Duplicate images are skipped, see :meth:`distinct`.
+
+        Returns:
+            tuple: The uploaded files in the order of ``attachments``, a
+            ``{"filename", "reason"}`` entry for every attachment that failed and a
+            ``{"filename", "duplicate_of"}`` entry for every skipped duplicate.
+        """
+        attachments, skipped = await self.distinct(attachments)
+        results = await gather_bounded(self.upload, attachments, limit=self.upload_concurrency)
+        uploaded_files: list[types.File] = []
+        failed_files: list[dict[str, str]] = []
+        for attachment, result in zip(attachments, results, strict=True):
+            if isinstance(result, Exception):
+                failed_files.append({"filename": str(attachment.file_name), "reason": str(result)})
+            else:
+                uploaded_files.append(result)
+        return uploaded_files, failed_files, skipped
+
+    async def pages_text(self, attachment: m.RequestAttachment) -> list[str]:
+        """Return the text of every page of a PDF attachment from the document text cache.
+
+        The PDF is only downloaded and parsed when its text is not cached yet. Returns an
+        empty list for non-PDF attachments.
+        """
+        entry = self._add(attachment)
+        if entry.mime_type != PDF_MIME_TYPE:
+            return []
+        if entry.pages is None:
+            content_hash = attachment.sha256 or hashlib.sha256(await self.read(attachment)).hexdigest()
+            entry.pages = await get_document_pages(content_hash, partial(self.read, attachment))
+        return entry.pages
+
+    async def first_pages_text(self, attachment: m.RequestAttachment) -> str:
+        """Return the text of the first two pages of a PDF attachment.
+
+        The cached text is used when the document was parsed before. Otherwise only the
+        first two pages are parsed, the whole document is left to the stages that need
+        it. A PDF that is not downloaded yet is read with ranged requests, so the I/O
+        does not grow with the size of the document. Returns an empty string for non-PDF
+        attachments and PDFs without a text layer.
+        """
+        entry = self._add(attachment)
+        if entry.mime_type != PDF_MIME_TYPE or attachment.has_text_layer is False:
+            return ""
+        if entry.pages is None and attachment.sha256 is not None:
+            entry.pages = await get_cached_pages(attachment.sha256)
+        if entry.pages is not None:
+            return join_pages(entry.pages, 2)
+        if entry.first_pages is None and not self._loaded(entry):
+            try:
+                entry.first_pages = await read_first_pages(attachment.url, 2)
+            except Exception:  # noqa: BLE001
+                logger.warning("Ranged PDF read failed", file_name=attachment.file_name, exc_info=True)
+        if entry.first_pages is None:
+            entry.first_pages = await run_in_process(pdf_pages_text, await self.read(attachment), 2)
+        return join_pages(entry.first_pages, 2)
+
+    async def document_text(self, attachment: m.RequestAttachment) -> str | None:
+        """Return the text of a PDF attachment when its text layer can replace the file.
+
+        Returns ``None`` for other attachments, scans and PDFs that can not be parsed.
+        """
+        entry = self._add(attachment)
+        if entry.mime_type != PDF_MIME_TYPE or attachment.has_text_layer is False:
+            return None
+        try:
+            pages = await self.pages_text(attachment)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to read PDF text", file_name=attachment.file_name, exc_info=True)
+            return None
+        return format_pages(pages) if usable_text_layer(pages) else None
+
+    async def model_contents(
+        self, attachments: Iterable[m.RequestAttachment], *, text_first: bool = False
+    ) -> ModelContents:
+        """Prepare attachments for a model call.
+
+        In text first mode PDFs whose text layer passes the quality check are sent as text,
+        every attachment preceded by a ``[FILENAME:...]`` marker, and only the remaining
+        files are uploaded. Otherwise every attachment is uploaded as by :meth:`upload_all`.
+        Duplicate images are skipped in both modes, a note in ``parts`` names the file they
+        copy so the model still knows they were submitted.
+        """
+        attachments, skipped = await self.distinct(attachments)
+        notes = [{"text": duplicate_note(entry)} for entry in skipped]
+        if not text_first:
+            uploaded_files, failed_files, _ = await self.upload_all(attachments)
+            return ModelContents(
+                parts=[*uploaded_files, *notes], failed=failed_files, files=len(uploaded_files), skipped=skipped
+            )
+
+        texts = await gather_bounded(self.document_text, attachments, limit=self.concurrency)
+        to_upload = [
+            attachment
+            for attachment, text in zip(attachments, texts, strict=True)
+            if not isinstance(text, str)
+        ]
+        results = dict(
+            zip(
+                (attachment.id for attachment in to_upload),
+                await gather_bounded(self.upload, to_upload, limit=self.upload_concurrency),
+                strict=True,
+            )
+        )
+        contents = ModelContents(parts=[], failed=[], skipped=skipped)
+        for attachment, text in zip(attachments, texts, strict=True):
+            if isinstance(text, str):
+                part: Any = types.Part.from_bytes(data=text.encode(), mime_type="text/plain")
+                contents.texts += 1
+            elif isinstance(result := results[attachment.id], Exception):
+                contents.failed.append({"filename": str(attachment.file_name), "reason": str(result)})
+                continue
+            else:
+                part = result
+                contents.files += 1
+            contents.parts.extend([{"text": f"[FILENAME:{attachment.file_name}]"}, part])
+        contents.parts.extend(notes)
+        return contents
+
+    def stats(self) -> dict[str, Any]:
+        """Return a summary of the store for logging."""
+        return {
+            "attachments": len(self._entries),
+            "memory_used": self._memory_used,
+            "spilled": sum(1 for entry in self._entries.values() if entry.spill_path is not None),
+            "failed": sum(1 for entry in self._entries.values() if entry.error is not None),
+        }
+
+    def close(self) -> None:
+        """Release in-memory content and remove spilled files."""
+        for entry in self._entries.values():
+            entry.content = entry.image = None
+            entry.image_checked = False
+        self._memory_used = 0
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
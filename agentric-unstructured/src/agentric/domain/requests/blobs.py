@@ -0,0 +1,126 @@
+"""Garbage collection of attachment objects.
+
+Attachments are stored under the hash of their content (:func:`agentric.lib.storage.blob_key`),
+so identical files uploaded to different claims share one object. An object is referenced
+by every ``RequestAttachment`` whose ``url`` points to it; :func:`collect_unreferenced_objects`
+deletes the objects no attachment references any more, together with abandoned staging and
+presigned uploads.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import structlog
+from sqlalchemy import func, select
+
+from agentric.config.app import alchemy
+from agentric.config.base import get_settings
+from agentric.db import models as m
+from agentric.domain.requests.services import RequestAttachmentService
+from agentric.lib.concurrency import gather_bounded
+from agentric.lib.storage import BLOB_PREFIX, delete_objects, last_modified, list_objects
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+__all__ = (
+    "GC_PREFIXES",
+    "collect_unreferenced_objects",
+    "reference_counts",
+)
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+GC_PREFIXES = (BLOB_PREFIX, "staging/", "uploads/")
+"""Key prefixes whose objects are only kept while an attachment references them."""
+
+_BATCH_SIZE = 1000
+
+
+async def reference_counts(service: RequestAttachmentService, urls: Sequence[str]) -> dict[str, int]:
+    """Return the number of attachments referencing each of ``urls``, unreferenced urls are omitted."""
+    statement = (
+        select(m.RequestAttachment.url, func.count())
+        .where(m.RequestAttachment.url.in_(urls))
+        .group_by(m.RequestAttachment.url)
+    )
+    result = await service.repository.session.execute(statement)
+    return {url: count for url, count in result.all()}
+
+
+async def collect_unreferenced_objects(
+    grace_period: int | None = None, *, dry_run: bool = False
+) -> dict[str, int]:
+    """Delete the objects under :data:`GC_PREFIXES` that no attachment references.
+
+    Objects modified within ``grace_period`` seconds are kept, so uploads whose
+    attachment is not created yet survive. Reusing an existing blob refreshes its
+    modification time for the same reason. References are checked per batch of up to
+    1000 keys, right before the batch is deleted with one ``delete_objects`` request.
+    The listing can be minutes old by then, so every unreferenced key is read again
+    and kept when it was refreshed in the meantime.
+
+    Args:
+        grace_period (int): Seconds, defaults to ``MINIO_BLOB_GC_GRACE_PERIOD``
+        dry_run (bool): Only count the objects that would be deleted
+
+    Returns:
+        dict[str, int]: Number of ``scanned``, ``deleted`` and ``failed`` objects.
+    """
+    bucket = settings.minio.BUCKET
+    grace_period = settings.minio.BLOB_GC_GRACE_PERIOD if grace_period is None else grace_period
+    cutoff = datetime.now(UTC) - timedelta(seconds=grace_period)
+    stats = {"scanned": 0, "deleted": 0, "failed": 0}
+    start = time.perf_counter()
+
+    async def _collect(keys: list[str]) -> None:
+        async with RequestAttachmentService.new(config=alchemy) as service:
+            referenced = await reference_counts(service, [f"{bucket}/{key}" for key in keys])
+        garbage = [key for key in keys if f"{bucket}/{key}" not in referenced]
+        if not garbage:
+            return
+        # a blob reused since it was listed has a fresh LastModified and is referenced soon
+        modified = await gather_bounded(
+            lambda key: last_modified(bucket, key), garbage, limit=settings.minio.MAX_POOL_CONNECTIONS // 2
+        )
+        stale: list[str] = []
+        for key, current in zip(garbage, modified, strict=True):
+            if isinstance(current, Exception):
+                stats["failed"] += 1
+                logger.warning("Failed to read object before deleting it", key=key, error=str(current))
+            elif current is not None and current < cutoff:
+                stale.append(key)
+        garbage = stale
+        if not garbage:
+            return
+        if dry_run:
+            stats["deleted"] += len(garbage)
+            return
+        failed = await delete_objects(garbage, bucket=bucket)
+        stats["deleted"] += len(garbage) - failed
+        stats["failed"] += failed
+
+    for prefix in GC_PREFIXES:
+        candidates: list[str] = []
+        async for key, listed_at in list_objects(prefix, bucket=bucket):
+            stats["scanned"] += 1
+            if listed_at >= cutoff:
+                continue
+            candidates.append(key)
+            if len(candidates) >= _BATCH_SIZE:
+                await _collect(candidates)
+                candidates = []
+        if candidates:
+            await _collect(candidates)
+
+    logger.info(
+        "Collected unreferenced objects",
+        dry_run=dry_run,
+        duration=round(time.perf_counter() - start, 3),
+        **stats,
+    )
+    return stats
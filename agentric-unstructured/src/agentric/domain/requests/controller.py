@@ -1,26 +1,28 @@
 import asyncio
 import mimetypes
 import random
-import tempfile
 from collections.abc import AsyncGenerator
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from typing import Annotated, Any, Literal
 from uuid import UUID
 
 import aiofile
-from litestar import Controller, Response, get, post
+from botocore.exceptions import ClientError
+from litestar import Controller, Request, Response, get, post
 from litestar.di import Provide
 from litestar.exceptions import HTTPException, NotFoundException
-from litestar.response import File
+from litestar.response import Redirect
 from litestar.response.streaming import Stream
 from litestar.serialization import encode_json
+from saq import Queue
 from sqlalchemy.exc import NoResultFound
 from structlog import getLogger
 
 from agentric.config import get_settings
 from agentric.config.base import get_settings
 from agentric.db import models as m
-from agentric.db.models.enums import ChatRole, ClaimStatus
+from agentric.db.models.enums import ChatRole, ClaimStatus, SubmissionStatus
 from agentric.domain.accounts.deps import provide_users_service
 from agentric.domain.accounts.guards import requires_active_user
 from agentric.domain.accounts.services import UserService
@@ -41,8 +43,15 @@ from agentric.domain.requests.services import (
     RequestAttachmentService,
     RequestService,
 )
+from agentric.domain.requests.tasks import (
+    CLAIM_PIPELINE_STAGES,
+    claim_pipeline_function,
+    enqueue_claim_rerun,
+)
 from agentric.domain.teams.guards import requires_has_one_team
-from agentric.lib.utils import read_minio_file
+from agentric.lib.otel import parse_jwt_token
+from agentric.lib.storage import open_object, presigned_url
+from agentric.lib.utils import content_disposition, parse_minio_url
 from agentric.domain.requests.utils import generate_followup_question
 
 logger = getLogger()
@@ -52,6 +61,8 @@ model_name = settings.app.MODEL_NAME
 model_family = settings.app.MODEL_FAIMLY
 api_key = settings.app.MODEL_API_KEY
 
+queue = Queue.from_url(url=settings.redis.URL, name="agentric_submissions")
+
 
 @dataclass
 class FileClaim:
@@ -239,6 +250,52 @@ class RequestController(Controller):
                 detail=f"Request ID: {request_id} not found", status_code=404
             )
 
+    @post("/rerun/{request_id:uuid}", guards=[requires_has_one_team])
+    async def rerun_request(
+        self,
+        request: Request,
+        request_id: Annotated[UUID, "The Request ID"],
+        requests_service: RequestService,
+        current_user: m.User,
+        from_stage: str | None = None,
+    ) -> s.Request:
+        """Re-run the claim pipeline of a request from its checkpoints.
+
+        ``from_stage`` and every stage depending on it run again; without it the
+        pipeline resumes after the last successful stage.
+        """
+        request_obj = await requests_service.get_one_or_none(id=request_id)
+        if request_obj is None:
+            raise NotFoundException(
+                detail=f"Request {request_id} not found", status_code=404
+            )
+
+        stages = CLAIM_PIPELINE_STAGES[
+            claim_pipeline_function(request_obj.owner_organization)
+        ]
+        if from_stage is not None and from_stage not in stages:
+            raise HTTPException(
+                detail=f"Unknown stage {from_stage}, expected one of {', '.join(stages)}",
+                status_code=400,
+            )
+
+        request_obj = await requests_service.update(
+            item_id=request_id,
+            data={"submission_status": SubmissionStatus.PROCESSING},
+            auto_commit=True,
+        )
+        auth = request.headers.get("authorization")
+        session_id = (parse_jwt_token(auth).get("jti") or "") if auth else ""
+        await enqueue_claim_rerun(
+            queue,
+            request=request_obj,
+            user_id=str(current_user.id),
+            user_email=current_user.email,
+            session_id=session_id,
+            from_stage=from_stage,
+        )
+        return requests_service.to_schema(request_obj, schema_type=s.Request)
+
     @get("/workflow/{request_id:uuid}")
     async def load_request_workflow(
         self,
@@ -323,9 +380,11 @@ class RequestController(Controller):
     @get("/attachments/{request_attachment_id:uuid}")
     async def get_attachment(
         self,
+        request: Request,
         request_attachment_id: UUID,
         request_attachment_service: "RequestAttachmentService",
     ) -> Response:
+        """Stream an attachment, supporting ``Range`` and conditional requests."""
         attachment = await request_attachment_service.get_one_or_none(
             id=request_attachment_id
         )
@@ -335,29 +394,72 @@ class RequestController(Controller):
                 status_code=404,
             )
 
-        try:
-            content_bytes = await read_minio_file(attachment.url)
-            file_name = attachment.file_name
-            extension = file_name.split(".")[-1] if "." in file_name else ""
-
-            mime_type, _ = mimetypes.guess_type(file_name)
-            if mime_type is None:
-                mime_type = "application/octet-stream"
-
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=f".{extension}"
-            ) as tmp_file:
-                tmp_file.write(content_bytes)
-                tmp_file.flush()
-                return File(
-                    content_disposition_type="attachment",
-                    path=tmp_file.name,
-                    filename=file_name,
-                    media_type=mime_type,
-                )
+        if_modified_since = None
+        if header := request.headers.get("if-modified-since"):
+            try:
+                if_modified_since = parsedate_to_datetime(header)
+            except (TypeError, ValueError):
+                pass
+        # a range is only valid for the representation named by If-Range, which is not
+        # known before the object is read, so the whole object is sent instead
+        byte_range = None if "if-range" in request.headers else request.headers.get("range")
 
+        try:
+            bucket_name, key = parse_minio_url(attachment.url)
+            obj = await open_object(
+                bucket_name,
+                key,
+                byte_range=byte_range,
+                if_none_match=request.headers.get("if-none-match"),
+                if_modified_since=if_modified_since,
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"NoSuchKey", "404"}:
+                raise NotFoundException(
+                    detail=f"Document of attachment {request_attachment_id} not found!",
+                    status_code=404,
+                ) from e
+            raise HTTPException(f"Failed to read document: {e!s}", status_code=500) from e
         except Exception as e:
-            raise HTTPException(f"Failed to read document: {e!s}", status_code=500)
+            raise HTTPException(f"Failed to read document: {e!s}", status_code=500) from e
+
+        headers = {**obj.headers, "Cache-Control": "private, no-cache"}
+        if obj.chunks is None:
+            return Response(content=b"", status_code=obj.status_code, headers=headers)
+
+        file_name = attachment.file_name
+        mime_type = attachment.mime_type or mimetypes.guess_type(file_name)[0]
+        headers["Content-Disposition"] = content_disposition(file_name)
+        return Stream(
+            obj.chunks,
+            status_code=obj.status_code,
+            headers=headers,
+            media_type=mime_type or obj.content_type or "application/octet-stream",
+        )
+
+    @get("/attachments/{request_attachment_id:uuid}/download-url")
+    async def get_attachment_download_url(
+        self,
+        request_attachment_id: UUID,
+        request_attachment_service: "RequestAttachmentService",
+    ) -> Redirect:
+        """Redirect to a short lived presigned URL that serves the attachment from MinIO."""
+        attachment = await request_attachment_service.get_one_or_none(
+            id=request_attachment_id
+        )
+        if attachment is None:
+            raise NotFoundException(
+                detail=f"Request attachment {request_attachment_id} not found!",
+                status_code=404,
+            )
+        bucket_name, key = parse_minio_url(attachment.url)
+        url = presigned_url(
+            "GET",
+            key,
+            bucket=bucket_name,
+            content_disposition=content_disposition(attachment.file_name),
+        )
+        return Redirect(url, status_code=307, headers={"Cache-Control": "no-store"})
 
     @get("/status_reason/{request_id:uuid}")
     async def get_status_reason(
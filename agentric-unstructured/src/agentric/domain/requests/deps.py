@@ -5,10 +5,20 @@ from __future__ import annotations
 from sqlalchemy.orm import selectinload
 
 from agentric.db import models as m
-from agentric.domain.requests.services import ExtractionService, RequestAttachmentService, RequestService
+from agentric.domain.requests.services import (
+    ClaimCheckpointService,
+    ExtractionService,
+    RequestAttachmentService,
+    RequestService,
+)
 from agentric.lib.deps import create_service_provider
 
-__all__ = ("provide_extraction_service", "provide_request_service")
+__all__ = (
+    "provide_claim_checkpoint_service",
+    "provide_extraction_service",
+    "provide_request_attachment_service",
+    "provide_request_service",
+)
 
 provide_extraction_service = create_service_provider(
     ExtractionService,
@@ -33,3 +43,9 @@ provide_request_attachment_service = create_service_provider(
     error_messages={"duplicate_key": "This requset attachment already exists.", "integrity": "Request Attachment operation failed."},
 )
 
+
+
+provide_claim_checkpoint_service = create_service_provider(
+    ClaimCheckpointService,
+    error_messages={"duplicate_key": "This claim checkpoint already exists.", "integrity": "Claim checkpoint operation failed."},
+)
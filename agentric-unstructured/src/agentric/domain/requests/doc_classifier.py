@@ -0,0 +1,273 @@
+"""Local pre-classifier for claim attachments.
+
+The classification prompts list deterministic cues for every label ("Check in" /
+"Check out", "Coverages and Benefit Limits", "GENERAL EXCLUSIONS", claim form fields).
+This module scores the first two pages of text of every attachment against those cues.
+Files that score clearly for one label are labelled locally; only the ambiguous ones
+(and files without a text layer) are sent to the model. Uploads are scored once by the
+``preprocess_attachment`` job; the pipeline reuses the stored label.
+
+To tune the threshold, a sample of jobs (``CLASSIFIER_AUDIT_RATE``) sends every file to
+the model as well. For those jobs, and jobs where nothing was labelled locally, every
+pair of local guess and model label is counted in Redis per confidence bucket, see
+:func:`classifier_report`. Other jobs only send their ambiguous files and would bias
+the low confidence buckets.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+import structlog
+
+from agentric.config.base import get_settings
+from agentric.domain.requests import schemas as s
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from redis.asyncio import Redis
+
+    from agentric.db import models as m
+    from agentric.domain.requests.attachments import AttachmentStore
+
+__all__ = (
+    "LABELS",
+    "Guess",
+    "classifier_report",
+    "classify_text",
+    "preclassify",
+    "record_classifier_outcome",
+    "should_audit",
+    "use_outcome_recording",
+)
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+LABELS = ("full_policy", "policy_summary", "claim_summary", "hotel_booking", "evidences")
+"""Labels in the priority order of the classification prompts."""
+
+_recording: ContextVar[bool] = ContextVar("classifier_outcome_recording", default=True)
+
+MIN_SCORE = 4.0
+"""Minimum cue score of the best label before a file is labelled locally."""
+
+_CUES: dict[str, list[tuple[re.Pattern[str], float]]] = {
+    label: [(re.compile(pattern), weight) for pattern, weight in cues]
+    for label, cues in {
+        "full_policy": [
+            (r"general exclusions", 3.0),
+            (r"payment of claims", 2.0),
+            (r"schedule of benefits", 2.0),
+            (r"policy of insurance", 2.0),
+            (r"national union fire insurance", 2.0),
+            (r"table of contents", 1.5),
+            (r"\bdefinitions\b", 1.5),
+            (r"\bexclusions\b", 1.0),
+            (r"\bsection [ivx0-9]+\b", 1.0),
+            (r"\bwe will (?:not )?pay\b", 1.0),
+        ],
+        "policy_summary": [
+            (r"coverages and benefit limits", 3.0),
+            (r"coverage effective date", 2.0),
+            (r"confirmation of coverage", 2.0),
+            (r"\btrip cost\b", 1.0),
+            (r"\b(?:plan|total) cost\b", 1.0),
+            (r"protection plan", 1.0),
+            (r"\bpolicy (?:number|id)\b", 0.5),
+        ],
+        "claim_summary": [
+            (r"breakdown of claimant", 3.0),
+            (r"total expected refunds?", 3.0),
+            (r"who became ill", 2.0),
+            (r"symptom onset", 2.0),
+            (r"type of loss", 2.0),
+            (r"claim form", 2.0),
+            (r"\bclaim amount\b", 1.5),
+            (r"\bdate of loss\b", 1.5),
+            (r"\bclaimant\b", 1.5),
+            (r"\bfraud", 1.0),
+        ],
+        "hotel_booking": [
+            (r"check[- ]?in", 1.5),
+            (r"check[- ]?out", 1.5),
+            (r"expedia|booking\.com|hotels\.com|airbnb", 2.0),
+            (r"\bnights?\b", 1.0),
+            (r"\breservation\b", 1.0),
+            (r"confirmation (?:number|#)|itinerary", 1.0),
+            (r"\badults?\b", 0.5),
+            (r"\brooms?\b", 0.5),
+        ],
+    }.items()
+}
+
+
+@dataclass(frozen=True)
+class Guess:
+    """Best local label of one attachment."""
+
+    filename: str
+    label: str | None
+    confidence: float
+
+
+def classify_text(text: str) -> tuple[str | None, float]:
+    """Score ``text`` against the cues of every label.
+
+    Returns:
+        tuple[str | None, float]: The best label and its share of the two best scores,
+        ``(None, 0.0)`` when no label reaches :data:`MIN_SCORE`.
+    """
+    lowered = text.lower()
+    scores = {
+        label: sum(weight for pattern, weight in cues if pattern.search(lowered))
+        for label, cues in _CUES.items()
+    }
+    # ties go to the label that comes first in the prompt's priority order
+    ranked = sorted(scores, key=lambda label: (-scores[label], LABELS.index(label)))
+    best, runner_up = scores[ranked[0]], scores[ranked[1]]
+    if best < MIN_SCORE:
+        return None, 0.0
+    return ranked[0], round(best / (best + runner_up), 3)
+
+
+async def preclassify(
+    attachments: Sequence[m.RequestAttachment],
+    attachment_store: AttachmentStore,
+) -> tuple[list[s.ClassifedDocument], list[m.RequestAttachment], list[Guess]]:
+    """Label the attachments that the cues identify with confidence.
+
+    Returns:
+        tuple: The confidently labelled documents, the attachments left to the model and
+        the local guess of every attachment.
+    """
+    threshold = settings.pipeline.CLASSIFIER_CONFIDENCE
+    confident: list[s.ClassifedDocument] = []
+    ambiguous: list[m.RequestAttachment] = []
+    guesses: list[Guess] = []
+    for attachment in attachments:
+        if attachment.preprocessed_at is not None:
+            # labelled by the preprocessing job when the file was uploaded
+            label, confidence = attachment.provisional_label, attachment.label_confidence or 0.0
+        else:
+            text = await attachment_store.first_pages_text(attachment)
+            label, confidence = classify_text(text) if text.strip() else (None, 0.0)
+        guesses.append(Guess(attachment.file_name, label, confidence))
+        if label is not None and confidence >= threshold:
+            confident.append(s.ClassifedDocument(filename=attachment.file_name, file_type=label))
+        else:
+            ambiguous.append(attachment)
+    logger.info(
+        "Pre-classified attachments",
+        confident=len(confident),
+        ambiguous=len(ambiguous),
+        preprocessed=sum(1 for attachment in attachments if attachment.preprocessed_at is not None),
+    )
+    return confident, ambiguous, guesses
+
+
+def should_audit() -> bool:
+    """Whether this job also sends the locally labelled files to the model."""
+    return random.random() < settings.pipeline.CLASSIFIER_AUDIT_RATE  # noqa: S311
+
+
+@lru_cache(maxsize=1)
+def _redis() -> Redis:
+    return settings.redis.get_client()
+
+
+def _stats_key(pipeline: str) -> str:
+    return f"{settings.app.slug}:doc-classifier:{pipeline}"
+
+
+def _bucket(confidence: float) -> str:
+    return f"{min(int(confidence * 10), 9) / 10:.1f}"
+
+
+@contextmanager
+def use_outcome_recording(enabled: bool) -> Iterator[None]:
+    """Enable or skip :func:`record_classifier_outcome` in the current context (and tasks it starts)."""
+    token = _recording.set(enabled)
+    try:
+        yield
+    finally:
+        _recording.reset(token)
+
+
+async def record_classifier_outcome(
+    pipeline: str,
+    guesses: Sequence[Guess],
+    model_labels: Sequence[s.ClassifedDocument],
+) -> None:
+    """Count every local guess against the model label of the same file.
+
+    Counters are stored in a Redis hash per pipeline, one field per
+    ``{confidence bucket}|{local label}|{model label}``. Only call it for jobs that sent
+    every file to the model. Nothing is counted inside :func:`use_outcome_recording`
+    with ``False``, e.g. for benchmark replays. Failures are only logged.
+    """
+    if not _recording.get():
+        return
+    by_name = {doc.filename.replace(" ", "").lower(): doc.file_type for doc in model_labels}
+    fields: dict[str, int] = {}
+    for guess in guesses:
+        truth = by_name.get(guess.filename.replace(" ", "").lower())
+        if truth is None:
+            continue
+        field = f"{_bucket(guess.confidence)}|{guess.label or '-'}|{truth}"
+        fields[field] = fields.get(field, 0) + 1
+    if not fields:
+        return
+    try:
+        async with _redis().pipeline(transaction=False) as pipe:
+            for field, count in fields.items():
+                pipe.hincrby(_stats_key(pipeline), field, count)
+            await pipe.execute()
+    except Exception:  # noqa: BLE001
+        logger.warning("Failed to record classifier outcome", pipeline=pipeline, exc_info=True)
+
+
+async def classifier_report(pipeline: str, thresholds: Sequence[float]) -> dict[float, dict[str, Any]]:
+    """Per label precision and recall of the local classifier against the model.
+
+    Args:
+        pipeline (str): ``travelguard`` or ``covermore``
+        thresholds: Confidence thresholds to evaluate
+
+    Returns:
+        dict: For every threshold, the share of files labelled locally (``coverage``) and
+        per label ``precision``, ``recall`` and ``support`` (number of model labels).
+    """
+    raw = await _redis().hgetall(_stats_key(pipeline))
+    counts: list[tuple[float, str, str, int]] = []
+    for field, count in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        bucket, guess, truth = field.split("|")
+        counts.append((float(bucket), guess, truth, int(count)))
+
+    total = sum(count for *_, count in counts)
+    report: dict[float, dict[str, Any]] = {}
+    for threshold in thresholds:
+        labelled = [c for c in counts if c[1] != "-" and c[0] >= threshold - 1e-9]
+        labels: dict[str, dict[str, Any]] = {}
+        for label in LABELS:
+            support = sum(count for _, _, truth, count in counts if truth == label)
+            predicted = sum(count for _, guess, _, count in labelled if guess == label)
+            correct = sum(count for _, guess, truth, count in labelled if guess == truth == label)
+            labels[label] = {
+                "precision": correct / predicted if predicted else None,
+                "recall": correct / support if support else None,
+                "support": support,
+            }
+        report[threshold] = {
+            "coverage": sum(c[3] for c in labelled) / total if total else None,
+            "labels": labels,
+        }
+    return report
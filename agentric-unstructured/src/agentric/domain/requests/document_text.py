@@ -0,0 +1,176 @@
+"""Per page text of PDF documents, cached in ``document_texts`` by content hash.
+
+A PDF is parsed once, when it is preprocessed on upload or on its first use, and every
+pipeline stage, re-run and later reprocessing reads the stored pages instead. Identical
+files attached to different claims share one entry.
+
+When only the first pages of an uncached PDF are needed, :func:`read_first_pages` reads
+them with ranged requests instead of downloading the whole file.
+
+Stages running in text first mode send the cached text of a PDF instead of the file when
+its text layer passes :func:`usable_text_layer`.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from typing import TYPE_CHECKING
+
+import structlog
+from advanced_alchemy.exceptions import RepositoryError
+
+from agentric.config.app import alchemy
+from agentric.config.base import get_settings
+from agentric.domain.requests.services import DocumentTextService
+from agentric.lib.executor import run_in_process
+from agentric.lib.parsing import pdf_pages_text, pdf_pages_text_from_url
+from agentric.lib.storage import presigned_url
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+__all__ = (
+    "format_pages",
+    "get_cached_pages",
+    "get_document_pages",
+    "join_pages",
+    "read_first_pages",
+    "store_document_pages",
+    "usable_text_layer",
+)
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+
+def join_pages(pages: list[str], count: int | None = None) -> str:
+    """Return the whitespace normalised text of the first ``count`` pages."""
+    selected = pages if count is None else pages[:count]
+    return " ".join(" ".join(selected).split())
+
+
+def format_pages(pages: list[str]) -> str:
+    """Return the text of all pages for a model prompt, each page preceded by a ``[PAGE n]`` marker."""
+    return "\n\n".join(f"[PAGE {number}]\n{page.strip()}" for number, page in enumerate(pages, 1))
+
+
+def _is_text_char(char: str) -> bool:
+    # letters, marks, numbers, punctuation and symbols, not control, private use or
+    # unassigned characters that broken font encodings extract to
+    return char != "\ufffd" and unicodedata.category(char)[0] in "LMNPS"
+
+
+def usable_text_layer(
+    pages: list[str],
+    *,
+    min_page_chars: int | None = None,
+    min_text_ratio: float | None = None,
+) -> bool:
+    """Whether the text layer of a PDF holds all of its content and can replace the file.
+
+    Every page needs at least ``min_page_chars`` non-whitespace characters, a page below
+    that is most likely scanned, and at least ``min_text_ratio`` of them must be readable
+    characters.
+
+    Args:
+        pages (list[str]): The text of every page
+        min_page_chars (int): Defaults to ``PIPELINE_TEXT_FIRST_MIN_PAGE_CHARS``
+        min_text_ratio (float): Defaults to ``PIPELINE_TEXT_FIRST_MIN_TEXT_RATIO``
+
+    Returns:
+        bool: ``False`` for documents without pages.
+    """
+    if min_page_chars is None:
+        min_page_chars = settings.pipeline.TEXT_FIRST_MIN_PAGE_CHARS
+    if min_text_ratio is None:
+        min_text_ratio = settings.pipeline.TEXT_FIRST_MIN_TEXT_RATIO
+    if not pages:
+        return False
+    total = readable = 0
+    for page in pages:
+        chars = "".join(page.split())
+        if len(chars) < min_page_chars:
+            return False
+        total += len(chars)
+        readable += sum(1 for char in chars if _is_text_char(char))
+    return readable >= min_text_ratio * total
+
+
+async def store_document_pages(content_hash: str, pages: list[str]) -> None:
+    """Store the pages of a document unless another worker stored them first."""
+    # Postgres text can not hold NUL characters, which some PDF text layers contain
+    pages = [page.replace("\x00", "") for page in pages]
+    try:
+        async with DocumentTextService.new(config=alchemy) as service:
+            await service.create(
+                data={
+                    "content_hash": content_hash,
+                    "page_count": len(pages),
+                    "has_text_layer": any(page.strip() for page in pages),
+                    "pages": pages,
+                },
+                auto_commit=True,
+            )
+    except RepositoryError:
+        logger.debug("Document text already stored", content_hash=content_hash)
+
+
+async def get_cached_pages(content_hash: str) -> list[str] | None:
+    """Return the cached text of every page of a PDF, ``None`` when it is not cached."""
+    async with DocumentTextService.new(config=alchemy) as service:
+        document = await service.get_one_or_none(content_hash=content_hash)
+    return None if document is None else document.pages
+
+
+async def read_first_pages(url: str, count: int) -> list[str]:
+    """Return the text of the first ``count`` pages of a stored PDF without downloading it.
+
+    The PDF is opened over ranged requests on a presigned URL, so only its trailer, cross
+    reference table and the objects of the first pages are transferred. The pages are not
+    cached, the cache holds whole documents.
+
+    Args:
+        url (str): ``bucket/key`` of the PDF
+        count (int): Number of pages
+
+    Raises:
+        Exception: When the object can not be read with range requests or parsed.
+    """
+    from agentric.lib.utils import parse_minio_url
+
+    bucket, key = parse_minio_url(url)
+    signed = presigned_url("GET", key, bucket=bucket, internal=True)
+    pages, fetched, size = await run_in_process(
+        pdf_pages_text_from_url,
+        signed,
+        count,
+        settings.minio.RANGE_READ_BLOCK_SIZE,
+        settings.minio.RANGE_READ_CACHE_BLOCKS,
+    )
+    logger.debug("Read first PDF pages", url=url, pages=len(pages), fetched=fetched, size=size)
+    return pages
+
+
+async def get_document_pages(
+    content_hash: str, source: bytes | Callable[[], Awaitable[bytes]]
+) -> list[str]:
+    """Return the text of every page of a PDF, parsing it only when it is not cached.
+
+    Args:
+        content_hash (str): sha256 of the PDF
+        source: The PDF content, or a coroutine function returning it that is only
+            called on a cache miss
+
+    Raises:
+        Exception: When the PDF can not be read or parsed.
+
+    Returns:
+        list[str]: The text of every page, empty strings for pages without text.
+    """
+    pages = await get_cached_pages(content_hash)
+    if pages is not None:
+        return pages
+    content = source if isinstance(source, bytes) else await source()
+    pages = await run_in_process(pdf_pages_text, content)
+    await store_document_pages(content_hash, pages)
+    return pages
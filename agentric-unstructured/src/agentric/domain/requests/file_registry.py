@@ -0,0 +1,183 @@
+"""Content addressed registry of files uploaded to the Gemini file service.
+
+Uploaded files live on the Gemini side for a limited time (48 hours). The registry
+maps the sha256 of the uploaded bytes to the remote file handle in Redis, so every
+stage, retry and re-run of a claim reuses a live handle instead of uploading the same
+bytes again. Entries expire ``GEMINI_FILE_EXPIRY_MARGIN`` seconds before the remote
+file does. Every registered URI also maps back to the sha256 of its content, which
+keys the model response cache.
+
+Uploads are named ``<namespace>:<sha256>`` so the janitor only ever deletes files of
+this registry, never files other services uploaded with the same API key.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from google.genai import types
+
+from agentric.config.base import get_settings
+from agentric.domain.requests.llm import DEFAULT_MIME_TYPE, get_genai_client, upload_bytes
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+__all__ = ("GeminiFileRegistry", "get_file_registry", "upload_file")
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+DEFAULT_FILE_TTL = 48 * 3600
+"""Lifetime of a Gemini file when the API does not report an expiration time."""
+
+
+class GeminiFileRegistry:
+    """Reuse Gemini file uploads across pipeline stages, retries and re-runs."""
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        namespace: str | None = None,
+        expiry_margin: int | None = None,
+        orphan_grace: int | None = None,
+    ) -> None:
+        self.redis = redis
+        self.namespace = namespace or f"{settings.app.slug}:gemini-files"
+        self.expiry_margin = expiry_margin or settings.pipeline.GEMINI_FILE_EXPIRY_MARGIN
+        self.orphan_grace = orphan_grace or settings.pipeline.GEMINI_FILE_ORPHAN_GRACE
+        self._locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    @property
+    def index_key(self) -> str:
+        """Sorted set of registered remote file names scored by their expiry timestamp."""
+        return f"{self.namespace}:index"
+
+    def _key(self, digest: str, mime_type: str) -> str:
+        return f"{self.namespace}:{digest}:{mime_type}"
+
+    def _uri_key(self, uri: str) -> str:
+        return f"{self.namespace}:uri:{uri}"
+
+    def _display_name(self, digest: str) -> str:
+        return f"{self.namespace}:{digest}"
+
+    def owns(self, remote: types.File) -> bool:
+        """Whether ``remote`` was uploaded by a registry of this namespace."""
+        return (remote.display_name or "").startswith(f"{self.namespace}:")
+
+    async def get_or_upload(self, content: bytes, mime_type: str | None = None) -> types.File:
+        """Return a live Gemini file for ``content``, uploading it only when needed.
+
+        Args:
+            content (bytes): File content
+            mime_type (str): File content type (optional)
+
+        Returns:
+            types.File: The registered or newly uploaded file handle.
+        """
+        mime_type = mime_type or DEFAULT_MIME_TYPE
+        digest = hashlib.sha256(content).hexdigest()
+        key = self._key(digest, mime_type)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+
+        async with lock:
+            cached = await self.redis.get(key)
+            if cached is not None:
+                entry = json.loads(cached)
+                logger.debug("Reusing Gemini file", name=entry["name"])
+                return types.File(name=entry["name"], uri=entry["uri"], mime_type=entry["mime_type"])
+
+            uploaded = await upload_bytes(content, mime_type, display_name=self._display_name(digest))
+            await self._register(key, digest, uploaded, mime_type)
+            return uploaded
+
+    async def content_hashes(self, uris: list[str]) -> list[str | None]:
+        """Return the sha256 of the content behind each registered file URI, ``None`` when unknown."""
+        if not uris:
+            return []
+        values = await self.redis.mget([self._uri_key(uri) for uri in uris])
+        return [value.decode() if isinstance(value, bytes) else value for value in values]
+
+    async def _register(self, key: str, digest: str, uploaded: types.File, mime_type: str) -> None:
+        if uploaded.expiration_time is not None:
+            expires_at = uploaded.expiration_time.timestamp()
+        else:
+            expires_at = time.time() + DEFAULT_FILE_TTL
+        ttl = int(expires_at - time.time()) - self.expiry_margin
+        if ttl <= 0 or not uploaded.name or not uploaded.uri:
+            return
+        entry = {"name": uploaded.name, "uri": uploaded.uri, "mime_type": uploaded.mime_type or mime_type}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, json.dumps(entry), ex=ttl)
+            pipe.set(self._uri_key(uploaded.uri), digest, ex=ttl)
+            pipe.zadd(self.index_key, {uploaded.name: expires_at})
+            await pipe.execute()
+
+    async def cleanup(self) -> dict[str, Any]:
+        """Delete remote files of this registry that are about to expire or are not registered.
+
+        Only files uploaded by the registry (see :meth:`owns`) are considered. Files
+        younger than ``orphan_grace`` seconds are kept even when unregistered, so uploads
+        that are still being registered are not removed.
+
+        Returns:
+            dict[str, Any]: Number of scanned, deleted and failed remote files.
+        """
+        now = time.time()
+        await self.redis.zremrangebyscore(self.index_key, "-inf", now)
+        live = {
+            name.decode() if isinstance(name, bytes) else name
+            for name in await self.redis.zrangebyscore(self.index_key, now + self.expiry_margin, "+inf")
+        }
+
+        client = get_genai_client()
+        scanned = deleted = failed = 0
+        async for remote in await client.aio.files.list(config={"page_size": 100}):
+            scanned += 1
+            if remote.name is None or remote.name in live or not self.owns(remote):
+                continue
+            created_at = remote.create_time.timestamp() if remote.create_time else now
+            if now - created_at < self.orphan_grace:
+                continue
+            try:
+                await client.aio.files.delete(name=remote.name)
+            except Exception:  # noqa: BLE001
+                failed += 1
+                logger.warning("Failed to delete Gemini file", name=remote.name, exc_info=True)
+                continue
+            await self.redis.zrem(self.index_key, remote.name)
+            deleted += 1
+
+        result = {"scanned": scanned, "deleted": deleted, "failed": failed}
+        logger.info("Cleaned up Gemini files", **result)
+        return result
+
+
+@lru_cache(maxsize=1)
+def get_file_registry() -> GeminiFileRegistry:
+    """Return the process wide Gemini file registry."""
+    return GeminiFileRegistry(settings.redis.get_client())
+
+
+async def upload_file(content: bytes, mime_type: str | None = None) -> types.File:
+    """Upload bytes to Gemini through the registry, reusing a live upload of the same content.
+
+    Args:
+        content (bytes): File content
+        mime_type (str): File content type (optional)
+
+    Returns:
+        types.File: The uploaded file handle.
+    """
+    return await get_file_registry().get_or_upload(content, mime_type)
@@ -0,0 +1,246 @@
+"""Asynchronous Gemini access for the claim pipeline.
+
+Every pipeline stage runs inside a SAQ worker coroutine, so all model and file calls
+go through ``client.aio``. The synchronous client would block the worker event loop
+for the whole model call and serialise every concurrent job on the process.
+"""
+
+from __future__ import annotations
+
+import io
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from google import genai
+from google.genai import types
+from opentelemetry import metrics
+
+from agentric.config.base import get_settings
+from agentric.domain.requests.response_cache import get_response_cache
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+    from opentelemetry.trace import Span
+
+__all__ = (
+    "DEFAULT_MIME_TYPE",
+    "ModelCall",
+    "call_model",
+    "generate_content",
+    "get_genai_client",
+    "record_model_calls",
+    "record_token_usage",
+    "upload_bytes",
+)
+
+logger = structlog.get_logger()
+settings = get_settings()
+meter = metrics.get_meter(__name__)
+
+request_duration = meter.create_histogram(
+    "genai.request.duration",
+    unit="s",
+    description="Duration of model calls.",
+)
+token_usage = meter.create_counter(
+    "genai.token.usage",
+    unit="{token}",
+    description="Tokens used by model calls.",
+)
+
+DEFAULT_MIME_TYPE = "application/octet-stream"
+
+
+@dataclass(frozen=True)
+class ModelCall:
+    """Duration and token usage of one model call."""
+
+    stage: str
+    model: str
+    duration: float
+    input_tokens: int
+    output_tokens: int
+    thinking_tokens: int
+
+
+_recorded_calls: ContextVar[list[ModelCall] | None] = ContextVar("recorded_model_calls", default=None)
+
+
+@contextmanager
+def record_model_calls() -> Iterator[list[ModelCall]]:
+    """Collect the model calls made in the current context and the tasks it starts.
+
+    Calls answered from the response cache are not collected.
+    """
+    calls: list[ModelCall] = []
+    token = _recorded_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _recorded_calls.reset(token)
+
+
+def _record_call(model: str, attributes: Mapping[str, str] | None, **usage: Any) -> None:
+    calls = _recorded_calls.get()
+    if calls is not None:
+        calls.append(ModelCall(stage=(attributes or {}).get("stage", ""), model=model, **usage))
+
+
+@lru_cache(maxsize=1)
+def get_genai_client() -> genai.Client:
+    """Return the process wide Gemini client.
+
+    Returns:
+        genai.Client: Client configured with the agent API key.
+    """
+    return genai.Client(api_key=settings.app.AGENT_API_KEY)
+
+
+async def upload_bytes(
+    content: bytes, mime_type: str | None = None, *, display_name: str | None = None
+) -> types.File:
+    """Upload raw bytes to the Gemini file service without blocking the event loop.
+
+    Args:
+        content (bytes): File content
+        mime_type (str): File content type (optional)
+        display_name (str): Name that tags the file as owned by its uploader (optional)
+
+    Returns:
+        types.File: The uploaded file handle.
+    """
+    client = get_genai_client()
+    config: dict[str, Any] = {"mime_type": mime_type or DEFAULT_MIME_TYPE}
+    if display_name is not None:
+        config["display_name"] = display_name
+    return await client.aio.files.upload(file=io.BytesIO(content), config=config)
+
+
+def record_token_usage(
+    span: Span, response: types.GenerateContentResponse, model_name: str
+) -> None:
+    """Attach the token usage of a model response to the current span."""
+    um = response.usage_metadata
+    input_tokens = (um.prompt_token_count if um else None) or 0
+    output_tokens = (um.candidates_token_count if um else None) or 0
+    total_tokens = (um.total_token_count if um else None) or 0
+
+    span.set_attribute("genai.request_token_usage", input_tokens)
+    span.set_attribute("genai.response_token_usage", output_tokens)
+    span.set_attribute("genai.total_token_usage", total_tokens)
+    span.set_attribute("genai.model", model_name)
+
+
+async def call_model(
+    *,
+    model: str,
+    contents: Any,
+    config: types.GenerateContentConfigOrDict | None = None,
+    span: Span | None = None,
+    attributes: Mapping[str, str] | None = None,
+) -> types.GenerateContentResponse:
+    """Call the model without the response cache, recording the call's duration and token usage.
+
+    Callers that do their own response cache lookup (the prompt prefix path) use this
+    rather than :func:`generate_content`, so each call counts as only one lookup.
+
+    Args:
+        model (str): Model name
+        contents: Prompt parts and uploaded files
+        config: Generation config
+        span: Span that receives the token usage attributes (optional)
+        attributes: Metric attributes of the call, e.g. the stage and how its attachments
+            are sent (optional). They are also logged and set on ``span``.
+
+    Returns:
+        types.GenerateContentResponse: The model response.
+    """
+    client = get_genai_client()
+    start = time.perf_counter()
+    response = await client.aio.models.generate_content(
+        model=model, contents=contents, config=config
+    )
+    duration = time.perf_counter() - start
+    if span is not None:
+        record_token_usage(span, response, model)
+        span.set_attribute("genai.duration", duration)
+
+    um = response.usage_metadata
+    input_tokens = (um.prompt_token_count if um else None) or 0
+    output_tokens = (um.candidates_token_count if um else None) or 0
+    thinking_tokens = (um.thoughts_token_count if um else None) or 0
+    metric_attributes = {"model": model, **(attributes or {})}
+    request_duration.record(duration, metric_attributes)
+    token_usage.add(input_tokens, {**metric_attributes, "type": "input"})
+    token_usage.add(output_tokens, {**metric_attributes, "type": "output"})
+    token_usage.add(thinking_tokens, {**metric_attributes, "type": "thinking"})
+    _record_call(
+        model,
+        attributes,
+        duration=duration,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        thinking_tokens=thinking_tokens,
+    )
+    if attributes:
+        if span is not None:
+            span.set_attributes({f"genai.{key}": value for key, value in attributes.items()})
+        logger.info(
+            "Model call finished",
+            duration=round(duration, 3),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            thinking_tokens=thinking_tokens,
+            **metric_attributes,
+        )
+    return response
+
+
+async def generate_content(
+    *,
+    model: str,
+    contents: Any,
+    config: types.GenerateContentConfigOrDict | None = None,
+    span: Span | None = None,
+    attributes: Mapping[str, str] | None = None,
+    cache: bool = True,
+) -> types.GenerateContentResponse:
+    """Run ``generate_content`` on the asynchronous Gemini client.
+
+    The duration and token usage of every call are recorded as the
+    ``genai.request.duration`` and ``genai.token.usage`` metrics. Calls with
+    ``temperature=0`` are answered from the response cache when the same request was
+    made before.
+
+    Args:
+        model (str): Model name
+        contents: Prompt parts and uploaded files
+        config: Generation config
+        span: Span that receives the token usage attributes (optional)
+        attributes: Metric attributes of the call, e.g. the stage and how its attachments
+            are sent (optional). They are also logged and set on ``span``.
+        cache (bool): Look the call up in the response cache and store its response.
+            Pass ``False`` to always call the model.
+
+    Returns:
+        types.GenerateContentResponse: The model response.
+    """
+    if isinstance(config, dict):
+        config = types.GenerateContentConfig.model_validate(config)
+    response_cache = get_response_cache()
+    key, cached = await response_cache.lookup(
+        model, contents, config, attributes, enabled=cache
+    )
+    if cached is not None:
+        if span is not None:
+            span.set_attribute("genai.response_cache", "hit")
+        return cached
+    response = await call_model(model=model, contents=contents, config=config, span=span, attributes=attributes)
+    await response_cache.store(key, response)
+    return response
@@ -0,0 +1,281 @@
+"""Stage graph executor for the claim pipelines.
+
+A pipeline is a set of :class:`Stage` objects that declare the named values they read.
+Every stage produces one value under its own name. A stage starts as soon as all of
+its inputs are available, so independent stages run concurrently and the wall time of
+a job is the length of its critical path.
+
+A stage can be *guarded* by another stage. It only keeps its result when the guard's
+predicate accepts the guard's output. With ``speculative=True`` the stage starts before
+the guard finishes and is cancelled (or its result discarded) if the guard rejects it.
+Otherwise it waits for the guard and is skipped when rejected.
+
+Stage outputs can be checkpointed: ``on_checkpoint`` receives the ``dump``-ed output of
+every final stage result, and outputs passed back as ``restored`` are ``load``-ed instead
+of running the stage again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+import structlog
+
+__all__ = (
+    "Guard",
+    "PipelineError",
+    "PipelineResult",
+    "Stage",
+    "StageGraph",
+    "StageStatus",
+)
+
+logger = structlog.get_logger()
+
+
+class StageStatus(StrEnum):
+    COMPLETED = "completed"
+    RESTORED = "restored"
+    SKIPPED = "skipped"
+    CANCELLED = "cancelled"
+    DISCARDED = "discarded"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class Guard:
+    """Condition a stage result depends on.
+
+    Args:
+        stage: Name of the stage whose output decides.
+        proceed: Receives all results so far, returns ``False`` to drop the guarded stage.
+    """
+
+    stage: str
+    proceed: Callable[[Mapping[str, Any]], bool]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of a pipeline.
+
+    ``func`` is called with one keyword argument per name in ``inputs``. Inputs are
+    either initial values passed to :meth:`StageGraph.run` or outputs of other stages.
+    """
+
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    inputs: tuple[str, ...] = ()
+    when: Callable[[Mapping[str, Any]], bool] | None = None
+    """Evaluated once the inputs are ready; the stage is skipped when it returns ``False``."""
+    guard: Guard | None = None
+    speculative: bool = False
+    dump: Callable[[Any], Any] | None = None
+    """Convert the output to a JSON serialisable checkpoint."""
+    load: Callable[[Any, Mapping[str, Any]], Any] | None = None
+    """Rebuild the output from a checkpoint; also receives the initial values."""
+
+
+@dataclass
+class PipelineResult:
+    results: dict[str, Any]
+    timings: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def status(self, stage: str) -> StageStatus | None:
+        timing = self.timings.get(stage)
+        return StageStatus(timing["status"]) if timing else None
+
+
+class PipelineError(Exception):
+    """A stage failed. Carries the timings recorded up to the failure."""
+
+    def __init__(self, stage: str, timings: dict[str, dict[str, Any]]) -> None:
+        super().__init__(f"Pipeline stage {stage!r} failed")
+        self.stage = stage
+        self.timings = timings
+
+
+class StageGraph:
+    """Run a set of stages concurrently in dependency order."""
+
+    def __init__(self, name: str, stages: list[Stage]) -> None:
+        self.name = name
+        self.stages = {stage.name: stage for stage in stages}
+
+    def _dependencies(self, stage: Stage) -> set[str]:
+        deps = set(stage.inputs)
+        if stage.guard is not None and not stage.speculative:
+            deps.add(stage.guard.stage)
+        # a speculative result is only final once its guard has accepted it
+        for name in stage.inputs:
+            upstream = self.stages.get(name)
+            if upstream is not None and upstream.guard is not None:
+                deps.add(upstream.guard.stage)
+        return deps
+
+    def downstream(self, names: Iterable[str]) -> set[str]:
+        """Return ``names`` and every stage that directly or transitively depends on them."""
+        selected = {name for name in names if name in self.stages}
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages.values():
+                if stage.name in selected:
+                    continue
+                deps = set(stage.inputs)
+                if stage.guard is not None:
+                    deps.add(stage.guard.stage)
+                if deps & selected:
+                    selected.add(stage.name)
+                    changed = True
+        return selected
+
+    async def run(
+        self,
+        initial: Mapping[str, Any] | None = None,
+        *,
+        restored: Mapping[str, Any] | None = None,
+        on_checkpoint: Callable[[str, Any], Awaitable[None]] | None = None,
+    ) -> PipelineResult:
+        """Run every stage and return the produced values and per stage timings.
+
+        Timings hold, per stage, the offset from the pipeline start, the duration in
+        seconds and the final :class:`StageStatus`.
+
+        Args:
+            initial: Values available to every stage
+            restored: Checkpointed stage outputs, those stages are not run again
+            on_checkpoint: Called with the stage name and dumped output of every final
+                stage result. Errors are logged and do not fail the pipeline.
+
+        Raises:
+            PipelineError: When a stage raises. The original exception is chained.
+        """
+        results: dict[str, Any] = dict(initial or {})
+        timings: dict[str, dict[str, Any]] = {}
+        started: dict[str, float] = {}
+        running: dict[asyncio.Task[Any], str] = {}
+        cancelled: list[asyncio.Task[Any]] = []
+        pending = dict(self.stages)
+        finished: set[str] = set(results)
+        to_checkpoint: list[str] = []
+        origin = time.perf_counter()
+        ok = (None, StageStatus.COMPLETED, StageStatus.RESTORED)
+
+        def _record(name: str, status: StageStatus) -> None:
+            start = started.get(name, time.perf_counter())
+            timings[name] = {
+                "start": round(start - origin, 3),
+                "duration": round(time.perf_counter() - start, 3),
+                "status": status.value,
+            }
+
+        def _finish(name: str, status: StageStatus, value: Any = None) -> None:
+            results[name] = value
+            finished.add(name)
+            _record(name, status)
+
+        def _is_final(stage: Stage) -> bool:
+            return stage.guard is None or stage.guard.stage in finished
+
+        async def _checkpoint() -> None:
+            while to_checkpoint:
+                name = to_checkpoint.pop(0)
+                stage = self.stages[name]
+                if on_checkpoint is None:
+                    continue
+                try:
+                    output = results[name]
+                    await on_checkpoint(name, stage.dump(output) if stage.dump else output)
+                except Exception:  # noqa: BLE001
+                    logger.warning("Failed to checkpoint stage", pipeline=self.name, stage=name, exc_info=True)
+
+        def _apply_guards(guard_stage: str) -> None:
+            for stage in self.stages.values():
+                if stage.guard is None or stage.guard.stage != guard_stage or not stage.speculative:
+                    continue
+                if stage.guard.proceed(results):
+                    if stage.name in finished and timings[stage.name]["status"] == StageStatus.COMPLETED:
+                        to_checkpoint.append(stage.name)
+                    continue
+                task = next((t for t, n in running.items() if n == stage.name), None)
+                if task is not None:
+                    task.cancel()
+                    running.pop(task)
+                    cancelled.append(task)
+                    _finish(stage.name, StageStatus.CANCELLED)
+                elif stage.name in finished and timings[stage.name]["status"] == StageStatus.COMPLETED:
+                    results[stage.name] = None
+                    timings[stage.name]["status"] = StageStatus.DISCARDED.value
+                elif stage.name in pending:
+                    pending.pop(stage.name)
+                    _finish(stage.name, StageStatus.SKIPPED)
+
+        for name, raw in (restored or {}).items():
+            stage = pending.pop(name, None)
+            if stage is None:
+                continue
+            _finish(name, StageStatus.RESTORED, stage.load(raw, results) if stage.load else raw)
+
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    deps = self._dependencies(stage)
+                    if not deps <= finished:
+                        continue
+                    pending.pop(name)
+                    skipped_input = any(
+                        timings.get(dep, {}).get("status") not in ok
+                        for dep in stage.inputs
+                    )
+                    rejected = (
+                        stage.guard is not None
+                        and stage.guard.stage in finished
+                        and not stage.guard.proceed(results)
+                    )
+                    if skipped_input or rejected or (stage.when is not None and not stage.when(results)):
+                        _finish(name, StageStatus.SKIPPED)
+                        continue
+                    started[name] = time.perf_counter()
+                    kwargs = {key: results[key] for key in stage.inputs}
+                    running[asyncio.create_task(stage.func(**kwargs), name=f"{self.name}:{name}")] = name
+
+                if not running:
+                    if pending:
+                        msg = f"Unresolvable stage dependencies: {sorted(pending)}"
+                        raise ValueError(msg)
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task, None)
+                    if name is None:
+                        continue
+                    if task.exception() is not None:
+                        _record(name, StageStatus.FAILED)
+                        raise PipelineError(name, timings) from task.exception()
+                    _finish(name, StageStatus.COMPLETED, task.result())
+                    if _is_final(self.stages[name]):
+                        to_checkpoint.append(name)
+                    _apply_guards(name)
+                await _checkpoint()
+        finally:
+            for task, name in running.items():
+                task.cancel()
+                _record(name, StageStatus.CANCELLED)
+            cancelled.extend(running)
+            if cancelled:
+                await asyncio.gather(*cancelled, return_exceptions=True)
+
+        timings["total"] = {
+            "start": 0.0,
+            "duration": round(time.perf_counter() - origin, 3),
+            "status": StageStatus.COMPLETED.value,
+        }
+        logger.info("Pipeline completed", pipeline=self.name, timings=timings)
+        return PipelineResult(results=results, timings=timings)
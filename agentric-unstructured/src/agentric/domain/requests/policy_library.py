@@ -0,0 +1,292 @@
+"""Library of policy wordings shared by every claim.
+
+The full policy attached to a claim is nearly always one of a handful of TravelGuard or
+Cover-More booklets. Each distinct booklet (by sha256 of its bytes) is parsed once into
+its sections, which are stored in the ``policy_documents`` table, and indexed in process
+with BM25. The decision stage then only sends the sections relevant to the claim type
+and reason instead of uploading the whole booklet.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import re
+import weakref
+from collections import Counter, OrderedDict
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from advanced_alchemy.exceptions import RepositoryError
+
+from agentric.config.app import alchemy
+from agentric.config.base import get_settings
+from agentric.domain.requests.document_text import get_document_pages
+from agentric.domain.requests.services import PolicyDocumentService
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from agentric.db import models as m
+    from agentric.domain.requests.attachments import AttachmentStore
+
+__all__ = (
+    "BM25Index",
+    "PolicyLibrary",
+    "format_policy_excerpt",
+    "get_policy_library",
+    "split_policy_sections",
+)
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+PINNED_SECTIONS = (
+    "SCHEDULE OF BENEFITS",
+    "GENERAL EXCLUSIONS",
+    "DEFINITIONS",
+    "CLAIM PROCEDURE",
+    "CLAIMS PROCEDURE",
+    "PAYMENT OF CLAIMS",
+)
+"""Sections sent with every excerpt.
+
+The decision always needs the limits and exclusions, and validates the policy file by
+its definitions and claims sections.
+"""
+MAX_SECTION_CHARS = 4000
+"""Longer sections are split into several passages so one benefit does not drown the rest."""
+MIN_POLICY_SECTIONS = 3
+MIN_POLICY_CHARS = 2000
+"""Below these the document has no usable text layer and is uploaded as a file instead."""
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have if in is it its of on or that the this to "
+    "was were will with you your any all not no than then there these those which who".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stopwords and with a naive plural stripping."""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 ranking over a small, fixed set of passages."""
+
+    def __init__(self, documents: list[str], *, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(freqs.values()) for freqs in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        doc_freqs: Counter[str] = Counter()
+        for freqs in self.term_freqs:
+            doc_freqs.update(freqs.keys())
+        total = len(documents)
+        self.idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in doc_freqs.items()
+        }
+
+    def scores(self, query: str) -> list[float]:
+        terms = tokenize(query)
+        scores = []
+        for freqs, length in zip(self.term_freqs, self.lengths, strict=True):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            score = 0.0
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def search(self, query: str, limit: int) -> list[int]:
+        """Return the indexes of the ``limit`` best matching passages, best first."""
+        scores = self.scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return [i for i in ranked[:limit] if scores[i] > 0]
+
+
+def _is_heading(line: str) -> bool:
+    letters = sum(ch.isalpha() for ch in line)
+    return (
+        letters >= 4
+        and len(line) <= 80
+        and line.upper() == line
+        and not line.endswith((".", ",", ";"))
+        and len(line.split()) <= 10
+    )
+
+
+def _split_passages(title: str, lines: list[str]) -> list[dict[str, Any]]:
+    passages: list[dict[str, Any]] = []
+    current: list[str] = []
+    size = 0
+    for line in lines:
+        if current and size + len(line) > MAX_SECTION_CHARS:
+            passages.append({"title": title, "text": "\n".join(current)})
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        passages.append({"title": title, "text": "\n".join(current)})
+    return passages
+
+
+def split_policy_sections(pages: list[str]) -> list[dict[str, Any]]:
+    """Split the text of a policy booklet into titled sections.
+
+    Headings are short upper case lines. Lines repeated on most pages (running headers,
+    footers) are dropped first so they are not taken for headings.
+
+    Args:
+        pages (list[str]): Extracted text of every page
+
+    Returns:
+        list[dict[str, Any]]: ``{"title", "text"}`` passages in document order.
+    """
+    page_lines = [[line.strip() for line in page.splitlines() if line.strip()] for page in pages]
+    repeated: set[str] = set()
+    if len(page_lines) >= 3:
+        counts = Counter(line for lines in page_lines for line in set(lines))
+        repeated = {line for line, count in counts.items() if count >= max(3, len(page_lines) // 2)}
+
+    sections: list[dict[str, Any]] = []
+    title = "PREAMBLE"
+    body: list[str] = []
+    for lines in page_lines:
+        for line in lines:
+            if line in repeated:
+                continue
+            if _is_heading(line):
+                if body:
+                    sections.extend(_split_passages(title, body))
+                title, body = line, []
+                continue
+            body.append(line)
+    if body:
+        sections.extend(_split_passages(title, body))
+    return sections
+
+
+def format_policy_excerpt(file_name: str, sections: list[dict[str, Any]]) -> str:
+    """Render the selected sections as the ``<policy_wording>`` block of the decision prompt."""
+    body = "\n\n".join(f"## {section['title']}\n{section['text']}" for section in sections)
+    return f'<policy_wording file="{file_name}">\n{body}\n</policy_wording>'
+
+
+class PolicyLibrary:
+    """Parse each distinct policy once and retrieve the sections relevant to a claim."""
+
+    def __init__(self, *, max_indexes: int = 16) -> None:
+        self.max_indexes = max_indexes
+        self._indexes: OrderedDict[str, tuple[list[dict[str, Any]], BM25Index]] = OrderedDict()
+        self._locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    def _cached(self, digest: str) -> tuple[list[dict[str, Any]], BM25Index] | None:
+        entry = self._indexes.get(digest)
+        if entry is not None:
+            self._indexes.move_to_end(digest)
+        return entry
+
+    async def _load(
+        self, digest: str, file_name: str, source: Callable[[], Awaitable[bytes]]
+    ) -> tuple[list[dict[str, Any]], BM25Index]:
+        entry = self._cached(digest)
+        if entry is not None:
+            return entry
+
+        # only loads of the same policy wait for each other, other policies are parsed concurrently
+        lock = self._locks.get(digest)
+        if lock is None:
+            lock = self._locks[digest] = asyncio.Lock()
+
+        async with lock:
+            entry = self._cached(digest)
+            if entry is not None:
+                return entry
+
+            async with PolicyDocumentService.new(config=alchemy) as service:
+                document = await service.get_one_or_none(content_hash=digest)
+                if document is not None:
+                    sections = document.sections
+                else:
+                    pages = await get_document_pages(digest, source)
+                    page_count, sections = len(pages), split_policy_sections(pages)
+                    logger.info("Parsed policy wording", file_name=file_name, sections=len(sections))
+                    try:
+                        await service.create(
+                            data={
+                                "content_hash": digest,
+                                "file_name": file_name,
+                                "page_count": page_count,
+                                "sections": sections,
+                            },
+                            auto_commit=True,
+                        )
+                    except RepositoryError:
+                        # another worker stored the same policy first
+                        logger.debug("Policy wording already stored", content_hash=digest)
+
+            entry = (sections, BM25Index([f"{s['title']}\n{s['text']}" for s in sections]))
+            self._indexes[digest] = entry
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+            return entry
+
+    async def relevant_sections(
+        self,
+        policy: m.RequestAttachment,
+        attachment_store: AttachmentStore,
+        query: str,
+        *,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]] | None:
+        """Return the sections of ``policy`` that match ``query``, in document order.
+
+        Args:
+            policy (m.RequestAttachment): The full policy attachment
+            attachment_store (AttachmentStore): Store of the claim job
+            query (str): Claim type, reason and loss description
+            limit (int): Number of retrieved sections, on top of the pinned ones
+
+        Returns:
+            list | None: The selected sections, or ``None`` when the policy has no usable
+            text and has to be sent as a file.
+        """
+        if attachment_store.mime_type(policy) != "application/pdf":
+            return None
+        # a stored policy is only downloaded when neither its sections nor its text are cached
+        digest = policy.sha256 or hashlib.sha256(await attachment_store.read(policy)).hexdigest()
+        sections, index = await self._load(digest, policy.file_name, partial(attachment_store.read, policy))
+        if (
+            len(sections) < MIN_POLICY_SECTIONS
+            or sum(len(section["text"]) for section in sections) < MIN_POLICY_CHARS
+        ):
+            return None
+
+        selected = {
+            i
+            for i, section in enumerate(sections)
+            if any(pinned in section["title"] for pinned in PINNED_SECTIONS)
+        }
+        selected.update(index.search(query, limit or settings.pipeline.POLICY_SECTION_LIMIT))
+        return [sections[i] for i in sorted(selected)]
+
+
+@lru_cache(maxsize=1)
+def get_policy_library() -> PolicyLibrary:
+    """Return the process wide policy library."""
+    return PolicyLibrary()
@@ -0,0 +1,195 @@
+"""Gemini context caching for the static prefixes of the claim prompts.
+
+The extraction, structuring and decision prompts start with long instructions and a
+whole JSON schema that are identical for every claim. Each prefix is registered once
+per model as a Gemini cached content, keyed by the sha256 of its text, and every call
+references the cache instead of sending the prefix again. Editing a prompt or a schema
+file changes the hash, so the next call registers a fresh cache and the old one expires.
+
+Prefixes below the model's minimum cacheable size are remembered and sent inline as
+system instruction, which keeps the request identical apart from the cache reference.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from google.genai import errors, types
+
+from agentric.config.base import get_settings
+from agentric.domain.requests.llm import call_model, get_genai_client
+from agentric.domain.requests.response_cache import get_response_cache
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from opentelemetry.trace import Span
+    from redis.asyncio import Redis
+
+__all__ = ("PromptCache", "generate_content_with_prefix", "get_prompt_cache")
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+INLINE = "inline"
+"""Registry value of a prefix the model refused to cache."""
+
+
+class PromptCache:
+    """Register static prompt prefixes as Gemini cached contents and reuse them."""
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        namespace: str | None = None,
+        ttl: int | None = None,
+        expiry_margin: int | None = None,
+    ) -> None:
+        self.redis = redis
+        self.namespace = namespace or f"{settings.app.slug}:gemini-caches"
+        self.ttl = ttl or settings.pipeline.PROMPT_CACHE_TTL
+        self.expiry_margin = expiry_margin or settings.pipeline.PROMPT_CACHE_EXPIRY_MARGIN
+        self._locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    def _key(self, model: str, prefix: str) -> str:
+        return f"{self.namespace}:{model}:{hashlib.sha256(prefix.encode()).hexdigest()}"
+
+    async def get(self, model: str, prefix: str) -> str | None:
+        """Return the name of a live cached content holding ``prefix``.
+
+        Args:
+            model (str): Model the cache is created for
+            prefix (str): Static system instruction
+
+        Returns:
+            str | None: The cached content name, or ``None`` when the prefix has to be sent inline.
+        """
+        key = self._key(model, prefix)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+
+        async with lock:
+            cached = await self.redis.get(key)
+            if cached is not None:
+                name = cached.decode() if isinstance(cached, bytes) else cached
+                return None if name == INLINE else name
+
+            client = get_genai_client()
+            try:
+                cache = await client.aio.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=prefix,
+                        ttl=f"{self.ttl}s",
+                        display_name=key.rsplit(":", 1)[-1][:32],
+                    ),
+                )
+            except errors.ClientError as e:
+                if e.code != 400:
+                    logger.warning("Failed to create cached content", model=model, exc_info=True)
+                    return None
+                # a prefix below the minimum token count of the model
+                logger.info("Prompt prefix is not cacheable, sending it inline", model=model, reason=str(e))
+                await self.redis.set(key, INLINE, ex=self.ttl)
+                return None
+            except Exception:  # noqa: BLE001
+                logger.warning("Failed to create cached content", model=model, exc_info=True)
+                return None
+
+            expires_at = cache.expire_time.timestamp() if cache.expire_time else time.time() + self.ttl
+            ttl = int(expires_at - time.time()) - self.expiry_margin
+            if cache.name and ttl > 0:
+                await self.redis.set(key, cache.name, ex=ttl)
+            logger.debug("Registered cached prompt prefix", model=model, name=cache.name)
+            return cache.name
+
+    async def invalidate(self, model: str, prefix: str) -> None:
+        """Forget the cached content of ``prefix``, the next call registers a new one."""
+        await self.redis.delete(self._key(model, prefix))
+
+
+@lru_cache(maxsize=1)
+def get_prompt_cache() -> PromptCache:
+    """Return the process wide prompt cache."""
+    return PromptCache(settings.redis.get_client())
+
+
+async def generate_content_with_prefix(
+    *,
+    model: str,
+    prefix: str,
+    contents: Any,
+    config: types.GenerateContentConfigOrDict | None = None,
+    span: Span | None = None,
+    attributes: Mapping[str, str] | None = None,
+    cache: bool = True,
+) -> types.GenerateContentResponse:
+    """Run ``generate_content`` with ``prefix`` as a cached (or inline) system instruction.
+
+    The response cache is keyed by the inline prefix, so a call hits it whether or not the
+    prefix is currently registered as a cached content.
+
+    Args:
+        model (str): Model name
+        prefix (str): Static instructions shared by every call of a stage
+        contents: Per claim prompt parts and uploaded files
+        config: Generation config
+        span: Span that receives the token usage attributes (optional)
+        attributes: Metric attributes of the call (optional)
+        cache (bool): Look the call up in the response cache (optional)
+
+    Returns:
+        types.GenerateContentResponse: The model response.
+    """
+    if config is None:
+        config = types.GenerateContentConfig()
+    elif isinstance(config, dict):
+        config = types.GenerateContentConfig.model_validate(config)
+
+    response_cache = get_response_cache()
+    key, cached = await response_cache.lookup(
+        model,
+        contents,
+        config.model_copy(update={"system_instruction": prefix}),
+        attributes,
+        enabled=cache,
+    )
+    if cached is not None:
+        if span is not None:
+            span.set_attribute("genai.response_cache", "hit")
+        return cached
+
+    cache_name = None
+    if settings.pipeline.PROMPT_CACHE_ENABLED:
+        cache_name = await get_prompt_cache().get(model, prefix)
+    if cache_name is not None:
+        config = config.model_copy(update={"cached_content": cache_name})
+    else:
+        config = config.model_copy(update={"system_instruction": prefix})
+    if span is not None:
+        span.set_attribute("genai.cached_content", cache_name or "")
+
+    try:
+        response = await call_model(
+            model=model, contents=contents, config=config, span=span, attributes=attributes
+        )
+    except errors.ClientError as e:
+        if cache_name is None or e.code not in (400, 403, 404):
+            raise
+        # the cache may have been deleted or expired early, drop it and send the prefix inline
+        logger.warning("Cached prompt prefix rejected, retrying inline", name=cache_name)
+        await get_prompt_cache().invalidate(model, prefix)
+        config = config.model_copy(update={"cached_content": None, "system_instruction": prefix})
+        response = await call_model(
+            model=model, contents=contents, config=config, span=span, attributes=attributes
+        )
+    await response_cache.store(key, response)
+    return response
@@ -0,0 +1,241 @@
+"""Redis cache of deterministic model responses.
+
+Every pipeline call runs with ``temperature=0`` and a fixed seed, so re-processing a claim
+(a support re-enqueue, a demo) sends the same requests again. Responses of such calls are
+stored under a key built from the model name, the hash of the prompt (text parts, system
+instruction and generation config), the hash of the response schema and the ordered
+content hashes of the attached files, and returned without calling the model.
+
+Files are identified by the sha256 of their content through the Gemini file registry,
+so a claim re-processed after its uploads expired still hits the cache. Entries expire
+after ``RESPONSE_CACHE_TTL`` seconds and the least recently used ones are evicted once
+the cache holds more than ``RESPONSE_CACHE_MAX_ENTRIES``. Only responses that finished
+with ``STOP`` are stored, and retried or re-run claim jobs bypass the cache with
+:func:`use_response_cache` so they never get a bad answer back.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from google.genai import types
+from opentelemetry import metrics
+
+from agentric.config.base import get_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+    from redis.asyncio import Redis
+
+__all__ = ("ResponseCache", "get_response_cache", "use_response_cache")
+
+logger = structlog.get_logger()
+settings = get_settings()
+meter = metrics.get_meter(__name__)
+
+lookups = meter.create_counter(
+    "genai.response_cache.lookups",
+    unit="{lookup}",
+    description="Response cache lookups of model calls by result (hit, miss or bypass).",
+)
+
+_enabled: ContextVar[bool] = ContextVar("response_cache_enabled", default=True)
+
+_SCHEMA_FIELDS = ("response_schema", "response_json_schema")
+_UNKEYED_FIELDS = ("cached_content", "http_options")
+
+
+def _sha256(value: Any) -> str:
+    data = value if isinstance(value, bytes) else json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+@contextmanager
+def use_response_cache(enabled: bool) -> Iterator[None]:
+    """Enable or bypass the response cache for the model calls made in the current context (and tasks it starts)."""
+    token = _enabled.set(enabled)
+    try:
+        yield
+    finally:
+        _enabled.reset(token)
+
+
+def _parts(contents: Any) -> list[types.Part]:
+    """Flatten the ``contents`` argument of ``generate_content`` into parts, in order."""
+    if contents is None:
+        return []
+    if isinstance(contents, list | tuple):
+        return [part for item in contents for part in _parts(item)]
+    if isinstance(contents, str):
+        return [types.Part(text=contents)]
+    if isinstance(contents, types.File):
+        return [types.Part.from_uri(file_uri=contents.uri or "", mime_type=contents.mime_type)]
+    if isinstance(contents, types.Part):
+        return [contents]
+    if isinstance(contents, types.Content):
+        return list(contents.parts or [])
+    if isinstance(contents, dict):
+        if "parts" in contents:
+            return _parts(contents["parts"])
+        return [types.Part.model_validate(contents)]
+    msg = f"Unsupported content: {type(contents).__name__}"
+    raise TypeError(msg)
+
+
+class ResponseCache:
+    """Store and return the responses of deterministic model calls."""
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        namespace: str | None = None,
+        ttl: int | None = None,
+        max_entries: int | None = None,
+        max_entry_size: int | None = None,
+    ) -> None:
+        self.redis = redis
+        self.namespace = namespace or f"{settings.app.slug}:gemini-responses"
+        self.ttl = ttl or settings.pipeline.RESPONSE_CACHE_TTL
+        self.max_entries = max_entries or settings.pipeline.RESPONSE_CACHE_MAX_ENTRIES
+        self.max_entry_size = max_entry_size or settings.pipeline.RESPONSE_CACHE_MAX_ENTRY_SIZE
+
+    @property
+    def index_key(self) -> str:
+        """Sorted set of cached keys scored by their last use."""
+        return f"{self.namespace}:index"
+
+    async def _file_hashes(self, uris: list[str]) -> list[str]:
+        # imported here, the file registry uploads through agentric.domain.requests.llm
+        from agentric.domain.requests.file_registry import get_file_registry
+
+        hashes = await get_file_registry().content_hashes(uris)
+        # unregistered uploads are keyed by their URI, which is only stable while the file lives
+        return [digest or uri for uri, digest in zip(uris, hashes, strict=True)]
+
+    async def key(self, model: str, contents: Any, config: types.GenerateContentConfig | None) -> str | None:
+        """Return the cache key of a call, ``None`` when its response is not deterministic.
+
+        Args:
+            model (str): Model name
+            contents: Prompt parts and uploaded files
+            config: Generation config, with the system instruction inline rather than a
+                cached content reference
+
+        Returns:
+            str | None: The key, ``None`` for calls without ``temperature=0``.
+        """
+        if config is None or config.temperature != 0:
+            return None
+        prompt: list[Any] = []
+        uris: list[str] = []
+        for part in _parts(contents):
+            if part.file_data is not None:
+                uris.append(part.file_data.file_uri or "")
+                prompt.append({"file": len(uris) - 1})
+            elif part.inline_data is not None:
+                prompt.append({"data": _sha256(part.inline_data.data or b""), "mime_type": part.inline_data.mime_type})
+            else:
+                prompt.append(part.model_dump(mode="json", exclude_none=True))
+        generation = config.model_dump(mode="json", exclude_none=True, exclude=set(_UNKEYED_FIELDS))
+        schema = {name: generation.pop(name) for name in _SCHEMA_FIELDS if name in generation}
+        components = {
+            "model": model,
+            "prompt": _sha256({"parts": prompt, "config": generation}),
+            "schema": _sha256(schema),
+            "files": await self._file_hashes(uris),
+        }
+        return f"{self.namespace}:{_sha256(components)}"
+
+    async def get(self, key: str) -> types.GenerateContentResponse | None:
+        """Return the cached response stored under ``key`` and mark it as recently used."""
+        cached = await self.redis.get(key)
+        if cached is None:
+            return None
+        await self.redis.zadd(self.index_key, {key: time.time()})
+        return types.GenerateContentResponse.model_validate_json(cached)
+
+    async def set(self, key: str, response: types.GenerateContentResponse) -> None:
+        """Store a complete response, evicting the least recently used entries beyond ``max_entries``.
+
+        Responses cut short (``MAX_TOKENS``, safety, recitation) are not stored, a retry
+        has to get a new answer.
+        """
+        if not response.candidates or response.candidates[0].finish_reason != types.FinishReason.STOP:
+            return
+        if not response.text:
+            return
+        data = response.model_dump_json(exclude_none=True, exclude={"sdk_http_response"})
+        if len(data) > self.max_entry_size:
+            logger.debug("Response too large to cache", size=len(data))
+            return
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, data, ex=self.ttl)
+            pipe.zadd(self.index_key, {key: now})
+            pipe.zremrangebyscore(self.index_key, "-inf", now - self.ttl)
+            pipe.zcard(self.index_key)
+            *_, size = await pipe.execute()
+        if size > self.max_entries:
+            evicted = [name for name, _ in await self.redis.zpopmin(self.index_key, size - self.max_entries)]
+            await self.redis.delete(*evicted)
+            logger.debug("Evicted cached responses", count=len(evicted))
+
+    async def lookup(
+        self,
+        model: str,
+        contents: Any,
+        config: types.GenerateContentConfig | None,
+        attributes: Mapping[str, str] | None = None,
+        *,
+        enabled: bool = True,
+    ) -> tuple[str | None, types.GenerateContentResponse | None]:
+        """Return the key of a call and its cached response, recording the outcome as a metric.
+
+        The call bypasses the cache when ``enabled`` is false, ``RESPONSE_CACHE_ENABLED``
+        is off or the current context disabled it with :func:`use_response_cache`. Redis
+        failures are only logged, the call then goes to the model uncached.
+
+        Returns:
+            tuple: The key (``None`` when the call is not cached) and the cached response
+            (``None`` on a miss).
+        """
+        metric_attributes = {"model": model, **(attributes or {})}
+        key = response = None
+        enabled = enabled and settings.pipeline.RESPONSE_CACHE_ENABLED and _enabled.get()
+        try:
+            if enabled:
+                key = await self.key(model, contents, config)
+            if key is not None:
+                response = await self.get(key)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to read the response cache", model=model, exc_info=True)
+            key = None
+        result = "bypass" if key is None else "miss" if response is None else "hit"
+        lookups.add(1, {**metric_attributes, "result": result})
+        if response is not None:
+            logger.info("Model call answered from cache", **metric_attributes)
+        return key, response
+
+    async def store(self, key: str | None, response: types.GenerateContentResponse) -> None:
+        """Store the response of a missed lookup, failures are only logged."""
+        if key is None:
+            return
+        try:
+            await self.set(key, response)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to write the response cache", exc_info=True)
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCache:
+    """Return the process wide response cache."""
+    return ResponseCache(settings.redis.get_client())
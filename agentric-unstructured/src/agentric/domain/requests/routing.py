@@ -0,0 +1,161 @@
+"""Model routing of the claim pipeline stages.
+
+Every model call of the pipeline names its stage and looks up the model, thinking budget
+and maximum output tokens in one routing table instead of hardcoding a model name. The
+defaults in :data:`DEFAULT_ROUTES` are overridden with ``PIPELINE_MODEL_ROUTES``, a JSON
+object with a ``default`` table and optional per team tables (``travelguard``,
+``covermore``) whose entries only replace the fields they set::
+
+    {"default": {"extract_all_info": {"model": "gemini-2.5-flash"}},
+     "covermore": {"handle_claims": {"thinking_budget": 4096}}}
+
+``agentric claims benchmark-routing`` replays recorded claims with candidate tables,
+which :func:`use_routes` activates for the current context.
+"""
+
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from google.genai import types
+
+from agentric.config.base import get_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+__all__ = (
+    "DEFAULT_ROUTES",
+    "TEAMS",
+    "ModelRoute",
+    "RoutingTable",
+    "get_routes",
+    "model_route",
+    "parse_routes",
+    "use_routes",
+)
+
+settings = get_settings()
+
+TEAMS = ("travelguard", "covermore")
+"""Teams whose stages can be routed apart from the default table."""
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Model and generation limits of a pipeline stage."""
+
+    model: str
+    thinking_budget: int | None = None
+    """Thinking tokens, ``None`` keeps the model's dynamic budget and 0 disables thinking (Flash only)."""
+    max_output_tokens: int | None = None
+    """Maximum response tokens including thoughts, ``None`` keeps the model's limit."""
+
+    def apply(self, config: types.GenerateContentConfigOrDict | None = None) -> types.GenerateContentConfig:
+        """Return ``config`` with the thinking budget and output limit of the route set."""
+        if config is None:
+            config = types.GenerateContentConfig()
+        elif isinstance(config, dict):
+            config = types.GenerateContentConfig.model_validate(config)
+        update: dict[str, Any] = {}
+        if self.thinking_budget is not None:
+            thinking_config = config.thinking_config or types.ThinkingConfig()
+            update["thinking_config"] = thinking_config.model_copy(update={"thinking_budget": self.thinking_budget})
+        if self.max_output_tokens is not None:
+            update["max_output_tokens"] = self.max_output_tokens
+        return config.model_copy(update=update)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+RoutingTable = dict[str, dict[str, ModelRoute]]
+"""Routes by table (``default`` or a team) and stage."""
+
+DEFAULT_ROUTES: dict[str, ModelRoute] = {
+    "classified_travelguard_docs": ModelRoute("gemini-2.5-flash"),
+    "classified_covermore_docs": ModelRoute("gemini-2.5-flash"),
+    "extract_all_info": ModelRoute("gemini-2.5-pro"),
+    "extract_claim_reason": ModelRoute("gemini-2.5-flash"),
+    "check_missing_travelguard_documents": ModelRoute("gemini-2.5-pro"),
+    "check_missing_covermore_documents": ModelRoute("gemini-2.5-pro"),
+    "evaluate_claim_status": ModelRoute("gemini-2.5-flash"),
+    "handle_claims": ModelRoute("gemini-2.5-pro"),
+    "handle_missing": ModelRoute("gemini-2.5-pro"),
+    "generate_decision_summary": ModelRoute("gemini-2.5-pro"),
+}
+"""Route of every stage that calls a model."""
+
+_override: ContextVar[RoutingTable | None] = ContextVar("model_routes", default=None)
+
+
+def _route(base: ModelRoute, fields: Mapping[str, Any], where: str) -> ModelRoute:
+    if not isinstance(fields, dict):
+        msg = f"Route {where} must be an object"
+        raise ValueError(msg)
+    try:
+        return replace(base, **fields)
+    except TypeError as e:
+        msg = f"Invalid route {where}: {e}"
+        raise ValueError(msg) from e
+
+
+def parse_routes(raw: Mapping[str, Any]) -> RoutingTable:
+    """Merge a routing table override into :data:`DEFAULT_ROUTES`.
+
+    Args:
+        raw: ``{"default": {stage: fields}, team: {stage: fields}}``, every level optional
+
+    Raises:
+        ValueError: For unknown tables, stages or route fields.
+
+    Returns:
+        RoutingTable: The ``default`` table and a complete table per team.
+    """
+    unknown = set(raw) - {"default", *TEAMS}
+    if unknown:
+        msg = f"Unknown routing tables {sorted(unknown)}, expected default or one of {', '.join(TEAMS)}"
+        raise ValueError(msg)
+    table: RoutingTable = {"default": dict(DEFAULT_ROUTES)}
+    for name in ("default", *TEAMS):
+        base = table["default"]
+        routes = dict(base)
+        for stage, fields in raw.get(name, {}).items():
+            if stage not in DEFAULT_ROUTES:
+                msg = f"Unknown stage {stage!r} in routing table {name}"
+                raise ValueError(msg)
+            routes[stage] = _route(base[stage], fields, f"{name}.{stage}")
+        table[name] = routes
+    return table
+
+
+@lru_cache(maxsize=1)
+def get_routes() -> RoutingTable:
+    """Return the routing table configured with ``PIPELINE_MODEL_ROUTES``."""
+    raw = settings.pipeline.MODEL_ROUTES.strip()
+    return parse_routes(json.loads(raw) if raw else {})
+
+
+@contextmanager
+def use_routes(table: RoutingTable) -> Iterator[RoutingTable]:
+    """Route the model calls made in the current context (and tasks it starts) with ``table``."""
+    token = _override.set(table)
+    try:
+        yield table
+    finally:
+        _override.reset(token)
+
+
+def model_route(stage: str, team: str | None = None) -> ModelRoute:
+    """Return the route of ``stage``, from the table of ``team`` when given.
+
+    Raises:
+        KeyError: When the stage has no route.
+    """
+    table = _override.get() or get_routes()
+    return table.get(team or "default", table["default"])[stage]
@@ -0,0 +1,240 @@
+"""Replay recorded claims through candidate model routings.
+
+Every claim is run through the stage graph of its pipeline once per routing table (see
+:mod:`agentric.domain.requests.routing`) and repetition, without checkpoints and without
+the response cache, so each run calls the models. The model calls are collected with
+:func:`agentric.domain.requests.llm.record_model_calls` and reported per routing and
+stage: latency percentiles, tokens and the token cost from :data:`MODEL_PRICES`.
+Nothing is written to the claims, and replays do not count towards the classifier
+statistics.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import structlog
+from advanced_alchemy.filters import LimitOffset, OrderBy
+from sqlalchemy import or_
+
+from agentric.config import constants
+from agentric.config.app import alchemy
+from agentric.db import models as m
+from agentric.db.models.enums import SubmissionStatus
+from agentric.domain.chats.services import ChatService
+from agentric.domain.requests.attachments import AttachmentStore
+from agentric.domain.requests.doc_classifier import use_outcome_recording
+from agentric.domain.requests.llm import ModelCall, record_model_calls
+from agentric.domain.requests.pipeline import PipelineError
+from agentric.domain.requests.response_cache import use_response_cache
+from agentric.domain.requests.routing import use_routes
+from agentric.domain.requests.services import RequestAttachmentService, RequestService
+from agentric.domain.requests.tasks import claim_graph, claim_pipeline_function
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+    from uuid import UUID
+
+    from agentric.domain.requests.routing import RoutingTable
+
+__all__ = (
+    "MODEL_PRICES",
+    "RoutingReport",
+    "StageReport",
+    "benchmark_routes",
+    "call_cost",
+    "recent_claims",
+)
+
+logger = structlog.get_logger()
+
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+"""USD per million input and output tokens (prompts up to 200k tokens), thoughts are billed as output."""
+
+
+def call_cost(call: ModelCall) -> float | None:
+    """Token cost of a model call in USD, ``None`` for models without a price."""
+    prices = MODEL_PRICES.get(call.model)
+    if prices is None:
+        return None
+    input_price, output_price = prices
+    return (call.input_tokens * input_price + (call.output_tokens + call.thinking_tokens) * output_price) / 1e6
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)] if ordered else 0.0
+
+
+@dataclass
+class StageReport:
+    """Model calls of one stage under one routing."""
+
+    stage: str
+    models: set[str] = field(default_factory=set)
+    durations: list[float] = field(default_factory=list)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float | None = 0.0
+
+    def add(self, call: ModelCall) -> None:
+        self.models.add(call.model)
+        self.durations.append(call.duration)
+        self.input_tokens += call.input_tokens
+        self.output_tokens += call.output_tokens + call.thinking_tokens
+        cost = call_cost(call)
+        self.cost = None if cost is None or self.cost is None else self.cost + cost
+
+    @property
+    def calls(self) -> int:
+        return len(self.durations)
+
+    @property
+    def p50(self) -> float:
+        return _percentile(self.durations, 0.5)
+
+    @property
+    def p95(self) -> float:
+        return _percentile(self.durations, 0.95)
+
+
+@dataclass
+class RoutingReport:
+    """Replays of every claim under one routing."""
+
+    name: str
+    runs: int = 0
+    failed: int = 0
+    durations: list[float] = field(default_factory=list)
+    stages: dict[str, StageReport] = field(default_factory=dict)
+
+    def add(self, duration: float, calls: Sequence[ModelCall], *, failed: bool) -> None:
+        self.runs += 1
+        self.failed += failed
+        self.durations.append(duration)
+        for call in calls:
+            stage = call.stage or "-"
+            self.stages.setdefault(stage, StageReport(stage)).add(call)
+
+    @property
+    def cost_per_claim(self) -> float | None:
+        costs = [stage.cost for stage in self.stages.values()]
+        if not self.runs or any(cost is None for cost in costs):
+            return None
+        return sum(cost for cost in costs if cost is not None) / self.runs
+
+    def to_dict(self) -> dict[str, Any]:
+        """Claim latency percentiles and, per stage, call latency percentiles and tokens and cost per claim."""
+        return {
+            "name": self.name,
+            "runs": self.runs,
+            "failed": self.failed,
+            "p50": _percentile(self.durations, 0.5),
+            "p95": _percentile(self.durations, 0.95),
+            "cost_per_claim": self.cost_per_claim,
+            "stages": {
+                name: {
+                    "models": sorted(stage.models),
+                    "calls": stage.calls,
+                    "p50": stage.p50,
+                    "p95": stage.p95,
+                    "input_tokens": stage.input_tokens / self.runs,
+                    "output_tokens": stage.output_tokens / self.runs,
+                    "cost": None if stage.cost is None else stage.cost / self.runs,
+                }
+                for name, stage in sorted(self.stages.items())
+            },
+        }
+
+
+async def recent_claims(team: str, limit: int) -> list[UUID]:
+    """Return the ids of the latest processed claims of a team (``travelguard`` or ``covermore``)."""
+    if team == "covermore":
+        owner = m.Request.owner_organization == constants.cover_more_team
+    else:
+        owner = or_(
+            m.Request.owner_organization.is_(None),
+            m.Request.owner_organization != constants.cover_more_team,
+        )
+    async with RequestService.new(config=alchemy) as service:
+        requests = await service.list(
+            owner,
+            m.Request.submission_status == SubmissionStatus.INREVIEW,
+            OrderBy(field_name="created_at", sort_order="desc"),
+            LimitOffset(limit=limit, offset=0),
+        )
+    return [request.id for request in requests]
+
+
+async def _load_claim(request_id: UUID) -> tuple[str, list[m.RequestAttachment]] | None:
+    async with RequestService.new(config=alchemy) as service:
+        request = await service.get_one_or_none(id=request_id)
+        if request is None:
+            return None
+        async with ChatService.new(session=service.repository.session) as chats:
+            chat = await chats.get_one_or_none(request_id=request_id)
+        if chat is None:
+            return None
+        async with RequestAttachmentService.new(session=service.repository.session) as attachments:
+            return claim_pipeline_function(request.owner_organization), list(
+                await attachments.list(chat_id=chat.id)
+            )
+
+
+async def benchmark_routes(
+    request_ids: Sequence[UUID],
+    routings: Mapping[str, RoutingTable],
+    repeat: int = 1,
+) -> dict[str, RoutingReport]:
+    """Replay every claim through every routing ``repeat`` times.
+
+    Claims are replayed one at a time, routings alternate within a claim so they see the
+    same load. Attachments are fetched and uploaded once per claim and shared by all
+    runs. A failed run is counted and its model calls up to the failure are kept.
+
+    Args:
+        request_ids: Claims to replay
+        routings: Routing tables by name
+        repeat (int): Runs of every claim per routing
+
+    Returns:
+        dict[str, RoutingReport]: A report per routing name.
+    """
+    reports = {name: RoutingReport(name) for name in routings}
+    # a cached response would report the latency and cost of the first run only, and replayed
+    # classifications must not count towards the production classifier statistics
+    with use_response_cache(False), use_outcome_recording(False):
+        for request_id in request_ids:
+            claim = await _load_claim(request_id)
+            if claim is None:
+                logger.warning("Claim not found, skipping", request_id=str(request_id))
+                continue
+            function_name, attachments = claim
+            attachment_store = AttachmentStore(attachments)
+            try:
+                await attachment_store.prefetch()
+                for _ in range(repeat):
+                    for name, table in routings.items():
+                        graph = claim_graph(function_name)
+                        failed = False
+                        start = time.perf_counter()
+                        with use_routes(table), record_model_calls() as calls:
+                            try:
+                                await graph.run({"attachments": attachments, "attachment_store": attachment_store})
+                            except PipelineError:
+                                failed = True
+                                logger.warning(
+                                    "Claim replay failed", request_id=str(request_id), routing=name, exc_info=True
+                                )
+                        reports[name].add(time.perf_counter() - start, calls, failed=failed)
+            finally:
+                attachment_store.close()
+            logger.info("Replayed claim", request_id=str(request_id), pipeline=function_name)
+    return reports
@@ -108,6 +108,7 @@ class Request(BaseModel):
     created_by: str | None = None
     created_by_id: UUID | None = None
     unique_identifier: str | None = None
+    stage_timings: dict[str, Any] | None = None
 
 class ExtractionResult(BaseModel):
     # Customer info
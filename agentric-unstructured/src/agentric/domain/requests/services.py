@@ -99,3 +99,72 @@ class RequestAttachmentService(SQLAlchemyAsyncRepositoryService[m.RequestAttachm
         model_type = m.RequestAttachment
 
     repository_type = Repository
+
+
+class ClaimCheckpointService(SQLAlchemyAsyncRepositoryService[m.ClaimCheckpoint]):
+    """Handles database operations for claim pipeline checkpoints."""
+
+    class Repository(SQLAlchemyAsyncRepository[m.ClaimCheckpoint]):
+        """Claim Checkpoint SQLAlchemy Repository."""
+
+        model_type = m.ClaimCheckpoint
+
+    repository_type = Repository
+
+    async def load_outputs(self, request_id: uuid.UUID | str) -> dict[str, Any]:
+        """Return the saved stage outputs of a request keyed by stage name."""
+        checkpoints = await self.list(request_id=request_id)
+        return {checkpoint.stage: checkpoint.output for checkpoint in checkpoints}
+
+    async def save_output(
+        self, request_id: uuid.UUID | str, pipeline: str, stage: str, output: Any
+    ) -> m.ClaimCheckpoint:
+        """Create or replace the checkpoint of one stage."""
+        existing = await self.get_one_or_none(request_id=request_id, stage=stage)
+        if existing is not None:
+            return await self.update(
+                item_id=existing.id,
+                data={"pipeline": pipeline, "output": output},
+                auto_commit=True,
+            )
+        return await self.create(
+            data={
+                "request_id": request_id,
+                "pipeline": pipeline,
+                "stage": stage,
+                "output": output,
+            },
+            auto_commit=True,
+        )
+
+    async def invalidate(self, request_id: uuid.UUID | str, stages: set[str]) -> None:
+        """Delete the checkpoints of the given stages so they run again."""
+        if not stages:
+            return
+        await self.delete_where(
+            m.ClaimCheckpoint.request_id == request_id,
+            m.ClaimCheckpoint.stage.in_(stages),
+            auto_commit=True,
+        )
+
+
+class PolicyDocumentService(SQLAlchemyAsyncRepositoryService[m.PolicyDocument]):
+    """Handles database operations for the policy wording library."""
+
+    class Repository(SQLAlchemyAsyncRepository[m.PolicyDocument]):
+        """Policy Document SQLAlchemy Repository."""
+
+        model_type = m.PolicyDocument
+
+    repository_type = Repository
+
+
+class DocumentTextService(SQLAlchemyAsyncRepositoryService[m.DocumentText]):
+    """Handles database operations for the per page text of PDF attachments."""
+
+    class Repository(SQLAlchemyAsyncRepository[m.DocumentText]):
+        """Document Text SQLAlchemy Repository."""
+
+        model_type = m.DocumentText
+
+    repository_type = Repository
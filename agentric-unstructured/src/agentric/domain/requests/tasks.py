@@ -2,19 +2,42 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import StrEnum
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from dateutil import parser
+from saq import Job
 from structlog import get_logger
 
+from agentric.config import constants
 from agentric.config.app import alchemy
+from agentric.config.base import get_settings
 from agentric.db.models.enums import ClaimStatus, SubmissionStatus
 from agentric.domain.chats.deps import provide_chats_service
+from agentric.domain.requests.attachments import AttachmentStore
+from agentric.domain.requests import schemas as s
 from agentric.domain.requests.deps import (
+    provide_claim_checkpoint_service,
     provide_extraction_service,
     provide_request_attachment_service,
     provide_request_service,
 )
+from agentric.domain.requests.attachment_metadata import (
+    preprocess_attachment as preprocess_attachment_content,
+)
+from agentric.domain.requests.blobs import collect_unreferenced_objects
+from agentric.domain.requests.file_registry import get_file_registry
+from agentric.domain.requests.pipeline import (
+    Guard,
+    PipelineError,
+    PipelineResult,
+    Stage,
+    StageGraph,
+)
+from agentric.domain.requests.policy_library import (
+    format_policy_excerpt,
+    get_policy_library,
+)
+from agentric.domain.requests.response_cache import use_response_cache
 from agentric.domain.requests.utils import (
     check_missing_covermore_documents,
     check_missing_travelguard_documents,
@@ -22,10 +45,8 @@ from agentric.domain.requests.utils import (
     classified_travelguard_docs,
     evaluate_claim_status,
     extract_all_info,
-    generate_data_structure,
-    generate_data_structure_missing_case,
+    extract_claim_reason,
     handle_missing,
-    mapped_missing_case_covermore,
 )
 from agentric.domain.requests.utils import (
     handle_claims as extract_claim_form,
@@ -34,9 +55,17 @@ from agentric.domain.requests.utils import (
 from .rule_sets import travel_guard_required_files
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+    from uuid import UUID
+
+    from saq import Queue
     from saq.types import Context
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from agentric.db import models as m
 
 logger = get_logger()
+settings = get_settings()
 
 
 # Travelguard document types
@@ -48,8 +77,364 @@ class TGDocumentType(StrEnum):
     SUMMARY_POLICY = "policy_summary"
 
 
+def _dump_attachment_map(value: dict) -> dict:
+    """Checkpoint a mapping of attachments (or lists of attachments) by attachment id."""
+
+    def _dump(item: Any) -> Any:
+        if isinstance(item, list):
+            return [_dump(i) for i in item]
+        return str(item.id) if item is not None else None
+
+    return {str(key): _dump(item) for key, item in value.items()}
+
+
+def _load_attachment_map(raw: dict, initial: Mapping[str, Any]) -> dict:
+    """Rebuild a mapping checkpointed with :func:`_dump_attachment_map`."""
+    by_id = {str(attachment.id): attachment for attachment in initial["attachments"]}
+
+    def _load(item: Any) -> Any:
+        if isinstance(item, list):
+            return [by_id[i] for i in item if i in by_id]
+        return by_id.get(item) if item is not None else None
+
+    return {key: _load(item) for key, item in raw.items()}
+
+
+def _dump_missing_check(value: dict) -> dict:
+    return {**value, "analysis_outcome": value["analysis_outcome"].model_dump()}
+
+
+def _load_missing_check(raw: dict, _: Mapping[str, Any]) -> dict:
+    return {
+        **raw,
+        "analysis_outcome": s.MissingCheckOutcome.model_validate(raw["analysis_outcome"]),
+    }
+
+
+async def _run_claim_pipeline(
+    graph: StageGraph,
+    db_session: AsyncSession,
+    *,
+    request_id: str,
+    attachments: list[m.RequestAttachment],
+    attachment_store: AttachmentStore,
+    resume_from: str | None = None,
+    cache: bool = True,
+) -> PipelineResult:
+    """Run a claim stage graph, resuming from the checkpoints of earlier runs.
+
+    Every stage output is checkpointed on the request. A retried or re-enqueued job
+    restores all checkpointed stages and only runs the remaining ones. ``resume_from``
+    drops the checkpoints of that stage and of every stage depending on it first.
+    ``cache=False`` sends every model call to the model instead of the response cache.
+    """
+    checkpoint_service = await anext(provide_claim_checkpoint_service(db_session))
+    if resume_from is not None:
+        if resume_from not in graph.stages:
+            msg = f"Unknown {graph.name} stage {resume_from!r}"
+            raise ValueError(msg)
+        await checkpoint_service.invalidate(request_id, graph.downstream([resume_from]))
+    restored = await checkpoint_service.load_outputs(request_id)
+    if restored:
+        logger.info("Resuming claim pipeline", request_id=request_id, stages=sorted(restored))
+
+    async def _save(stage: str, output: Any) -> None:
+        await checkpoint_service.save_output(request_id, graph.name, stage, output)
+
+    if set(graph.stages) - set(restored):
+        # a fully checkpointed claim reads no attachments
+        await attachment_store.prefetch()
+    with use_response_cache(cache):
+        return await graph.run(
+            {"attachments": attachments, "attachment_store": attachment_store},
+            restored=restored,
+            on_checkpoint=_save,
+        )
+
+
+def _use_response_cache(ctx: "Context", resume_from: str | None) -> bool:
+    """Whether a claim job may answer model calls from the response cache.
+
+    A retry or a re-run repeats the requests of a run that failed or was rejected, a
+    cached response would only give the same answer back.
+    """
+    job = ctx.get("job")
+    return resume_from is None and (job is None or job.attempts <= 1)
+
+
+def _travelguard_static_missing(classified: dict) -> list[dict]:
+    """Required TravelGuard documents that the classifier did not find."""
+    missing = []
+    if classified[TGDocumentType.FULL_POLICY] is None:
+        missing.append(
+            {
+                "filename": "policy_detail",
+                "is_missing": True,
+                "verdict": "Policy detail document not found",
+            }
+        )
+    if classified[TGDocumentType.CLAIM_SUMMARY] is None:
+        missing.append(
+            {
+                "filename": "claim_summary",
+                "is_missing": True,
+                "verdict": "Claim summary document not found",
+            }
+        )
+    if classified[TGDocumentType.SUMMARY_POLICY] is None:
+        missing.append(
+            {
+                "filename": "policy_summary",
+                "is_missing": True,
+                "verdict": "Policy summary document not found",
+            }
+        )
+    return missing
+
+
+async def _classify_travelguard(
+    attachments: list[m.RequestAttachment], attachment_store: AttachmentStore
+) -> dict:
+    classified_docs = await classified_travelguard_docs(
+        attachments=attachments, attachment_store=attachment_store
+    )
+
+    # Collect all attachment files and map them to their respective document types
+    input_classified_files = {
+        TGDocumentType.FULL_POLICY: None,
+        TGDocumentType.SUMMARY_POLICY: None,
+        TGDocumentType.CLAIM_SUMMARY: None,
+        TGDocumentType.HOTEL_BOOKING: [],
+        TGDocumentType.EVIDENCES: [],
+    }
+
+    for doc in classified_docs:
+        classifed_doc_filename = doc.filename.replace(" ", "").lower()
+        selected_file = next(
+            (
+                file
+                for file in attachments
+                if file.file_name.replace(" ", "").lower() == classifed_doc_filename
+            ),
+            None,
+        )
+
+        if selected_file is None:
+            alert_mesg = f"🚨 File {doc.filename} not found in request attachments"
+            logger.info(alert_mesg)
+            continue
+
+        match doc.file_type:
+            case TGDocumentType.SUMMARY_POLICY:
+                input_classified_files[TGDocumentType.SUMMARY_POLICY] = selected_file
+            case TGDocumentType.FULL_POLICY:
+                input_classified_files[TGDocumentType.FULL_POLICY] = selected_file
+            case TGDocumentType.CLAIM_SUMMARY:
+                input_classified_files[TGDocumentType.CLAIM_SUMMARY] = selected_file
+            case TGDocumentType.HOTEL_BOOKING:
+                input_classified_files[TGDocumentType.HOTEL_BOOKING].append(selected_file)
+            case TGDocumentType.EVIDENCES:
+                input_classified_files[TGDocumentType.EVIDENCES].append(selected_file)
+    return input_classified_files
+
+
+def _travelguard_filtered_files(
+    attachments: list[m.RequestAttachment], classified: dict
+) -> list[m.RequestAttachment]:
+    """All attachment files except the policy detail file."""
+    full_policy = classified[TGDocumentType.FULL_POLICY]
+    if full_policy is None:
+        return list(attachments)
+    return [file for file in attachments if file.file_name != full_policy.file_name]
+
+
+async def _policy_excerpt(
+    full_policy: m.RequestAttachment | None,
+    claim_reason: dict,
+    attachment_store: AttachmentStore,
+) -> str | None:
+    """Sections of the full policy relevant to the claim, ``None`` to send the whole file."""
+    if full_policy is None or not settings.pipeline.POLICY_RETRIEVAL_ENABLED:
+        return None
+    query = " ".join(
+        str(claim_reason.get(key) or "").replace("_", " ")
+        for key in ("claim_type", "claim_reason_type", "type_of_loss")
+    )
+    try:
+        sections = await get_policy_library().relevant_sections(
+            full_policy, attachment_store, query
+        )
+    except Exception:  # noqa: BLE001
+        logger.warning("Policy retrieval failed, sending the full policy", exc_info=True)
+        return None
+    if sections is None:
+        return None
+    return format_policy_excerpt(full_policy.file_name, sections)
+
+
+def _with_claim_reason(extraction: dict, claim_reason: dict) -> dict:
+    """Return ``extraction`` with the claim type and reason of the ``claim_reason`` stage.
+
+    ``extract_all_info`` classifies the claim again, and the two answers can disagree.
+    The missing document check selects the required documents with the ``claim_reason``
+    stage, so the stored extraction, the request and the decision use the same values.
+    """
+    claim_data = extraction.get("claim_data")
+    if not isinstance(claim_data, dict):
+        return extraction
+    extracted = claim_data.get("claim_reason") or {}
+    used = {key: claim_reason[key] for key in ("claim_type", "claim_reason_type")}
+    if any(extracted.get(key) not in (None, value) for key, value in used.items()):
+        logger.info(
+            "Extracted claim reason differs from the one used by the document check",
+            extracted={key: extracted.get(key) for key in used},
+            used=used,
+        )
+    return {
+        **extraction,
+        "claim_data": {
+            **claim_data,
+            "claim_reason": {
+                "type_of_loss": claim_reason.get("type_of_loss"),
+                **extracted,
+                **used,
+            },
+        },
+    }
+
+
+def _travelguard_graph(
+    *, session_id: str, user_email: str, user_id: str
+) -> StageGraph:
+    """Stage graph of the TravelGuard pipeline.
+
+    ``extraction`` and ``claim_reason`` only need the classification, and the missing
+    document check only needs the claim type and reason, so the full extraction and
+    the missing document check run concurrently.
+    """
+    trace_info = {"session_id": session_id, "email": user_email, "user_id": user_id}
+
+    async def extraction(classify: dict, attachment_store: AttachmentStore) -> dict:
+        return await extract_all_info(
+            hotel_doc=classify[TGDocumentType.HOTEL_BOOKING],
+            claim_summary_doc=classify[TGDocumentType.CLAIM_SUMMARY],
+            policy_summary_doc=classify[TGDocumentType.SUMMARY_POLICY],
+            attachment_store=attachment_store,
+            **trace_info,
+        )
+
+    async def claim_reason(
+        classify: dict,
+        attachments: list[m.RequestAttachment],
+        attachment_store: AttachmentStore,
+    ) -> dict:
+        claim_summary = classify[TGDocumentType.CLAIM_SUMMARY]
+        return await extract_claim_reason(
+            claim_documents=(
+                [claim_summary]
+                if claim_summary is not None
+                else _travelguard_filtered_files(attachments, classify)
+            ),
+            attachment_store=attachment_store,
+            **trace_info,
+        )
+
+    async def missing_check(
+        classify: dict,
+        claim_reason: dict,
+        attachments: list[m.RequestAttachment],
+        attachment_store: AttachmentStore,
+    ) -> dict:
+        missing_file_list = _travelguard_static_missing(classify)
+        required_file_check_list = list(missing_file_list)
+        check_file_list = travel_guard_required_files[claim_reason["claim_type"]][
+            claim_reason["claim_reason_type"]
+        ]
+        analysis_outcome, thoughts = await check_missing_travelguard_documents(
+            attachments=_travelguard_filtered_files(attachments, classify),
+            check_file_list=check_file_list,
+            attachment_store=attachment_store,
+        )
+        for key, val in analysis_outcome.missing_status.items():
+            item = {
+                "filename": key,
+                "is_missing": val.missing,
+                "verdict": val.reason,
+            }
+            if val.missing:
+                missing_file_list.append(item)
+            required_file_check_list.append(item)
+        return {
+            "analysis_outcome": analysis_outcome,
+            "thoughts": thoughts,
+            "missing_file_list": missing_file_list,
+            "required_file_check_list": required_file_check_list,
+        }
+
+    async def decision(
+        classify: dict,
+        extraction: dict,
+        claim_reason: dict,
+        attachment_store: AttachmentStore,
+    ) -> tuple[dict, str]:
+        full_policy = classify[TGDocumentType.FULL_POLICY]
+        return await evaluate_claim_status(
+            extracted_data=_with_claim_reason(extraction, claim_reason),
+            full_policy=full_policy,
+            evidences=classify[TGDocumentType.EVIDENCES],
+            attachment_store=attachment_store,
+            policy_excerpt=await _policy_excerpt(full_policy, claim_reason, attachment_store),
+            **trace_info,
+        )
+
+    return StageGraph(
+        "travelguard",
+        [
+            Stage(
+                "classify",
+                _classify_travelguard,
+                inputs=("attachments", "attachment_store"),
+                dump=_dump_attachment_map,
+                load=_load_attachment_map,
+            ),
+            Stage("extraction", extraction, inputs=("classify", "attachment_store")),
+            Stage(
+                "claim_reason",
+                claim_reason,
+                inputs=("classify", "attachments", "attachment_store"),
+            ),
+            Stage(
+                "missing_check",
+                missing_check,
+                inputs=("classify", "claim_reason", "attachments", "attachment_store"),
+                dump=_dump_missing_check,
+                load=_load_missing_check,
+            ),
+            Stage(
+                "decision",
+                decision,
+                inputs=("classify", "extraction", "claim_reason", "attachment_store"),
+                when=lambda results: not _travelguard_static_missing(results["classify"]),
+                guard=Guard(
+                    "missing_check",
+                    lambda results: not results["missing_check"]["missing_file_list"],
+                ),
+                speculative=settings.pipeline.SPECULATIVE_EVALUATION,
+                dump=list,
+                load=lambda raw, _: tuple(raw),
+            ),
+        ],
+    )
+
+
 async def process_travelguard_claims(
-    ctx: "Context", *, request_id: str, session_id: str, user_email: str, user_id: str
+    ctx: "Context",
+    *,
+    request_id: str,
+    session_id: str,
+    user_email: str,
+    user_id: str,
+    resume_from: str | None = None,
 ) -> None:
     async with alchemy.get_session() as db_session:
         request_attachment_service = await anext(
@@ -61,148 +446,31 @@ async def process_travelguard_claims(
         if chat_obj is None:
             raise Exception(f"Chat not found assoicated with request {request_id}")
         request_attachments = await request_attachment_service.list(chat_id=chat_obj.id)
+        attachment_store = AttachmentStore(request_attachments)
+        graph = _travelguard_graph(
+            session_id=session_id, user_email=user_email, user_id=user_id
+        )
 
         try:
-            updated_request = {}
-            classified_docs = await classified_travelguard_docs(
-                attachments=list(request_attachments)
-            )
-
-            # Collect all attachment files and map them to their respective document types
-            input_classified_files = {
-                TGDocumentType.FULL_POLICY: None,
-                TGDocumentType.SUMMARY_POLICY: None,
-                TGDocumentType.CLAIM_SUMMARY: None,
-                TGDocumentType.HOTEL_BOOKING: [],
-                TGDocumentType.EVIDENCES: [],
-            }
-
-            for doc in classified_docs:
-                classifed_doc_filename = doc.filename.replace(" ", "").lower()
-                selected_file = next(
-                    (
-                        file
-                        for file in request_attachments
-                        if file.file_name.replace(" ", "").lower()
-                        == classifed_doc_filename
-                    ),
-                    None,
-                )
-
-                if selected_file is None:
-                    alert_mesg = (
-                        f"🚨 File {doc.filename} not found in request attachments"
-                    )
-                    logger.info(alert_mesg)
-                    continue
-
-                match doc.file_type:
-                    case TGDocumentType.SUMMARY_POLICY:
-                        input_classified_files[TGDocumentType.SUMMARY_POLICY] = (
-                            selected_file
-                        )
-                    case TGDocumentType.FULL_POLICY:
-                        input_classified_files[TGDocumentType.FULL_POLICY] = (
-                            selected_file
-                        )
-                    case TGDocumentType.CLAIM_SUMMARY:
-                        input_classified_files[TGDocumentType.CLAIM_SUMMARY] = (
-                            selected_file
-                        )
-                    case TGDocumentType.HOTEL_BOOKING:
-                        input_classified_files[TGDocumentType.HOTEL_BOOKING].append(
-                            selected_file
-                        )
-                    case TGDocumentType.EVIDENCES:
-                        input_classified_files[TGDocumentType.EVIDENCES].append(
-                            selected_file
-                        )
-
-            # DATA Extraction based on the available files
-
-            extracted_data = await extract_all_info(
-                hotel_doc=input_classified_files[TGDocumentType.HOTEL_BOOKING],
-                claim_summary_doc=input_classified_files[TGDocumentType.CLAIM_SUMMARY],
-                policy_summary_doc=input_classified_files[TGDocumentType.SUMMARY_POLICY],
-                session_id=session_id,
-                email=user_email,
-                user_id=user_id,
+            pipeline = await _run_claim_pipeline(
+                graph,
+                db_session,
+                request_id=request_id,
+                attachments=list(request_attachments),
+                attachment_store=attachment_store,
+                resume_from=resume_from,
+                cache=_use_response_cache(ctx, resume_from),
             )
-
-            # Missing file check
-            missing_file_list = []
-            required_file_check_list = []
-
-            if input_classified_files[TGDocumentType.FULL_POLICY] is None:
-                policy_entry = {
-                    "filename": "policy_detail",
-                    "is_missing": True,
-                    "verdict": "Policy detail document not found",
-                }
-                missing_file_list.append(policy_entry)
-                required_file_check_list.append(policy_entry)
-
-            if input_classified_files[TGDocumentType.CLAIM_SUMMARY] is None:
-                summary_entry = {
-                    "filename": "claim_summary",
-                    "is_missing": True,
-                    "verdict": "Claim summary document not found",
-                }
-                missing_file_list.append(summary_entry)
-                required_file_check_list.append(summary_entry)
-
-            if input_classified_files[TGDocumentType.SUMMARY_POLICY] is None:
-                summary_entry = {
-                    "filename": "policy_summary",
-                    "is_missing": True,
-                    "verdict": "Policy summary document not found",
-                }
-                missing_file_list.append(summary_entry)
-                required_file_check_list.append(summary_entry)
-
-            ### all attachment files except the policy detail file
-            filtered_files = []
-            if input_classified_files[TGDocumentType.FULL_POLICY] is None:
-                filtered_files = list(request_attachments)
-            else:
-                filtered_files = [
-                    file
-                    for file in request_attachments
-                    if file.file_name
-                    != input_classified_files[TGDocumentType.FULL_POLICY].file_name
-                ]
-            check_file_list = []
-
-            claim_type = extracted_data["claim_data"]["claim_reason"]["claim_type"]
-            claim_status = extracted_data["claim_data"]["claim_reason"][
-                "claim_reason_type"
-            ]
-
-            check_file_list = travel_guard_required_files[claim_type][claim_status]
-
-            analysis_outcome, thoughts = await check_missing_travelguard_documents(
-                attachments=filtered_files, check_file_list=check_file_list
+            extracted_data = _with_claim_reason(
+                pipeline.results["extraction"], pipeline.results["claim_reason"]
             )
+            missing = pipeline.results["missing_check"]
+            missing_file_list = missing["missing_file_list"]
+            analysis_outcome = missing["analysis_outcome"]
 
-            for key, val in analysis_outcome.missing_status.items():
-                item = {
-                    "filename": key,
-                    "is_missing": val.missing,
-                    "verdict": val.reason,
-                }
-                if val.missing:
-                    missing_file_list.append(item)
-                required_file_check_list.append(item)
             decision_thoughts = ""
-            if len(missing_file_list) == 0:
-                decision_data, decision_thoughts = await evaluate_claim_status(
-                    extracted_data=extracted_data,
-                    user_id=user_id,
-                    email=user_email,
-                    session_id=session_id,
-                    full_policy=input_classified_files[TGDocumentType.FULL_POLICY],
-                    evidences=input_classified_files[TGDocumentType.EVIDENCES],
-                )
+            if pipeline.results["decision"] is not None:
+                decision_data, decision_thoughts = pipeline.results["decision"]
                 extracted_data["decision_data"] = decision_data
 
             updated_request = await _process_request_info(
@@ -214,19 +482,22 @@ async def process_travelguard_claims(
             if decision_thoughts != "":
                 updated_request["generated_thoughts"] = decision_thoughts
 
-            updated_request["generated_file_check_summary"] = thoughts
+            updated_request["generated_file_check_summary"] = missing["thoughts"]
             if len(missing_file_list) > 0:
                 updated_request["generated_decision_summary"] = analysis_outcome.generated_decision_summary
-            elif extracted_data["decision_data"] is not None:
+            elif extracted_data.get("decision_data") is not None:
                 updated_request["generated_decision_summary"] = extracted_data["decision_data"]["summary_of_findings"]
+            updated_request["stage_timings"] = pipeline.timings
 
             await requests_service.update(
                 item_id=request_id, data=updated_request, auto_commit=True
             )
             extractions_service = await anext(provide_extraction_service(db_session))
 
-            extracted_data["required_document_check"] = required_file_check_list
+            extracted_data["required_document_check"] = missing["required_file_check_list"]
 
+            # a re-run replaces the extraction of the previous run
+            await extractions_service.delete_where(request_id=request_id)
             await extractions_service.create(
                 data={
                     "request_id": request_id,
@@ -242,18 +513,133 @@ async def process_travelguard_claims(
                 error=str(e),
             )
 
+            failed_request: dict[str, Any] = {
+                "status": ClaimStatus.CLOSED,
+                "submission_status": SubmissionStatus.ERROR,
+            }
+            # failures outside the graph keep the timings of the last run
+            if isinstance(e, PipelineError):
+                failed_request["stage_timings"] = e.timings
             await requests_service.update(
                 item_id=request_id,
-                data={
-                    "status": ClaimStatus.CLOSED,
-                    "submission_status": SubmissionStatus.ERROR,
-                },
+                data=failed_request,
                 auto_commit=True,
                 auto_refresh=True,
             )
+        finally:
+            attachment_store.close()
+
+def _covermore_graph(
+    *, session_id: str, user_email: str, user_id: str
+) -> StageGraph:
+    """Stage graph of the CoverMore pipeline."""
+    trace_info = {"session_id": session_id, "email": user_email, "user_id": user_id}
+
+    async def classify(
+        attachments: list[m.RequestAttachment], attachment_store: AttachmentStore
+    ) -> dict:
+        classified_docs = await classified_covermore_docs(
+            attachments=attachments, attachment_store=attachment_store
+        )
+        filtered_files = []
+
+        policy_detail_file = None
+        for doc in classified_docs:
+            if doc.file_type == "full_policy":
+                policy_filename = doc.filename.replace(" ", "").lower()
+                for file in attachments:
+                    base_filename = file.file_name.replace(" ", "").lower()
+                    if base_filename == policy_filename:
+                        policy_detail_file = file
+                        break
+                continue
+
+            chosen_one = [
+                file
+                for file in attachments
+                if file.file_name.replace(" ", "").lower()
+                == doc.filename.replace(" ", "").lower()
+            ]
+            filtered_files.append(chosen_one[0])
+        return {"policy_detail_file": policy_detail_file, "filtered_files": filtered_files}
+
+    async def missing_check(classify: dict, attachment_store: AttachmentStore) -> dict:
+        required_file_check_list = []
+        missing_file_list = []
+        if classify["policy_detail_file"] is None:
+            policy_entry = {
+                "filename": "policy_detail",
+                "is_missing": True,
+                "verdict": "Policy detail document not found",
+            }
+            missing_file_list.append(policy_entry)
+            required_file_check_list.append(policy_entry)
+
+            analysis_outcome = await check_missing_covermore_documents(
+                attachments=classify["filtered_files"], attachment_store=attachment_store
+            )
+            for item in analysis_outcome:
+                for key, val in item.items():
+                    entry = {
+                        "filename": key,
+                        "is_missing": val.missing,
+                        "verdict": val.reason,
+                    }
+                    if val.missing:
+                        missing_file_list.append(entry)
+                    required_file_check_list.append(entry)
+        return {
+            "missing_file_list": missing_file_list,
+            "required_file_check_list": required_file_check_list,
+        }
+
+    async def analysis(
+        classify: dict, missing_check: dict, attachment_store: AttachmentStore
+    ) -> dict:
+        # one model call returns the decision narrative, the extraction and the
+        # general_claim.json record
+        if len(missing_check["missing_file_list"]) > 0:
+            return await handle_missing(
+                attachments=classify["filtered_files"],
+                attachment_store=attachment_store,
+                missing_list=missing_check["missing_file_list"],
+                **trace_info,
+            )
+        # no missing documents implies the policy detail file was found
+        return await extract_claim_form(
+            attachments=[*classify["filtered_files"], classify["policy_detail_file"]],
+            attachment_store=attachment_store,
+            **trace_info,
+        )
+
+    return StageGraph(
+        "covermore",
+        [
+            Stage(
+                "classify",
+                classify,
+                inputs=("attachments", "attachment_store"),
+                dump=_dump_attachment_map,
+                load=_load_attachment_map,
+            ),
+            Stage("missing_check", missing_check, inputs=("classify", "attachment_store")),
+            Stage(
+                "analysis",
+                analysis,
+                inputs=("classify", "missing_check", "attachment_store"),
+            ),
+        ],
+    )
+
 
 async def process_covermore_claims(
-    ctx: "Context", *, request_id: str, session_id: str, user_email: str, user_id: str
+    ctx: "Context",
+    *,
+    request_id: str,
+    session_id: str,
+    user_email: str,
+    user_id: str,
+    resume_from: str | None = None,
 ) -> None:
     async with alchemy.get_session() as db_session:
         request_attachment_service = await anext(
@@ -265,94 +651,29 @@ async def process_covermore_claims(
         if chat_obj is None:
             raise Exception(f"Chat not found assoicated with request {request_id}")
         request_attachments = await request_attachment_service.list(chat_id=chat_obj.id)
+        attachment_store = AttachmentStore(request_attachments)
+        graph = _covermore_graph(
+            session_id=session_id, user_email=user_email, user_id=user_id
+        )
 
         try:
             updated_request = {}
-            extraction_data = {}
-            request = await requests_service.get(item_id=request_id)
-
-            classified_docs = await classified_covermore_docs(
-                attachments=list(request_attachments)
+            pipeline = await _run_claim_pipeline(
+                graph,
+                db_session,
+                request_id=request_id,
+                attachments=list(request_attachments),
+                attachment_store=attachment_store,
+                resume_from=resume_from,
+                cache=_use_response_cache(ctx, resume_from),
             )
-            filtered_files = []
-
-            policy_detail_file = None
-            for doc in classified_docs:
-                if doc.file_type == "full_policy":
-                    policy_filename = doc.filename.replace(" ", "").lower()
-                    for file in request_attachments:
-                        base_filename = file.file_name.replace(" ", "").lower()
-                        if base_filename == policy_filename:
-                            policy_detail_file = file
-                            break
-                    continue
-
-                chosen_one = [
-                    file
-                    for file in request_attachments
-                    if file.file_name.replace(" ", "").lower()
-                    == doc.filename.replace(" ", "").lower()
-                ]
-                filtered_files.append(chosen_one[0])
-            required_file_check_list = []
-            missing_file_list = []
-            if policy_detail_file is None:
-                policy_entry = {
-                    "filename": "policy_detail",
-                    "is_missing": True,
-                    "verdict": "Policy detail document not found",
-                }
-                missing_file_list.append(policy_entry)
-                required_file_check_list.append(policy_entry)
-
-                required_files = await check_missing_covermore_documents(
-                    attachments=filtered_files
-                )
-                analysis_outcome = await mapped_missing_case_covermore(
-                    attachments=filtered_files, required_files=required_files
-                )
-                for item in analysis_outcome:
-                    for key, val in item.items():
-                        entry = {
-                            "filename": key,
-                            "is_missing": val.missing,
-                            "verdict": val.reason,
-                        }
-                        if val.missing:
-                            missing_file_list.append(entry)
-                        required_file_check_list.append(entry)
-
-            if len(missing_file_list) > 0:
-                extraction_data = await handle_missing(
-                    attachments=filtered_files,
-                    missing_list=missing_file_list,
-                    user_id=user_id,
-                    email=user_email,
-                    session_id=session_id,
-                )
-                structed_extraction = await generate_data_structure_missing_case(
-                    data=extraction_data,
-                    user_id=user_id,
-                    email=user_email,
-                    session_id=session_id,
-                    missing_file_list=missing_file_list,
-                )
-
-            else:
-                extraction_data = await extract_claim_form(
-                    attachments=filtered_files,
-                    user_id=user_id,
-                    email=user_email,
-                    session_id=session_id,
-                )
+            extraction_data = pipeline.results["analysis"]
+            structed_extraction = extraction_data["structure"] if extraction_data else None
+            missing_file_list = pipeline.results["missing_check"]["missing_file_list"]
+            required_file_check_list = pipeline.results["missing_check"][
+                "required_file_check_list"
+            ]
 
-                structed_extraction = await generate_data_structure(
-                    data=extraction_data,
-                    policy_detail_file=policy_detail_file,
-                    user_id=user_id,
-                    email=user_email,
-                    session_id=session_id,
-                )
             if extraction_data and structed_extraction:
                 updated_request = _process_extraction_data(
                     extraction_data=structed_extraction
@@ -361,6 +682,7 @@ async def process_covermore_claims(
                     {
                         "generated_decisions": extraction_data["decision"],
                         "generated_thoughts": extraction_data["thoughts"],
+                        "stage_timings": pipeline.timings,
                     }
                 )
                 if len(missing_file_list) > 0:
@@ -385,6 +707,8 @@ async def process_covermore_claims(
                     "required_document_check"
                 ] = required_file_check_list
 
+                # a re-run replaces the extraction of the previous run
+                await extractions_service.delete_where(request_id=request.id)
                 await extractions_service.create(
                     data={
                         "request_id": request.id,
@@ -409,15 +733,122 @@ async def process_covermore_claims(
                 exc_info=True,
             )
 
+            failed_request: dict[str, Any] = {
+                "status": ClaimStatus.CLOSED,
+                "submission_status": SubmissionStatus.ERROR,
+            }
+            # failures outside the graph keep the timings of the last run
+            if isinstance(e, PipelineError):
+                failed_request["stage_timings"] = e.timings
             await requests_service.update(
                 item_id=request_id,
-                data={
-                    "status": ClaimStatus.CLOSED,
-                    "submission_status": SubmissionStatus.ERROR,
-                },
+                data=failed_request,
                 auto_commit=True,
                 auto_refresh=True,
             )
+        finally:
+            attachment_store.close()
+
+
+CLAIM_PIPELINE_STAGES: dict[str, tuple[str, ...]] = {
+    "process_travelguard_claims": (
+        "classify",
+        "extraction",
+        "claim_reason",
+        "missing_check",
+        "decision",
+    ),
+    "process_covermore_claims": ("classify", "missing_check", "analysis"),
+}
+"""Stages of each claim pipeline task, in execution order."""
+
+
+def claim_pipeline_function(owner_organization: str | None) -> str:
+    """Return the name of the pipeline task that processes a team's claims."""
+    if owner_organization == constants.cover_more_team:
+        return "process_covermore_claims"
+    return "process_travelguard_claims"
+
+
+def claim_graph(
+    function_name: str, *, session_id: str = "", user_email: str = "", user_id: str = ""
+) -> StageGraph:
+    """Return the stage graph run by a claim pipeline task."""
+    graphs = {
+        "process_travelguard_claims": _travelguard_graph,
+        "process_covermore_claims": _covermore_graph,
+    }
+    return graphs[function_name](session_id=session_id, user_email=user_email, user_id=user_id)
+
+
+async def enqueue_claim_rerun(
+    queue: Queue,
+    *,
+    request: m.Request,
+    user_id: str,
+    user_email: str,
+    session_id: str = "",
+    from_stage: str | None = None,
+) -> Job:
+    """Re-enqueue the pipeline of a claim.
+
+    Checkpointed stages are restored; ``from_stage`` and every stage depending on it
+    run again. Without ``from_stage`` the job resumes after the last saved stage.
+
+    Raises:
+        ValueError: If ``from_stage`` is not a stage of the claim's pipeline.
+    """
+    function_name = claim_pipeline_function(request.owner_organization)
+    if from_stage is not None and from_stage not in CLAIM_PIPELINE_STAGES[function_name]:
+        msg = (
+            f"Unknown stage {from_stage!r}, expected one of "
+            f"{', '.join(CLAIM_PIPELINE_STAGES[function_name])}"
+        )
+        raise ValueError(msg)
+    job = Job(
+        function=function_name,
+        kwargs={
+            "request_id": str(request.id),
+            "session_id": session_id,
+            "user_id": user_id,
+            "user_email": user_email,
+            "resume_from": from_stage,
+        },
+        timeout=0,
+    )
+    await queue.enqueue(job)
+    return job
+
+
+async def cleanup_gemini_files(ctx: "Context") -> dict:
+    """Delete expired and orphaned files from the Gemini file service."""
+    return await get_file_registry().cleanup()
+
+
+async def preprocess_attachment(ctx: "Context", *, attachment_id: str) -> dict:
+    """Compute the metadata, first pages text and provisional label of an upload."""
+    found = await preprocess_attachment_content(attachment_id)
+    return {"attachment_id": attachment_id, "found": found}
+
+
+async def enqueue_attachment_preprocessing(queue: Queue, attachment_id: UUID | str) -> Job:
+    """Enqueue :func:`preprocess_attachment`, at most once per attachment at a time."""
+    job = Job(
+        function="preprocess_attachment",
+        kwargs={"attachment_id": str(attachment_id)},
+        key=f"preprocess-attachment:{attachment_id}",
+        timeout=300,
+        retries=3,
+        retry_delay=5.0,
+        retry_backoff=True,
+    )
+    await queue.enqueue(job)
+    return job
+
+
+async def collect_attachment_blobs(ctx: "Context") -> dict:
+    """Delete attachment objects that no attachment references any more."""
+    return await collect_unreferenced_objects()
 
 
 def parse_datetime(date_str: str | None) -> datetime | None:
@@ -1,27 +1,22 @@
 from __future__ import annotations
 
-import io
 import json
-import mimetypes
 import os
 from collections.abc import Sequence
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from io import BytesIO
+from functools import lru_cache
 from json import JSONDecodeError
 from pathlib import Path
 import pathlib
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import aiofile
-import mammoth
 import structlog
-from bs4 import BeautifulSoup
 from google import genai
 from google.genai import types
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from opentelemetry import trace
-from PyPDF2 import PdfReader
 
 # from weasyprint import HTML
 from agentric.config.base import get_settings
@@ -29,17 +24,34 @@ from agentric.db.models.enums import ClaimStatus
 from agentric.db import models as m
 from agentric.domain.chats.schemas import ToolResultReponse
 from agentric.domain.requests import schemas as s
+from agentric.domain.requests.attachments import duplicate_note
+from agentric.domain.requests.doc_classifier import (
+    Guess,
+    preclassify,
+    record_classifier_outcome,
+    should_audit,
+)
+from agentric.domain.requests.llm import generate_content
+from agentric.domain.requests.prompt_cache import generate_content_with_prefix
+from agentric.domain.requests.routing import model_route
+from agentric.lib.executor import run_in_process
+from agentric.lib.parsing import docx_to_html, pdf_pages_text
 from agentric.domain.requests.rule_sets import (
     cover_more_document_check,
+    travel_guard_required_files,
 )
 
+if TYPE_CHECKING:
+    from opentelemetry.trace import Span
+
+    from agentric.domain.requests.attachments import AttachmentStore
+
 logger = structlog.get_logger()
 
 
 __all__ = [
     "clean_llm_output",
     "extract_first_page_text",
-    "generate_data_structure",
     "generate_decision_summary",
     "generate_decline_email_template",
     "generate_missing_email_template",
@@ -78,6 +90,13 @@ EXT_MIME_MAP = {
 }
 
 
+def _text_first(stage: str, text_first: bool | None) -> bool:
+    """Whether ``stage`` sends the text of PDFs instead of the files, see ``PIPELINE_TEXT_FIRST_STAGES``."""
+    if text_first is not None:
+        return text_first
+    return stage in {name.strip() for name in settings.pipeline.TEXT_FIRST_STAGES.split(",")}
+
+
 def get_classification(request: m.Request) -> ToolResultReponse:
     extraction = s.Extraction.model_validate(request.extraction)
     extraction_data = extraction.extracted_data
@@ -112,9 +131,8 @@ def get_main_fields(
 
 
 async def extract_first_page_text(content_bytes: bytes) -> str:
-    reader = PdfReader(BytesIO(content_bytes))
-    first_page = reader.pages[0]
-    return first_page.extract_text() or ""
+    pages = await run_in_process(pdf_pages_text, content_bytes, 1)
+    return pages[0]
 
 
 async def nested_dict_from_flat(flat_fields: dict) -> dict[str, Any]:
@@ -135,15 +153,129 @@ async def read_async_json(filepath: str) -> dict:
         return json.loads(schema_content)
 
 
+CLAIM_RECORD_INSTRUCTIONS = """
+    The "claim" object is the claim record, it must strictly conform to its schema.
+    - Read all provided input to fill it. If a piece of information cannot be found, use `null`.
+      Do not invent or infer data for non-analytical fields.
+    - `generated_decision_summary`: a concise, one or two-sentence summary of the outcome of the claim analysis.
+    - Dates: ISO 8601 strings (e.g. "YYYY-MM-DD" or "YYYY-MM-DDTHH:MM:SS").
+    - Amounts: strings, preserving the currency symbol if present (e.g. "$251.51").
+"""
+
+
+@lru_cache(maxsize=1)
+def _claim_analysis_schema() -> dict[str, Any]:
+    """Response schema of the Cover-More claim analysis.
+
+    The narrative comes first so the model writes its analysis before filling in the
+    extraction and the ``schema/general_claim.json`` claim record. The extraction reuses the
+    policy and claim definitions of ``schema/claim_info.json``, the shape the rest of the
+    pipeline reads ``policy_data`` in.
+    """
+    claim_schema = json.loads(Path("schema/general_claim.json").read_text(encoding="utf-8"))
+    definitions = json.loads(Path("schema/claim_info.json").read_text(encoding="utf-8"))["$defs"]
+    return {
+        "type": "object",
+        "properties": {
+            "decision": {
+                "type": "string",
+                "description": "The analysis of the claim for the Claims Handler, in markdown.",
+            },
+            "extracted": {
+                "type": "object",
+                "description": "Structured data extracted from the attached files.",
+                "properties": {
+                    "policy_data": definitions["policy_data"],
+                    "claims_data": definitions["claim_data"],
+                },
+                "required": ["policy_data", "claims_data"],
+            },
+            "claim": claim_schema,
+        },
+        "required": ["decision", "extracted", "claim"],
+    }
+
+
+async def _analyze_claim(
+    *,
+    stage: str,
+    prompt: str,
+    attachments: Sequence[m.RequestAttachment],
+    attachment_store: AttachmentStore,
+    model_name: str | None,
+    text_first: bool | None,
+    span: Span,
+) -> dict[str, Any]:
+    """Run the single Cover-More analysis call, constrained to :func:`_claim_analysis_schema`.
+
+    Returns:
+        dict: ``decision`` narrative, model ``thoughts``, the ``extracted`` policy and claims data and
+        the ``structure`` claim record.
+    """
+    model_contents = await attachment_store.model_contents(
+        attachments, text_first=_text_first(stage, text_first)
+    )
+
+    if model_contents.failed:
+        logger.debug("⚠️ Some files could not be uploaded")
+        logger.debug(model_contents.failed)
+    if not model_contents.parts:
+        msg = "No files are uploaded!"
+        raise RuntimeError(msg)
+    route = model_route(stage, "covermore")
+    response = await generate_content(
+        model=model_name or route.model,
+        contents=[*model_contents.parts, prompt],
+        config=route.apply(
+            genai.types.GenerateContentConfig(
+                thinking_config=genai.types.ThinkingConfig(include_thoughts=True),
+                temperature=0,
+                response_mime_type="application/json",
+                response_json_schema=_claim_analysis_schema(),
+            )
+        ),
+        span=span,
+        attributes={"stage": stage, "mode": model_contents.mode},
+    )
+
+    thoughts = ""
+    results = ""
+    assert response.candidates is not None
+
+    content = response.candidates[0].content
+
+    assert content is not None
+    assert content.parts is not None
+
+    for part in content.parts:
+        if not part.text:
+            continue
+        if hasattr(part, "thought") and part.thought:
+            thoughts += part.text
+        else:
+            results += part.text
+    logger.info("Stage 1: Finished claim analysis", stage=stage)
+    logger.info(thoughts)
+    logger.info(results)
+    analysis = json.loads(results)
+
+    return {
+        "decision": analysis["decision"],
+        "thoughts": thoughts,
+        "extracted": analysis["extracted"],
+        "structure": analysis["claim"],
+    }
+
+
 async def handle_claims(
     attachments: Sequence[m.RequestAttachment],
+    attachment_store: AttachmentStore,
     user_id: str,
     email: str,
     session_id: str,
-    model_name: str = "gemini-2.5-pro",
+    model_name: str | None = None,
+    text_first: bool | None = None,
 ) -> dict[str, Any]:
-    from agentric.lib.utils import read_minio_file
-
     with tracer.start_as_current_span("claim_extraction") as span:
 
         span.set_attribute("function.name", "handle_claims")
@@ -151,118 +283,42 @@ async def handle_claims(
         span.set_attribute("user.email", email)
         span.set_attribute("session.id", session_id)
 
-        client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-
-        uploaded_files = []
-        failed_files = []
-        prompt = """
+        prompt = f"""
     - You are a Claim Adjuster working for an Insurance company.
     Your job is to analyze Claim Submission and determine whether the claim is covered by the attached policy.
     If it is covered, determine whether there is enough supplemental attachments to determine the validity of the Claim.
-    If the Claim is valid and is covered by the policy, then using the attached receipts and Policy limits, calculate the amount payable. 
+    If the Claim is valid and is covered by the policy, then using the attached receipts and Policy limits, calculate the amount payable.
     If the claim is not covered, provide an excerpt from the policy stating why the claim is not covered.
-    Assume that the attached policy is a purchased policy by the claimant. You can use markdown here.
-
-    - Include Extracted Structured data in Correct JSON format in below <script> tag.
-    Fill Structured JSON EXTRACTION RESULT BELOW in Valid JSON Values. Avoid Markdown inside.
-
-    <script language="json">
-    {
-    "policy_data" : {},
-    "claims_data" : {},
-    "
-    }
-    </script>
+    Assume that the attached policy is a purchased policy by the claimant.
 
+    - Write your analysis in "decision", you can use markdown there.
+    - Include the Extracted Structured data in "extracted".
+    {CLAIM_RECORD_INSTRUCTIONS}
+    - `status`: 'APPROVED', 'DECLINED' or 'PARTIAL_PAYMENT', based on the policy terms.
+    - `status`, `decision_reason`, `payment_status` and `payment_reason` must agree with your analysis.
     """
-        for attachment in attachments:
-            # Detect mime type (fallback to octet-stream if unknown)
-            mime_type, _ = mimetypes.guess_type(attachment.file_name)
-            if mime_type is None:
-                mime_type = "application/octet-stream"
-
-            try:
-                content_bytes = await read_minio_file(attachment.url)
-                file_bytes = io.BytesIO(content_bytes)
-                uploaded = client.files.upload(
-                    file=file_bytes, config={"mime_type": mime_type}
-                )
-                uploaded_files.append(uploaded)
-            except Exception as e:
-                failed_files.append(
-                    {"filename": str(attachment.file_name), "reason": str(e)}
-                )
-
-        if failed_files:
-            logger.debug("⚠️ Some files could not be uploaded")
-            logger.debug(failed_files)
-        if not uploaded_files:
-            msg = "No files are uploaded!"
-            raise RuntimeError(msg)
-        response = client.models.generate_content(
-            model=model_name,
-            contents=[*uploaded_files, prompt],
-            config=genai.types.GenerateContentConfig(
-                thinking_config=genai.types.ThinkingConfig(include_thoughts=True),
-                temperature=0,
-            ),
+        return await _analyze_claim(
+            stage="handle_claims",
+            prompt=prompt,
+            attachments=attachments,
+            attachment_store=attachment_store,
+            model_name=model_name,
+            text_first=text_first,
+            span=span,
         )
 
-        thoughts = ""
-        results = ""
-        assert response.candidates is not None
-
-        content = response.candidates[0].content
-
-        assert content is not None
-        assert content.parts is not None
-
-        input_tokens = response.usage_metadata.prompt_token_count or 0  # type: ignore
-        output_tokens = response.usage_metadata.candidates_token_count or 0  # type: ignore
-        total_tokens = response.usage_metadata.total_token_count or 0  # type: ignore
-
-        span.set_attribute("genai.request_token_usage", input_tokens)
-        span.set_attribute("genai.response_token_usage", output_tokens)
-        span.set_attribute("genai.total_token_usage", total_tokens)
-        span.set_attribute("genai.model", model_name)
-
-        for part in content.parts:
-            if not part.text:
-                continue
-            if hasattr(part, "thought") and part.thought:
-                thoughts += part.text
-            else:
-                results += part.text
-        logger.info("Stage 1: Finished data extraction from claim form")
-        logger.info(thoughts)
-        logger.info(results)
-        extracted = {}
-        soup = BeautifulSoup(results, "html.parser")
-
-        # Find the <extraction> tag
-        extraction_tag = soup.find("script")
-        if extraction_tag:
-            try:
-                extracted = json.loads(extraction_tag.get_text(strip=True))
-                extraction_tag.decompose()
-                results = soup.get_text()
-            except:
-                extracted = {}
-
-        return {"decision": results, "thoughts": thoughts, "extracted": extracted}
-
 
 async def extract_all_info(
     hotel_doc: list[m.RequestAttachment] | None,
     claim_summary_doc: m.RequestAttachment | None,
     policy_summary_doc: m.RequestAttachment | None,
+    attachment_store: AttachmentStore,
     session_id: str,
     email: str,
     user_id: str,
-    model_name: str = "gemini-2.5-pro",
+    model_name: str | None = None,
+    text_first: bool | None = None,
 ):
-    from agentric.lib.utils import read_minio_file
-
     with tracer.start_as_current_span("claim_extraction") as span:
         span.set_attribute("function.name", "extract_all_info")
         span.set_attribute("user.id", user_id)
@@ -297,8 +353,6 @@ async def extract_all_info(
             "{JSON_SCHEMA}", schema_text
         )
 
-        client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-        uploaded_files = []
         attachments = []
 
         if claim_summary_doc:
@@ -307,43 +361,28 @@ async def extract_all_info(
             attachments.append(policy_summary_doc)
         if hotel_doc:
             attachments.extend(hotel_doc)
-        for attachment in attachments:
-            mime_type, _ = mimetypes.guess_type(attachment.file_name)
-            if mime_type is None:
-                mime_type = "application/octet-stream"
-
-            try:
-                content_bytes = await read_minio_file(attachment.url)
-                file_bytes = io.BytesIO(content_bytes)
-                uploaded = client.files.upload(
-                    file=file_bytes, config={"mime_type": mime_type}
-                )
-                uploaded_files.append(uploaded)
-            except Exception as e:
-                alert_mesg = (
-                    f"⚠️ Some files {attachment.file_name} could not be uploaded"
+        model_contents = await attachment_store.model_contents(
+            attachments, text_first=_text_first("extract_all_info", text_first)
+        )
+        for failed in model_contents.failed:
+            alert_mesg = f"⚠️ Some files {failed['filename']} could not be uploaded"
+            logger.debug(alert_mesg)
+            logger.debug(failed["reason"])
+
+        route = model_route("extract_all_info", "travelguard")
+        response = await generate_content_with_prefix(
+            model=model_name or route.model,
+            prefix=prompt,
+            contents=[*model_contents.parts, "Extract the fields of the schema from the attached files."],
+            config=route.apply(
+                genai.types.GenerateContentConfig(
+                    temperature=0,
+                    response_mime_type="application/json",
                 )
-                logger.debug(alert_mesg)
-                logger.debug(e)
-                continue
-
-        response = client.models.generate_content(
-            model=model_name,
-            contents=[uploaded_files, prompt],
-            config=genai.types.GenerateContentConfig(
-                temperature=0,
-                response_mime_type="application/json",
             ),
+            span=span,
+            attributes={"stage": "extract_all_info", "mode": model_contents.mode},
         )
-        um = response.usage_metadata
-        input_tokens = um.prompt_token_count or 0  # type: ignore
-        output_tokens = um.candidates_token_count or 0  # type: ignore
-        total_tokens = um.total_token_count or 0  # type: ignore
-
-        span.set_attribute("genai.request_token_usage", input_tokens)
-        span.set_attribute("genai.response_token_usage", output_tokens)
-        span.set_attribute("genai.total_token_usage", total_tokens)
-        span.set_attribute("genai.model", model_name)
 
         if response.text is None:
             msg = "Response text is None!"
@@ -369,6 +408,85 @@ async def extract_all_info(
         )
 
 
+async def extract_claim_reason(
+    claim_documents: Sequence[m.RequestAttachment],
+    attachment_store: AttachmentStore,
+    session_id: str,
+    email: str,
+    user_id: str,
+    model_name: str | None = None,
+) -> dict[str, Any]:
+    """Extract only the claim type and reason, the inputs of the required document check.
+
+    This is a much smaller call than ``extract_all_info`` so the missing document check
+    does not have to wait for the full extraction.
+
+    Raises:
+        RuntimeError: When no document could be uploaded or the model returned nothing.
+        ValueError: When the claim type and reason have no required document list in
+            ``travel_guard_required_files``.
+    """
+    with tracer.start_as_current_span("claim_extraction") as span:
+        span.set_attribute("function.name", "extract_claim_reason")
+        span.set_attribute("user.id", user_id)
+        span.set_attribute("user.email", email)
+        span.set_attribute("session.id", session_id)
+
+        schema = json.loads(Path("schema/claim_info.json").read_text(encoding="utf-8"))
+        claim_reason_schema = schema["$defs"]["claim_data"]["properties"]["claim_reason"]
+        prompt = """
+        You are an Insurance Information Extractor.
+
+        Read the attached claim documents and return the claim type and the reason of the
+        claim as ONE JSON object that validates against the schema below.
+
+        <schema>
+        {JSON_SCHEMA}
+        </schema>
+
+        STRICT OUTPUT
+        - Return ONLY the JSON object that conforms to the schema.
+        - No code fences, no explanations, no extra keys.
+        """.replace(
+            "{JSON_SCHEMA}", json.dumps(claim_reason_schema)
+        )
+
+        uploaded_files, failed_files, skipped_files = await attachment_store.upload_all(claim_documents)
+        if not uploaded_files:
+            msg = f"No claim documents uploaded: {failed_files}"
+            raise RuntimeError(msg)
+
+        route = model_route("extract_claim_reason", "travelguard")
+        response = await generate_content(
+            model=model_name or route.model,
+            contents=[*uploaded_files, *map(duplicate_note, skipped_files), prompt],
+            config=route.apply(
+                types.GenerateContentConfig(
+                    temperature=0.0,
+                    seed=42,
+                    response_mime_type="application/json",
+                    response_json_schema=claim_reason_schema,
+                )
+            ),
+            span=span,
+            attributes={"stage": "extract_claim_reason"},
+        )
+        if not response.text:
+            msg = "Failed to extract the claim reason, the model returned no text"
+            raise RuntimeError(msg)
+
+        claim_reason = json.loads(response.text)
+        claim_type = claim_reason.get("claim_type")
+        claim_reason_type = claim_reason.get("claim_reason_type")
+        if claim_reason_type not in travel_guard_required_files.get(claim_type, {}):
+            msg = (
+                f"No required documents for claim type {claim_type!r} and reason {claim_reason_type!r}, "
+                f"expected one of {sorted(travel_guard_required_files)} and its reasons"
+            )
+            raise ValueError(msg)
+        return claim_reason
+
+
 def _nullify_structure(value: Any) -> Any:
     """Recursively replace leaf values with None, preserving dict/list shape."""
     if isinstance(value, dict):
@@ -393,14 +511,14 @@ def override_sections_with_none(
 
 async def handle_missing(
     attachments: Sequence[m.RequestAttachment],
+    attachment_store: AttachmentStore,
     missing_list: list[dict],
     user_id: str,
     email: str,
     session_id: str,
-    model_name: str = "gemini-2.5-pro",
+    model_name: str | None = None,
+    text_first: bool | None = None,
 ) -> dict[str, Any]:
-    from agentric.lib.utils import read_minio_file
-
     with tracer.start_as_current_span("claim_extraction") as span:
 
         span.set_attribute("function.name", "handle_missing")
@@ -408,113 +526,39 @@ async def handle_missing(
         span.set_attribute("user.email", email)
         span.set_attribute("session.id", session_id)
 
-        client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-
-        uploaded_files = []
-        failed_files = []
-
         prompt = f"""
         - You are a Claim Adjuster AI Agent Assisting Claim Handler who is working for an Insurance company. You've found out that required filed are missing.
-         According to the data {missing_list}  explain which files are missing files and their reasons to Claims Handler. Be short and consise.
-        - Then from remaining files , Include Extracted Structured data in STRICTLY CORRECT JSON format in below <script> tag.
-        Fill Structured JSON EXTRACTION RESULT BELOW in Valid JSON Values. Avoid Markdown inside. DO NOT PUT ANY EXTRA TEXT , JUST JSON.
-
-        <script language="json">
-        {{
-        "policy_data" : {{}},
-        "claims_data" : {{}}
-        }}
-        </script>
+         According to the data {missing_list}  explain which files are missing files and their reasons to Claims Handler in "decision". Be short and consise.
+        - Then from remaining files, include the Extracted Structured data in "extracted".
+        {CLAIM_RECORD_INSTRUCTIONS}
+        - `status`: 'MISSING'.
+        - `missing_documents`: the documents required by the policy for approval that are not present
+          (e.g., "Physician's report certifying the injury").
         """
-        for attachment in attachments:
-            # Detect mime type (fallback to octet-stream if unknown)
-            mime_type, _ = mimetypes.guess_type(attachment.file_name)
-            if mime_type is None:
-                mime_type = "application/octet-stream"
-
-            try:
-                content_bytes = await read_minio_file(attachment.url)
-                file_bytes = io.BytesIO(content_bytes)
-                uploaded = client.files.upload(
-                    file=file_bytes, config={"mime_type": mime_type}
-                )
-                uploaded_files.append(uploaded)
-            except Exception as e:
-                failed_files.append(
-                    {"filename": str(attachment.file_name), "reason": str(e)}
-                )
-
-        if failed_files:
-            logger.debug("⚠️ Some files could not be uploaded")
-            logger.debug(failed_files)
-        if not uploaded_files:
-            msg = "No files are uploaded!"
-            raise RuntimeError(msg)
-        response = client.models.generate_content(
-            model=model_name,
-            contents=[*uploaded_files, prompt],
-            config=genai.types.GenerateContentConfig(
-                thinking_config=genai.types.ThinkingConfig(include_thoughts=True),
-                temperature=0,
-            ),
+        return await _analyze_claim(
+            stage="handle_missing",
+            prompt=prompt,
+            attachments=attachments,
+            attachment_store=attachment_store,
+            model_name=model_name,
+            text_first=text_first,
+            span=span,
         )
 
-        thoughts = ""
-        results = ""
-        assert response.candidates is not None
-
-        content = response.candidates[0].content
-
-        assert content is not None
-        assert content.parts is not None
-
-        input_tokens = response.usage_metadata.prompt_token_count or 0  # type: ignore
-        output_tokens = response.usage_metadata.candidates_token_count or 0  # type: ignore
-        total_tokens = response.usage_metadata.total_token_count or 0  # type: ignore
-
-        span.set_attribute("genai.request_token_usage", input_tokens)
-        span.set_attribute("genai.response_token_usage", output_tokens)
-        span.set_attribute("genai.total_token_usage", total_tokens)
-        span.set_attribute("genai.model", model_name)
-
-        for part in content.parts:
-            if not part.text:
-                continue
-            if hasattr(part, "thought") and part.thought:
-                thoughts += part.text
-            else:
-                results += part.text
-        logger.info("Stage 1: Finished data extraction from claim form")
-        logger.info(thoughts)
-        logger.info(results)
-        extracted = {}
-        soup = BeautifulSoup(results, "html.parser")
-
-        # Find the <extraction> tag
-        extraction_tag = soup.find("script")
-        if extraction_tag:
-            try:
-                extracted = json.loads(extraction_tag.get_text(strip=True))
-                extraction_tag.decompose()
-                results = soup.get_text()
-            except:
-                extracted = {}
-
-        return {"decision": results, "thoughts": thoughts, "extracted": extracted}
-
 
 async def generate_decision_summary(
     request: m.Request,
     attachments: list[m.RequestAttachment],
 ) -> str:
-    client = genai.Client(api_key=settings.app.AGENT_API_KEY)
     gen_decision = request.generated_decisions
     prompt = "Generate Decision Summary for insurance claims based upon input"
     if gen_decision:
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
+        route = model_route("generate_decision_summary")
+        response = await generate_content(
+            model=route.model,
             contents=[gen_decision, prompt],
-            config={"response_mime_type": "text/plain", "temperature": 0.0, "seed": 42},
+            config=route.apply({"response_mime_type": "text/plain", "temperature": 0.0, "seed": 42}),
+            attributes={"stage": "generate_decision_summary"},
         )
 
         return response.text or ""
@@ -539,174 +583,6 @@ async def generate_followup_question(
     return response
 
 
-async def generate_data_structure(
-    data: dict,
-    user_id: str,
-    policy_detail_file: m.RequestAttachment | None,
-    email: str,
-    session_id: str,
-    model_name: str = "gemini-2.5-pro",
-) -> dict[str, Any]:
-    from agentric.lib.utils import read_minio_file
-
-    with tracer.start_as_current_span("claim_extraction") as span:
-        span.set_attribute("function.name", "generate_data_structure")
-        span.set_attribute("user.id", user_id)
-        span.set_attribute("user.email", email)
-        span.set_attribute("session.id", session_id)
-
-        schema_filename = "general_claim.json"
-        schema_text = Path("schema/" + schema_filename).read_text(encoding="utf-8")
-
-        prompt = f"""You are an expert data extraction AI specializing in insurance claims processing. Your task is to meticulously analyze the provided set of documents, which may include claim forms, receipts, and insurance policy details.
-
-        From these documents, you must extract the specified information and perform a basic analysis to populate the decision-related fields. Your output must be a single, valid JSON object that strictly conforms to the JSON schema provided below.
-
-        **Instructions:**
-        1.  **Analyze All Documents:** Carefully read through all provided input to find the required information.
-        2.  **Handle Missing Information:** If a piece of information cannot be found in the input for a specific field, use `null` as the value. Do not invent or infer data for non-analytical fields.
-        3.  **Analytical Fields:** For fields like `status`, `generated_decision_summary`, and `decision_reason`, you must perform a brief analysis based on the claim details and the policy coverage.
-            *   `status`: Determine if the claim must be one of these statuses: 'APPROVED' or 'DENIED', , based on the policy terms.
-            *   `submission_status`: If a decision can be made, set this to 'COMPLETED'. Otherwise, 'PROCESSING'.
-            *   `generated_decision_summary`: Write a concise, one or two-sentence summary explaining the outcome of the claim analysis.
-        4.  **Data Formatting:**
-            *   **Dates:** Format all dates and datetimes as ISO 8601 strings (e.g., "YYYY-MM-DD" or "YYYY-MM-DDTHH:MM:SS").
-            *   **Amounts:** Extract monetary values as strings, preserving the currency symbol if present (e.g., "$251.51").
-
-        ### Schema
-        {schema_text}
-
-        ### Analysis outcome
-        {json.dumps(data)}
-        """
-
-        client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-        uploaded = None
-        if policy_detail_file is not None:
-            content_bytes = await read_minio_file(policy_detail_file.url)
-            file_bytes = io.BytesIO(content_bytes)
-            mime_type, _ = mimetypes.guess_type(policy_detail_file.file_name)
-
-            uploaded = client.files.upload(
-                file=file_bytes, config={"mime_type": mime_type}
-            )
-
-        contents = [prompt]
-
-        if uploaded is not None:
-            contents = [uploaded, prompt]
-        response = client.models.generate_content(
-            model=model_name,
-            contents=contents,
-            config=genai.types.GenerateContentConfig(
-                thinking_config=genai.types.ThinkingConfig(),
-                temperature=1,
-                response_mime_type="application/json",
-            ),
-        )
-        um = response.usage_metadata
-
-        input_tokens = um.prompt_token_count or 0  # type: ignore
-        output_tokens = um.candidates_token_count or 0  # type: ignore
-        total_tokens = um.total_token_count or 0  # type: ignore
-
-        span.set_attribute("genai.request_token_usage", input_tokens)
-        span.set_attribute("genai.response_token_usage", output_tokens)
-        span.set_attribute("genai.total_token_usage", total_tokens)
-        span.set_attribute("genai.model", model_name)
-
-        results = ""
-        assert response.candidates is not None
-
-        content = response.candidates[0].content
-
-        assert content is not None and content.parts is not None
-        for part in content.parts:
-            if not part.text:
-                continue
-            results += part.text
-        return json.loads(results)
-
-
-async def generate_data_structure_missing_case(
-    data: dict[str, Any],
-    user_id: str,
-    email: str,
-    session_id: str,
-    missing_file_list: list,
-    model_name: str = "gemini-2.5-pro",
-) -> dict[str, Any]:
-
-    with tracer.start_as_current_span("claim_extraction") as span:
-        span.set_attribute("function.name", "generate_data_structure")
-        span.set_attribute("user.id", user_id)
-        span.set_attribute("user.email", email)
-        span.set_attribute("session.id", session_id)
-
-        schema_filename = "general_claim.json"
-        schema_text = Path("schema/" + schema_filename).read_text(encoding="utf-8")
-        prompt = f"""
-            You are an expert data extraction AI specializing in insurance claims processing. Your task is to meticulously analyze the provided set of documents, which may include claim forms, receipts, and insurance policy details.
-
-            From these documents, you must extract the specified information and perform a basic analysis to populate the decision-related fields. Your output must be a single, valid JSON object that strictly conforms to the JSON schema provided below.
-
-            **Instructions:**
-            1.  **Analyze All Documents:** Carefully read through all provided input to find the required information.
-            2.  **Handle Missing Information:** If a piece of information cannot be found in the input for a specific field, use `null` as the value. Do not invent or infer data for non-analytical fields.
-            3.  **Analytical Fields:** For fields like `status`, `generated_decision_summary`, `missing_documents`, and `decision_reason`, you must perform a brief analysis based on the claim details and the policy coverage.
-                *   `status`:  'MISSING'.
-                *   `submission_status`: If a decision can be made, set this to 'COMPLETED'. Otherwise, 'PROCESSING'.
-                *   `missing_documents`: List any documents that are required by the policy for approval but are not present (e.g., "Physician's report certifying the injury").
-                *   `generated_decision_summary`: Write a concise, one or two-sentence summary explaining the outcome of the claim analysis.
-            4.  **Data Formatting:**
-                *   **Dates:** Format all dates and datetimes as ISO 8601 strings (e.g., "YYYY-MM-DD" or "YYYY-MM-DDTHH:MM:SS").
-                *   **Amounts:** Extract monetary values as strings, preserving the currency symbol if present (e.g., "$251.51").
-
-            ### Schema
-            {schema_text}
-
-            ### Missing file list
-            {missing_file_list}
-
-            ### Analysis outcome
-            {json.dumps(data)}
-
-            """
-
-        client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-        response = client.models.generate_content(
-            model=model_name,
-            contents=[prompt],
-            config=genai.types.GenerateContentConfig(
-                thinking_config=genai.types.ThinkingConfig(),
-                temperature=1,
-                response_mime_type="application/json",
-            ),
-        )
-        um = response.usage_metadata
-
-        input_tokens = um.prompt_token_count or 0  # type: ignore
-        output_tokens = um.candidates_token_count or 0  # type: ignore
-        total_tokens = um.total_token_count or 0  # type: ignore
-
-        span.set_attribute("genai.request_token_usage", input_tokens)
-        span.set_attribute("genai.response_token_usage", output_tokens)
-        span.set_attribute("genai.total_token_usage", total_tokens)
-        span.set_attribute("genai.model", model_name)
-
-        results = ""
-        assert response.candidates is not None
-
-        content = response.candidates[0].content
-
-        assert content is not None and content.parts is not None
-        for part in content.parts:
-            if not part.text:
-                continue
-            results += part.text
-        return json.loads(results)
-
-
 async def clean_llm_output(llm_response: dict) -> dict:
     """Removes any fields from Claude's response that say 'No information found in document.'
 
@@ -943,36 +819,54 @@ async def generate_partial_payment_email_template(
     return msg
 
 
-def extract_first_two_pages(pdf_content_bytes: bytes) -> str:
+async def _preclassify(
+    attachments: list[m.RequestAttachment], attachment_store: AttachmentStore
+) -> tuple[list[s.ClassifedDocument], list[m.RequestAttachment], list[Guess], bool]:
+    """Split attachments into locally labelled ones and the ones the model has to label.
 
-    reader = PdfReader(BytesIO(pdf_content_bytes))
-    pages = min(2, len(reader.pages))
-    text = ""
-    for i in range(pages):
-        page = reader.pages[i]
-        text += (page.extract_text() or "") + "\n"
-    return " ".join(text.split())
+    An audited job sends every attachment to the model and keeps the model labels.
+    """
+    if not settings.pipeline.CLASSIFIER_ENABLED:
+        return [], attachments, [], False
+    confident, ambiguous, guesses = await preclassify(attachments, attachment_store)
+    if confident and should_audit():
+        return [], attachments, guesses, True
+    return confident, ambiguous, guesses, False
+
+
+async def _merge_classification(
+    pipeline: str,
+    confident: list[s.ClassifedDocument],
+    classified: list[s.ClassifedDocument],
+    guesses: list[Guess],
+    audit: bool,
+) -> list[s.ClassifedDocument]:
+    # only jobs that sent every file to the model give unbiased counts for all confidence buckets
+    if audit or not confident:
+        await record_classifier_outcome(pipeline, guesses, classified)
+    if audit:
+        return classified
+    return [*confident, *classified]
 
 
 async def classified_travelguard_docs(
-    attachments: list[m.RequestAttachment], model_name: str = "gemini-2.5-flash"
+    attachments: list[m.RequestAttachment],
+    attachment_store: AttachmentStore,
+    model_name: str | None = None,
 ) -> list[s.ClassifedDocument]:
-    from agentric.lib.utils import read_minio_file
+    confident, to_classify, guesses, audit = await _preclassify(attachments, attachment_store)
+    if not to_classify:
+        return confident
 
     parts = []
-    for attachment in attachments:
-        suffix = attachment.file_name.split(".")[-1]
-        content_bytes = await read_minio_file(attachment.url)
-        if suffix.lower() == ".pdf":
-            txt = extract_first_two_pages(content_bytes)
+    for attachment in to_classify:
+        # PDFs with a text layer are classified from their first pages only
+        txt = await attachment_store.first_pages_text(attachment)
+        if txt.strip():
             data = txt.encode()
             mime_type = "text/plain"
-
         else:
-            mime_type, _ = mimetypes.guess_type(attachment.file_name)
-            if mime_type is None:
-                mime_type = "application/octet-stream"
-            data = await read_minio_file(attachment.url)
+            data, mime_type = await attachment_store.model_file(attachment)
         parts.append({"text": f"[FILENAME:{attachment.file_name}]"})
         parts.append(types.Part.from_bytes(data=data, mime_type=mime_type))
 
@@ -1045,42 +939,53 @@ async def classified_travelguard_docs(
 
     Note: Each attachment is preceded by a marker like [FILENAME:example.txt]. Use that exact filename in the output.
     """.strip()
-    client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-    resp = client.models.generate_content(
-        model="gemini-2.5-flash",
+    route = model_route("classified_travelguard_docs", "travelguard")
+    resp = await generate_content(
+        model=model_name or route.model,
         contents=[{"role": "user", "parts": [{"text": system_prompt}, *parts]}],
-        config=types.GenerateContentConfig(
-            temperature=0.0,
-            seed=42,
-            response_mime_type="application/json",
+        config=route.apply(
+            types.GenerateContentConfig(
+                temperature=0.0,
+                seed=42,
+                response_mime_type="application/json",
+            )
         ),
+        attributes={"stage": "classified_travelguard_docs"},
     )
     if resp.text is None:
         logger.exception("Empty response from classify_travelguard_files")
-        return []
+        return confident
     try:
         parsed = json.loads(resp.text)
         logger.info("Classified files: ☀️")
         logger.info(parsed)
-        return [s.ClassifedDocument(**classified_doc) for classified_doc in parsed]
+        classified = [s.ClassifedDocument(**classified_doc) for classified_doc in parsed]
     except Exception:
         logger.exception("⚠️ Could not parse JSON. Raw response:\n")
         logger.exception(resp.text)
-        return []
+        return confident
+    return await _merge_classification("travelguard", confident, classified, guesses, audit)
 
 
 async def classified_covermore_docs(
     attachments: list[m.RequestAttachment],
+    attachment_store: AttachmentStore,
+    model_name: str | None = None,
 ) -> list[s.ClassifedDocument]:
-    from agentric.lib.utils import read_minio_file
+    confident, to_classify, guesses, audit = await _preclassify(
+        [
+            attachment
+            for attachment in attachments
+            if attachment_store.mime_type(attachment) == "application/pdf"
+        ],
+        attachment_store,
+    )
+    if not to_classify:
+        return confident
 
     pdf_texts = []
-    for attachment in attachments:
-        cotent_bytes = await read_minio_file(attachment.url)
-        mime_type, _ = mimetypes.guess_type(attachment.file_name)
-        if mime_type != "application/pdf":
-            continue
-        text = extract_first_two_pages(cotent_bytes)
+    for attachment in to_classify:
+        text = await attachment_store.first_pages_text(attachment)
         pdf_texts.append(f"{attachment.file_name}: {text}")
 
     system_prompt = f"""
@@ -1155,15 +1060,18 @@ async def classified_covermore_docs(
     {chr(10).join(pdf_texts)}
     """
 
-    client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-    resp = client.models.generate_content(
-        model="gemini-2.5-pro",
+    route = model_route("classified_covermore_docs", "covermore")
+    resp = await generate_content(
+        model=model_name or route.model,
         contents=[{"role": "user", "parts": [{"text": system_prompt}]}],
-        config=types.GenerateContentConfig(
-            temperature=0.0,
-            seed=42,
-            response_mime_type="application/json",
+        config=route.apply(
+            types.GenerateContentConfig(
+                temperature=0.0,
+                seed=42,
+                response_mime_type="application/json",
+            )
         ),
+        attributes={"stage": "classified_covermore_docs"},
     )
     if resp is None or resp.text is None:
         msg = "⚠️ Could not generate response."
@@ -1177,14 +1085,16 @@ async def classified_covermore_docs(
     except Exception:
         logger.exception("⚠️ Could not parse JSON. Raw response:\n")
         logger.info(resp.text)
-    return data
+    return await _merge_classification("covermore", confident, data, guesses, audit)
 
 
 async def check_missing_travelguard_documents(
-    attachments: list[m.RequestAttachment], check_file_list: list[str]
+    attachments: list[m.RequestAttachment],
+    check_file_list: list[str],
+    attachment_store: AttachmentStore,
+    text_first: bool | None = None,
+    model_name: str | None = None,
 ) -> tuple[s.MissingCheckOutcome, str]:
-    from agentric.lib.utils import read_minio_file
-
     system_prompt = """
     You are an insurance document checker.
 
@@ -1237,32 +1147,29 @@ async def check_missing_travelguard_documents(
         "{req_files}", json.dumps(check_file_list, ensure_ascii=False, indent=2)
     )
 
-    client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-
-    uploaded_files = []
-    for attachment in attachments:
-
-        mime_type, _ = mimetypes.guess_type(attachment.file_name)
-        mime_type = mime_type or "application/octet-stream"
-        content_bytes = await read_minio_file(attachment.url)
-        uploaded = client.files.upload(
-            file=io.BytesIO(content_bytes),
-            config={"mime_type": mime_type},
-        )
-        uploaded_files.append(uploaded)
+    model_contents = await attachment_store.model_contents(
+        attachments, text_first=_text_first("check_missing_travelguard_documents", text_first)
+    )
+    if model_contents.failed:
+        msg = f"Failed to upload files: {model_contents.failed}"
+        raise RuntimeError(msg)
 
-    if not uploaded_files:
+    if not model_contents.parts:
         raise RuntimeError("No files uploaded")
 
-    response = client.models.generate_content(
-        model="gemini-2.5-pro",
-        contents=[*uploaded_files, system_prompt],
-        config=types.GenerateContentConfig(
-            temperature=0.0,
-            seed=42,
-            response_mime_type="application/json",
-            thinking_config=types.ThinkingConfig(include_thoughts=True),
+    route = model_route("check_missing_travelguard_documents", "travelguard")
+    response = await generate_content(
+        model=model_name or route.model,
+        contents=[*model_contents.parts, system_prompt],
+        config=route.apply(
+            types.GenerateContentConfig(
+                temperature=0.0,
+                seed=42,
+                response_mime_type="application/json",
+                thinking_config=types.ThinkingConfig(include_thoughts=True),
+            )
         ),
+        attributes={"stage": "check_missing_travelguard_documents", "mode": model_contents.mode},
     )
     if response is None or response.text is None:
         raise Exception("⚠️ Could not generate response.")
@@ -1292,233 +1199,151 @@ async def check_missing_travelguard_documents(
         raise ValueError(response.text)
 
 
-async def check_missing_covermore_documents(
-    attachments: list[m.RequestAttachment],
-) -> dict[str, Any]:
-    from agentric.lib.utils import read_minio_file
-
-    req_files = json.dumps(cover_more_document_check)
-    system_prompt = """
-    You are an insurance claim triage assistant.
-
-    You will receive:
-    - Multiple attached claim-related files (any format).
-    - REQUIRED_DOCS: JSON mapping categories to a list of required document names (strings).
-
-    Your task:
-    1) Read the attached files (content-based, not just filenames).
-    2) For EACH category in REQUIRED_DOCS, and for EACH document item (string) in that category's list,
-    decide whether the document is present or missing across the provided files:
-    - missing = true  → no attached file clearly satisfies that document item
-    - missing = false → at least one attached file clearly satisfies that document item
-    3) Provide a short one-sentence "reason" for each item explaining your decision
-    (e.g., "found itinerary with flight and hotel details" or "no medical report or diagnosis document detected").
-
-    STRICT OUTPUT (MUST be valid JSON; no prose, no markdown, no extra keys):
-    {
-    "result": {
-        "missing_by_category": {
-        "<Category 1>": {
-            "<Document Item A>": { "missing": true,  "reason": "<short explanation>" },
-            "<Document Item B>": { "missing": false, "reason": "<short explanation>" }
-        },
-        "<Category 2>": {
-            "<Document Item C>": { "missing": true,  "reason": "<short explanation>" }
-        }
-        // Include EVERY document item from REQUIRED_DOCS for EVERY category — no more, no less.
-        }
-    }
-    }
-
-    Rules:
-    - You MUST include all categories and all document items exactly as listed in REQUIRED_DOCS.
-    - "missing" must be a boolean; "reason" must be a short sentence.
-    - Do NOT invent categories or document items.
-    - Output ONLY the JSON object above (no additional fields).
-
-    REQUIRED_DOCS:
-    <json>
-    {{req_files}}
-    </json>
-    """.replace(
-        "{req_files}", req_files
-    )
-
-    client = genai.Client(api_key=settings.app.AGENT_API_KEY)
-
-    uploaded_files = []
-    for attachment in attachments:
-
-        mime_type, _ = mimetypes.guess_type(attachment.file_name)
-        mime_type = mime_type or "application/octet-stream"
-        content_bytes = await read_minio_file(attachment.url)
-        uploaded = client.files.upload(
-            file=io.BytesIO(content_bytes),
-            config={"mime_type": mime_type},
-        )
-        uploaded_files.append(uploaded)
-
-    if not uploaded_files:
-        raise RuntimeError("No files uploaded")
-
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[{"role": "user", "parts": [{"text": system_prompt}]}],
-        config=types.GenerateContentConfig(
-            temperature=0.0,
-            seed=42,
-            response_mime_type="application/json",
-        ),
-    )
-    if response is None or response.text is None:
-        raise Exception("⚠️ Could not generate response.")
-
-    try:
-        return json.loads(response.text)
-
-    except Exception:
-        logger.error("⚠️ Could not parse JSON. Raw response:\n")
-        raise ValueError(response.text)
-
-
-def extract_missing_documents(data: dict[str, Any]) -> list[dict[str, s.MissingStatus]]:
-    """Extract all missing documents from nested claim data."""
-    results: list[dict[str, s.MissingStatus]] = []
-
-    missing_by_category = data.get("result", {}).get("missing_by_category", {})
-
-    for category_name, documents in missing_by_category.items():
-        for doc_name, doc_info in documents.items():
-            if doc_info.get("missing") is not None:
-                results.append(
-                    {
-                        doc_name: s.MissingStatus(
-                            missing=doc_info["missing"], reason=doc_info["reason"]
-                        )
-                    }
-                )
-    return results
-
-
-async def mapped_missing_case_covermore(
-    attachments: list[m.RequestAttachment], required_files: dict
-) -> list[dict[str, s.MissingStatus]]:
-    from agentric.lib.utils import read_minio_file
+COVERMORE_LETTER_OF_EXPLANATION = "Letter of explanation (if required documents are missing)"
 
-    system_prompt = """
+COVERMORE_DOCUMENT_CHECK_PROMPT = """
     You are an Insurance Evidence Auditor.
 
     INPUTS YOU WILL RECEIVE
-    1) <files>: a set of attached user files (PDFs, images, emails/EML, markdown, spreadsheets, etc.).
-    2) <incoming_requirements>: a JSON object that already contains categories and evidence items with provisional
-    {missing:boolean, reason:string} values. Treat this as the REQUIREMENTS SET to be verified and pruned.
+    1) The attached user files (PDFs, images, emails/EML, markdown, spreadsheets, etc.).
+    2) <required_docs>: a JSON object mapping categories to the evidence items that may be required.
 
     YOUR GOALS
-    - Determine which requirement items actually apply to THIS case based on the files.
-    - Keep only applicable categories/items; remove all non-applicable items. If a category becomes empty, remove the category.
-    - For every kept item, verify presence in the files and set:
-    - "missing": true | false
-    - "reason": 1–2 factual sentences that reference the specific supporting file(s) (filename, page, brief quote/date) or explain what is absent.
-    - Do not rely on the provisional values in <incoming_requirements>; re-evaluate from the files.
+    For EVERY category and EVERY item in <required_docs>, exactly as listed:
+    - "applicable": whether the item pertains to THIS case, based on the files.
+    - "missing": true if no attached file clearly satisfies the item, false if at least one does.
+    - "reason": 1-2 factual sentences that reference the specific supporting file(s) (filename, page, brief quote/date)
+    or explain what is absent.
 
     APPLICABILITY RULES
-    - Keep an item only if it logically pertains to THIS case (e.g., dental-only items are not applicable for a fractured arm; cruise-only items are not applicable to a flight/hotel trip; domestic-flight items not applicable to international trips, etc.).
+    - An item applies only if it logically pertains to THIS case (e.g., dental-only items are not applicable for a fractured arm; cruise-only items are not applicable to a flight/hotel trip; domestic-flight items not applicable to international trips, etc.).
     - Prefer explicit evidence in files (claim form, medical notes, receipts, cancellation emails, itineraries, policies, etc.).
-    - If the files clearly show the case context (e.g., health-related additional expenses), keep only those items relevant to that context.
-    - If unsure about applicability, keep the item and mark "missing" based on evidence check.
+    - If the files clearly show the case context (e.g., health-related additional expenses), only the items relevant to that context apply.
+    - If unsure about applicability, set applicable=true and set "missing" based on the evidence check.
+    - Items whose text includes a condition (e.g., "(if due to health)", "(for domestic flights)", "(for cruises)") apply only when the condition holds for the case.
+    - "Letter of explanation (if required documents are missing)" always applies; "missing" tells whether such a letter is attached.
 
     EVIDENCE MATCHING RULES
     - Accept reasonable naming/format variants (e.g., "itinerary", "booking confirmation", "travel summary").
     - A partial but sufficient document counts as present (e.g., confirmation email without letterhead).
     - Only cite files that truly exist. Quote short phrases only when necessary.
     - For page references, state the exact page number (1-based) only if you verified it.
-
-    SPECIAL RULE: CONDITIONAL ITEMS (CASE-WIDE)
-    - For items whose text includes a condition (e.g., "(if required documents are missing)", "(if due to health)", "(for domestic flights)", "(for cruises)"):
-    1) Evaluate the condition ACROSS THE ENTIRE CASE (all categories), unless the item explicitly limits scope.
-    2) For “Letter of explanation (if required documents are missing)”:
-        - If NO other evidence item ANYWHERE in the case is missing → set missing=false and reason="All required documents were provided; a letter of explanation is not required."
-        - If ANY other evidence item anywhere in the case is missing and no letter is found → set missing=true with a clear absence reason.
-        - If ANY other item is missing and a letter is found → set missing=false and cite the file that contains the letter.
-
-    STRICT OUTPUT RULES
-    - Output ONLY valid JSON. No extra text, no comments, no trailing commas.
-    - Preserve the same high-level shape as the input (result → missing_by_category → {Category} → {Item}).
-    - Include only the KEPT categories/items (pruned result).
     - Do not invent filenames or facts.
 
-    VALIDATION (MUST DO BEFORE OUTPUT)
-    - Compute missing_count_casewide = total number of items with missing=true ACROSS ALL CATEGORIES, excluding any item whose name contains "Letter of explanation (if required documents are missing)".
-    - If missing_count_casewide == 0:
-    - For every “Letter of explanation (if required documents are missing)” item: set missing=false and reason="All required documents were provided; a letter of explanation is not required."
-    - If missing_count_casewide > 0:
-    - For every such “Letter of explanation” item with no found letter evidence: set missing=true with a concise absence reason.
+    <required_docs>
+    {REQUIRED_DOCS}
+    </required_docs>
+    """.replace(
+    "{REQUIRED_DOCS}", json.dumps(cover_more_document_check, ensure_ascii=False, indent=2)
+)
+"""Static instructions of the Cover-More missing document check."""
 
-    OUTPUT SHAPE
-    {
-    "result": {
-        "missing_by_category": {
-        "<Kept Category>": {
-            "<Kept Item>": {
-            "missing": true|false,
-            "reason": "<concise factual justification with file references, or why absent/not required>"
-            }
-        }
-        }
+
+@lru_cache(maxsize=1)
+def covermore_document_check_schema() -> dict[str, Any]:
+    """Response schema of the Cover-More missing document check.
+
+    Every category and item of ``cover_more_document_check`` is a required property, so
+    the model evaluates each of them exactly once.
+    """
+    verdict = {
+        "type": "object",
+        "properties": {
+            "applicable": {"type": "boolean"},
+            "missing": {"type": "boolean"},
+            "reason": {"type": "string"},
+        },
+        "required": ["applicable", "missing", "reason"],
     }
+    return {
+        "type": "object",
+        "properties": {
+            category: {
+                "type": "object",
+                "properties": {item: verdict for item in items},
+                "required": list(items),
+            }
+            for category, items in cover_more_document_check.items()
+        },
+        "required": list(cover_more_document_check),
     }
 
-    BEGIN.
 
-    <incoming_requirements>
-    {{INCOMING_REQUIREMENTS_JSON}}
-    </incoming_requirements>
+def prune_covermore_document_check(result: dict[str, Any]) -> list[dict[str, s.MissingStatus]]:
+    """Keep the applicable items of a Cover-More document check, in ``cover_more_document_check`` order.
 
-    <files>
-    Read and analyze ALL provided files. Use their contents to determine applicability, presence/absence, and case-wide conditional requirements.
-    </files>
-    """.replace(
-        "{{INCOMING_REQUIREMENTS_JSON}}", json.dumps(required_files, ensure_ascii=False)
+    The letter of explanation is only required when another kept item is missing.
+    """
+    kept = [
+        (item, result[category][item])
+        for category, items in cover_more_document_check.items()
+        for item in items
+        if item in result.get(category, {})
+        and (result[category][item]["applicable"] or item == COVERMORE_LETTER_OF_EXPLANATION)
+    ]
+    any_missing = any(
+        verdict["missing"] for item, verdict in kept if item != COVERMORE_LETTER_OF_EXPLANATION
     )
+    outcome: list[dict[str, s.MissingStatus]] = []
+    for item, verdict in kept:
+        if item == COVERMORE_LETTER_OF_EXPLANATION and not any_missing:
+            status = s.MissingStatus(
+                missing=False,
+                reason="All required documents were provided; a letter of explanation is not required.",
+            )
+        else:
+            status = s.MissingStatus(missing=verdict["missing"], reason=verdict["reason"])
+        outcome.append({item: status})
+    return outcome
 
-    client = genai.Client(api_key=settings.app.AGENT_API_KEY)
 
-    uploaded_files = []
-    for attachment in attachments:
+async def check_missing_covermore_documents(
+    attachments: list[m.RequestAttachment],
+    attachment_store: AttachmentStore,
+    model_name: str | None = None,
+    text_first: bool | None = None,
+) -> list[dict[str, s.MissingStatus]]:
+    """Check the attachments of a Cover-More claim against ``cover_more_document_check``.
 
-        mime_type, _ = mimetypes.guess_type(attachment.file_name)
-        mime_type = mime_type or "application/octet-stream"
-        content_bytes = await read_minio_file(attachment.url)
-        uploaded = client.files.upload(
-            file=io.BytesIO(content_bytes),
-            config={"mime_type": mime_type},
-        )
-        uploaded_files.append(uploaded)
+    One structured call decides the applicability and presence of every item, items that
+    do not apply to the case are then dropped by :func:`prune_covermore_document_check`.
+
+    Returns:
+        list: A ``{item: MissingStatus}`` entry per applicable item.
+    """
+    model_contents = await attachment_store.model_contents(
+        attachments, text_first=_text_first("check_missing_covermore_documents", text_first)
+    )
+    if model_contents.failed:
+        msg = f"Failed to upload files: {model_contents.failed}"
+        raise RuntimeError(msg)
 
-    if not uploaded_files:
+    if not model_contents.parts:
         raise RuntimeError("No files uploaded")
-    response = client.models.generate_content(
-        model="gemini-2.5-pro",
-        contents=uploaded_files + [system_prompt],
-        config=types.GenerateContentConfig(
-            temperature=0.0,
-            seed=42,
-            response_mime_type="application/json",
+
+    route = model_route("check_missing_covermore_documents", "covermore")
+    response = await generate_content_with_prefix(
+        model=model_name or route.model,
+        prefix=COVERMORE_DOCUMENT_CHECK_PROMPT,
+        contents=[*model_contents.parts, "Check the attached files against the required documents."],
+        config=route.apply(
+            types.GenerateContentConfig(
+                temperature=0.0,
+                seed=42,
+                response_mime_type="application/json",
+                response_json_schema=covermore_document_check_schema(),
+            )
         ),
+        attributes={"stage": "check_missing_covermore_documents", "mode": model_contents.mode},
     )
+    if not response.text:
+        raise RuntimeError("Failed to check missing documents for Covermore claims")
+    return prune_covermore_document_check(json.loads(response.text))
 
-    raw = response.text
-    if not raw:
-        raise RuntimeError("Failed to mapped missing case for Covermore claims")
-    result = json.loads(raw)
-    return extract_missing_documents(result)
 
+async def convert_docx_bytes_to_pdf_bytes(byte_content: bytes) -> bytes:
 
-def convert_docx_bytes_to_pdf_bytes(byte_content: bytes) -> bytes:
-
-    with io.BytesIO(byte_content) as byte_stream:
-        html_result = mammoth.convert_to_html(byte_stream)
-        html_content = html_result.value.strip()
+    html_content = await run_in_process(docx_to_html, byte_content)
 
     # Wrap in full HTML structure (for WeasyPrint)
     full_html = f"""
@@ -1555,13 +1380,19 @@ async def evaluate_claim_status(
     extracted_data: dict[str, Any],
     evidences: list[m.RequestAttachment],
     full_policy: m.RequestAttachment,
+    attachment_store: AttachmentStore,
     user_id: str,
     email: str,
     session_id: str,
-    model_name: str = "gemini-2.5-flash",
+    model_name: str | None = None,
+    policy_excerpt: str | None = None,
 ) -> tuple[dict[str, Any], str]:
-    from agentric.lib.utils import read_minio_file
+    """Decide a TravelGuard claim against the full policy.
 
+    ``policy_excerpt`` holds the sections of the full policy relevant to the claim (see
+    :mod:`agentric.domain.requests.policy_library`). When given, it is sent as text and
+    the full policy file is not uploaded.
+    """
     with tracer.start_as_current_span("claim_extraction") as span:
 
         span.set_attribute("function.name", "handle_claims")
@@ -1569,7 +1400,6 @@ async def evaluate_claim_status(
         span.set_attribute("user.email", email)
         span.set_attribute("session.id", session_id)
 
-        client = genai.Client(api_key=settings.app.AGENT_API_KEY)
         schema_text = Path("schema/claim_decision.json").read_text(encoding="utf-8")
         policy_data = extracted_data["policy_data"]
         claim_data = extracted_data["claim_data"]
@@ -1582,17 +1412,7 @@ async def evaluate_claim_status(
         2) claim_data — structured claim details.
         3) hotel_data — extracted lodging and trip delay information.
 
-        <policy_data>
-        {{POLICY_DATA}}
-        </policy_data>
-
-        <claim_data>
-        {{CLAIM_DATA}}
-        </claim_data>
-
-        <hotel_data>
-        {{HOTEL_DATA}}
-        </hotel_data>
+        The JSON objects follow the attached files, wrapped in <policy_data>, <claim_data> and <hotel_data> tags.
 
         ROLE
         You are a Travel Guard Claim Decision AI. Among the attached files, IDENTIFY the ONE file that is the full Travel Guard policy wording (authoritative source). Other attached files are evidences (e.g., medical reports, receipts, invoices, correspondence). Use the JSONs for facts and return ONE JSON that validates against the schema.
@@ -1609,6 +1429,11 @@ async def evaluate_claim_status(
         • Mentions of unrelated insurers/brands (e.g., AIG, Allianz, AXA, Chubb, Generali, FWD, World Nomads)
         • File is a claim form, itinerary, email, invoice, receipt, or medical report (not policy wording)
         • Lacks policy-type sections (definitions, benefits, exclusions, claims process)
+        - When a <policy_wording> block follows the attached files, it holds the sections of the policy file that are relevant
+        to this claim, not the whole file. Treat it as the policy file: validate it, and read coverages, limits and exclusions
+        from it. Validate it by its issuer and product names and by the sections it does contain, a section that is not in the
+        excerpt is NOT a negative indicator. It counts as a valid policy document for the DECISION GATE unless a negative
+        indicator above is found in it.
 
         DECISION GATE (FILE VALIDATION):
         - If NO attached file is a valid Travel Guard policy document:
@@ -1729,58 +1554,50 @@ async def evaluate_claim_status(
         """.replace(
                 "{{JSON_SCHEMA}}", schema_text
             )
-            .replace("{{POLICY_DATA}}", json.dumps(policy_data))
-            .replace("{{CLAIM_DATA}}", json.dumps(claim_data))
-            .replace("{{HOTEL_DATA}}", json.dumps(hotel_data))
+        )
+        claim_facts = (
+            f"<policy_data>\n{json.dumps(policy_data)}\n</policy_data>\n\n"
+            f"<claim_data>\n{json.dumps(claim_data)}\n</claim_data>\n\n"
+            f"<hotel_data>\n{json.dumps(hotel_data)}\n</hotel_data>"
         )
 
-        uploaded_files = []
-        logger.info("Uploading Evidence files...")
-        for evidence in evidences:
-            logger.info(evidence.file_name)
-            mime_type, _ = mimetypes.guess_type(evidence.file_name)
-
-            content_bytes = await read_minio_file(evidence.url)
-            uploaded = client.files.upload(
-                file=io.BytesIO(content_bytes),
-                config={"mime_type": mime_type},
-            )
-            uploaded_files.append(uploaded)
-
-        full_policy_content_bytes = await read_minio_file(full_policy.url)
-
-        mimetype, _ = mimetypes.guess_type(full_policy.file_name)
-        full_policy_file = client.files.upload(
-            file=io.BytesIO(full_policy_content_bytes),
-            config={"mime_type": mimetype},
+        logger.info(
+            "Uploading Evidence files...",
+            files=[evidence.file_name for evidence in evidences],
         )
-        uploaded_files.append(full_policy_file)
+        # the full policy is uploaded last so it stays the final file part
+        uploaded_files, failed_files, skipped_files = await attachment_store.upload_all(
+            evidences if policy_excerpt is not None else [*evidences, full_policy]
+        )
+        if policy_excerpt is not None:
+            claim_facts = f"{policy_excerpt}\n\n{claim_facts}"
+        if failed_files:
+            msg = f"Failed to upload files: {failed_files}"
+            raise RuntimeError(msg)
         parsed = {}
         thought = ""
         try:
 
-            response = client.models.generate_content(
-                model=model_name,
+            route = model_route("evaluate_claim_status", "travelguard")
+            response = await generate_content_with_prefix(
+                model=model_name or route.model,
+                prefix=prompt,
                 contents=[
                     *uploaded_files,
-                    prompt,
+                    *map(duplicate_note, skipped_files),
+                    claim_facts,
                 ],  # Attachment full policy file + evidence
-                config=types.GenerateContentConfig(
-                    temperature=0.0,
-                    seed=42,
-                    response_mime_type="application/json",
-                    thinking_config=types.ThinkingConfig(include_thoughts=True),
+                config=route.apply(
+                    types.GenerateContentConfig(
+                        temperature=0.0,
+                        seed=42,
+                        response_mime_type="application/json",
+                        thinking_config=types.ThinkingConfig(include_thoughts=True),
+                    )
                 ),
+                span=span,
+                attributes={"stage": "evaluate_claim_status"},
             )
-            um = response.usage_metadata
-            input_tokens = um.prompt_token_count or 0  # type: ignore
-            output_tokens = um.candidates_token_count or 0  # type: ignore
-            total_tokens = um.total_token_count or 0  # type: ignore
-
-            span.set_attribute("genai.request_token_usage", input_tokens)
-            span.set_attribute("genai.response_token_usage", output_tokens)
-            span.set_attribute("genai.total_token_usage", total_tokens)
-            span.set_attribute("genai.model", model_name)
             result = response.text or "{}"
             parsed = json.loads(result)
             thoughts = []
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+__all__ = ("gather_bounded",)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def gather_bounded(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    *,
+    limit: int,
+) -> list[R | Exception]:
+    """Run ``func`` over ``items`` concurrently with at most ``limit`` calls in flight.
+
+    Args:
+        func: Coroutine function applied to every item
+        items: Items to process
+        limit (int): Maximum number of concurrent calls
+
+    Returns:
+        list: One result per item, in input order. A call that raised is represented
+        by its exception instead of aborting the other calls.
+    """
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def _bounded(item: T) -> R:
+        async with semaphore:
+            return await func(item)
+
+    results = await asyncio.gather(*(_bounded(item) for item in items), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result
+    return results  # type: ignore[return-value]
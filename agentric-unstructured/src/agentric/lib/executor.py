@@ -0,0 +1,130 @@
+"""Shared process pool for CPU bound work.
+
+PDF text extraction, DOCX conversion and HTML parsing hold the GIL for as long as the
+document takes, which stalls every other request or job on the event loop. They run in
+a bounded pool of parser processes instead. Every process has an address space limit,
+is replaced after ``MAX_TASKS_PER_CHILD`` tasks, and a task that exceeds its timeout
+gets the whole pool recycled so the runaway process is killed.
+
+Functions sent to the pool must be importable without side effects, see
+:mod:`agentric.lib.parsing`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import structlog
+
+from agentric.config.base import get_settings
+from agentric.lib.exceptions import ApplicationError
+from agentric.lib.parsing import limit_memory
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+__all__ = (
+    "ExecutorTimeoutError",
+    "run_in_process",
+    "shutdown_process_pool",
+)
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class ExecutorTimeoutError(ApplicationError):
+    """A task sent to the process pool did not finish in time."""
+
+
+class _ProcessPool:
+    def __init__(self) -> None:
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.executor.MAX_WORKERS,
+                    # fork is unsafe with running event loops and threads
+                    mp_context=multiprocessing.get_context("spawn"),
+                    # spawned processes import the initializer's module, which must not load the app config
+                    initializer=limit_memory,
+                    initargs=(settings.executor.MEMORY_LIMIT,),
+                    max_tasks_per_child=settings.executor.MAX_TASKS_PER_CHILD or None,
+                )
+            return self._executor
+
+    def recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Replace ``executor`` and kill its processes, including a stuck one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.kill()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = _ProcessPool()
+
+
+async def run_in_process(
+    func: Callable[..., T],
+    *args: Any,
+    timeout: float | None = None,
+    **kwargs: Any,
+) -> T:
+    """Run ``func(*args, **kwargs)`` in the shared process pool.
+
+    Args:
+        func: Module level function, it is pickled by reference
+        timeout (float): Seconds to wait, defaults to ``EXECUTOR_TIMEOUT``
+
+    Raises:
+        ExecutorTimeoutError: When the task does not finish in time.
+        BrokenProcessPool: When the pool died twice in a row, e.g. from the memory limit.
+
+    Returns:
+        The return value of ``func``.
+    """
+    loop = asyncio.get_running_loop()
+    timeout = timeout or settings.executor.TIMEOUT
+    call = partial(func, *args, **kwargs)
+    for attempt in range(2):
+        executor = _pool.get()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(executor, call), timeout)
+        except TimeoutError as e:
+            logger.warning("Process pool task timed out", function=func.__qualname__, timeout=timeout)
+            _pool.recycle(executor)
+            msg = f"{func.__qualname__} did not finish within {timeout} seconds"
+            raise ExecutorTimeoutError(msg) from e
+        except BrokenProcessPool:
+            # a process was killed (memory limit or another task's timeout), retry once on a new pool
+            logger.warning("Process pool broken", function=func.__qualname__, attempt=attempt)
+            _pool.recycle(executor)
+            if attempt:
+                raise
+    msg = "unreachable"
+    raise AssertionError(msg)
+
+
+async def shutdown_process_pool(*_: Any) -> None:
+    """Stop the parser processes. Usable as Litestar and SAQ shutdown hook."""
+    await asyncio.to_thread(_pool.shutdown)
@@ -0,0 +1,265 @@
+"""CPU bound document parsing run in the process pool of :mod:`agentric.lib.executor`.
+
+This module is imported by every parser process, so it must only depend on the parsing
+libraries and never on application settings or database models.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import re
+import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import mammoth
+from PIL import Image, ImageOps
+from PyPDF2 import PageObject, PdfReader
+from PyPDF2.generic import DictionaryObject, IndirectObject
+
+__all__ = (
+    "NormalizedImage",
+    "RangedReader",
+    "docx_to_html",
+    "image_dhash",
+    "limit_memory",
+    "normalize_image",
+    "pdf_pages_text",
+    "pdf_pages_text_from_url",
+    "pdf_text",
+)
+
+
+def pdf_text(content: bytes, max_pages: int | None = None) -> str:
+    """Return the whitespace normalised text of the first ``max_pages`` pages of a PDF."""
+    reader = PdfReader(io.BytesIO(content))
+    pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+    text = ""
+    for page in pages:
+        text += (page.extract_text() or "") + "\n"
+    return " ".join(text.split())
+
+
+def pdf_pages_text(content: bytes, max_pages: int | None = None) -> list[str]:
+    """Return the raw text of the first ``max_pages`` pages of a PDF, line breaks included."""
+    reader = PdfReader(io.BytesIO(content))
+    pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+    return [page.extract_text() or "" for page in pages]
+
+
+_INHERITABLE_PAGE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+def _first_pages(reader: PdfReader, count: int) -> list[PageObject]:
+    # ``reader.pages`` resolves every page object of the document first, this walks the
+    # page tree only up to the requested pages
+    pages: list[PageObject] = []
+
+    def _walk(node: DictionaryObject, inherited: dict[str, Any], reference: IndirectObject | None) -> None:
+        if node.get("/Type", "/Pages") == "/Page":
+            page = PageObject(reader, reference)
+            page.update(node)
+            for attribute, value in inherited.items():
+                if attribute not in page:
+                    page[attribute] = value
+            pages.append(page)
+            return
+        inherited = inherited | {key: node[key] for key in _INHERITABLE_PAGE_ATTRIBUTES if key in node}
+        for kid in node.get("/Kids", []):
+            if len(pages) >= count:
+                return
+            _walk(kid.get_object(), inherited, kid if isinstance(kid, IndirectObject) else None)
+
+    _walk(reader.trailer["/Root"].get_object()["/Pages"].get_object(), {}, None)
+    return pages
+
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class RangedReader(io.RawIOBase):
+    """Read only, seekable file over HTTP range requests (e.g. a presigned object URL).
+
+    Data is fetched in aligned blocks of ``block_size`` bytes, consecutive missing blocks
+    with one request, and the last ``cache_blocks`` blocks are kept. A PDF reader only
+    pulls the trailer, the cross reference table and the objects it resolves.
+    """
+
+    def __init__(self, url: str, *, block_size: int = 64 * 1024, cache_blocks: int = 64, timeout: float = 30) -> None:
+        super().__init__()
+        self.url = url
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.timeout = timeout
+        self.fetched = 0
+        """Number of bytes downloaded so far."""
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._position = 0
+        # the first block holds the header, and the first page of linearized PDFs
+        data, self.size = self._fetch(0, block_size - 1)
+        self._store(0, data)
+
+    def _fetch(self, start: int, end: int) -> tuple[bytes, int]:
+        request = urllib.request.Request(self.url, headers={"Range": f"bytes={start}-{end}"})  # noqa: S310
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:  # noqa: S310
+            match = _CONTENT_RANGE.fullmatch(response.headers.get("Content-Range", ""))
+            if response.status != 206 or match is None:  # noqa: PLR2004
+                msg = f"Range requests are not supported, status {response.status}"
+                raise OSError(msg)
+            data = response.read()
+        self.fetched += len(data)
+        return data, int(match.group(3))
+
+    def _store(self, first: int, data: bytes) -> dict[int, bytes]:
+        blocks = {
+            first + offset // self.block_size: data[offset : offset + self.block_size]
+            for offset in range(0, len(data), self.block_size)
+        }
+        for index, block in blocks.items():
+            self._blocks[index] = block
+            self._blocks.move_to_end(index)
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return blocks
+
+    def _read_range(self, start: int, length: int) -> bytes:
+        first, last = start // self.block_size, (start + length - 1) // self.block_size
+        blocks = {index: self._blocks[index] for index in range(first, last + 1) if index in self._blocks}
+        missing = [index for index in range(first, last + 1) if index not in blocks]
+        if missing:
+            data, _ = self._fetch(missing[0] * self.block_size, (missing[-1] + 1) * self.block_size - 1)
+            blocks.update(self._store(missing[0], data))
+        for index in blocks:
+            if index in self._blocks:
+                self._blocks.move_to_end(index)
+        data = b"".join(blocks[index] for index in range(first, last + 1))
+        offset = start - first * self.block_size
+        return data[offset : offset + length]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            msg = "Negative seek position"
+            raise ValueError(msg)
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer: Any) -> int:
+        length = min(len(buffer), self.size - self._position)
+        if length <= 0:
+            return 0
+        data = self._read_range(self._position, length)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def pdf_pages_text_from_url(
+    url: str, max_pages: int, block_size: int = 64 * 1024, cache_blocks: int = 64
+) -> tuple[list[str], int, int]:
+    """Return the raw text of the first ``max_pages`` pages of a PDF read with range requests.
+
+    Returns:
+        tuple: The text of the pages, the number of bytes downloaded and the file size.
+    """
+    with RangedReader(url, block_size=block_size, cache_blocks=cache_blocks) as stream:
+        reader = PdfReader(stream)
+        pages = [page.extract_text() or "" for page in _first_pages(reader, max_pages)]
+        return pages, stream.fetched, stream.size
+
+
+@dataclass(frozen=True)
+class NormalizedImage:
+    """An image re-encoded by :func:`normalize_image`."""
+
+    content: bytes
+    mime_type: str
+    width: int
+    height: int
+    dhash: int
+    """64 bit difference hash of the image, equal for similar looking pictures."""
+    pixels_sha256: str
+    """sha256 of the mode, size and pixels of the image, equal only for exact copies."""
+
+
+def image_dhash(image: Image.Image) -> int:
+    """Return the 64 bit difference hash of an image.
+
+    The image is reduced to 9x8 grey pixels and every bit tells whether a pixel is
+    brighter than its right neighbour, so re-encoded, resized and metadata stripped copies
+    of a picture get the same hash. Different pictures with the same layout (receipts or
+    boarding passes from one template) can get it too.
+    """
+    pixels = list(image.convert("L").resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left, right = pixels[row * 9 + column], pixels[row * 9 + column + 1]
+            value = value << 1 | (left > right)
+    return value
+
+
+def normalize_image(content: bytes, max_side: int, quality: int) -> NormalizedImage | None:
+    """Re-encode an image as WebP whose longest side is at most ``max_side`` pixels.
+
+    The EXIF orientation is applied and all metadata (EXIF, XMP, ICC profiles, comments)
+    is dropped. Multi frame images (multi page TIFF scans, animations) are returned as
+    ``None`` so they are sent unchanged instead of losing every frame but the first.
+
+    Raises:
+        Exception: When the image can not be decoded.
+    """
+    with Image.open(io.BytesIO(content)) as image:
+        if getattr(image, "n_frames", 1) > 1:
+            return None
+        # let the JPEG decoder downscale by a power of two while decoding
+        image.draft("RGB", (max_side, max_side))
+        transposed = ImageOps.exif_transpose(image)
+    has_alpha = "A" in transposed.getbands() or "transparency" in transposed.info
+    normalized = transposed.convert("RGBA" if has_alpha else "RGB")
+    normalized.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    normalized.save(buffer, format="WEBP", quality=quality, method=4)
+    return NormalizedImage(
+        content=buffer.getvalue(),
+        mime_type="image/webp",
+        width=normalized.width,
+        height=normalized.height,
+        dhash=image_dhash(normalized),
+        pixels_sha256=hashlib.sha256(
+            f"{normalized.mode}:{normalized.width}x{normalized.height}:".encode() + normalized.tobytes()
+        ).hexdigest(),
+    )
+
+
+def docx_to_html(content: bytes) -> str:
+    """Convert a DOCX document to an HTML fragment."""
+    with io.BytesIO(content) as byte_stream:
+        return mammoth.convert_to_html(byte_stream).value.strip()
+
+
+def limit_memory(memory_limit: int) -> None:
+    """Cap the address space of the current process, initializer of the parser processes."""
+    if memory_limit <= 0:
+        return
+    try:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    except (ImportError, ValueError, OSError):
+        # not supported on this platform, the pool still isolates the event loop
+        pass
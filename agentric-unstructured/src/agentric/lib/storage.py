@@ -0,0 +1,671 @@
+"""Process wide S3 (MinIO) client.
+
+Creating an ``aioboto3`` session and client per call costs a new connection pool, TCP
+and TLS handshake and credential resolution every time. One client with a connection
+pool of ``MINIO_MAX_POOL_CONNECTIONS`` is opened per process instead: by the Litestar
+lifespan in the API and by the SAQ startup hook in workers. The bucket is ensured once
+when the client is opened.
+
+Every operation records its latency (``storage.operation.duration``) and the share of
+the connection pool in use (``storage.pool.utilization``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import time
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import format_datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Literal
+
+import aioboto3
+import botocore.session
+import structlog
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+from agentric.config.base import get_settings
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, AsyncIterator, Iterable
+    from datetime import datetime
+
+__all__ = (
+    "BLOB_PREFIX",
+    "ObjectStream",
+    "StoredObject",
+    "blob_key",
+    "delete_objects",
+    "list_objects",
+    "promote_to_blob",
+    "put_blob",
+    "get_s3_client",
+    "last_modified",
+    "object_size",
+    "open_object",
+    "presigned_post",
+    "presigned_url",
+    "s3_operation",
+    "start_object_storage",
+    "stop_object_storage",
+    "upload_stream",
+    "upload_stream_as_blob",
+)
+
+logger = structlog.get_logger()
+settings = get_settings()
+meter = metrics.get_meter(__name__)
+
+operation_duration = meter.create_histogram(
+    "storage.operation.duration",
+    unit="s",
+    description="Duration of object storage operations.",
+)
+
+
+class _ObjectStorage:
+    def __init__(self) -> None:
+        self._stack: AsyncExitStack | None = None
+        self._client: Any = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock | None = None
+        self.in_flight = 0
+
+    @property
+    def pool_size(self) -> int:
+        return settings.minio.MAX_POOL_CONNECTIONS
+
+    async def start(self) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return self._client
+        if self._lock is None or self._loop is not loop:
+            # the client and its lock belong to one event loop (e.g. CLI commands run their own)
+            stale, self._stack = self._stack, None
+            self._lock, self._loop, self._client = asyncio.Lock(), loop, None
+            if stale is not None:
+                await self._close_stale(stale)
+        async with self._lock:
+            if self._client is not None:
+                return self._client
+            stack = AsyncExitStack()
+            client = await stack.enter_async_context(
+                aioboto3.Session().client(
+                    "s3",
+                    endpoint_url=settings.minio.ENDPOINT_URL,
+                    aws_access_key_id=settings.minio.ROOT_USER,
+                    aws_secret_access_key=settings.minio.ROOT_PASSWORD,
+                    config=Config(
+                        signature_version="s3v4",
+                        max_pool_connections=self.pool_size,
+                        tcp_keepalive=True,
+                    ),
+                )
+            )
+            try:
+                await self._ensure_bucket(client)
+            except BaseException:
+                await stack.aclose()
+                raise
+            self._stack, self._client = stack, client
+            return client
+
+    @staticmethod
+    async def _close_stale(stack: AsyncExitStack) -> None:
+        """Close the client of a previous event loop, its connections are dropped when that fails."""
+        try:
+            await stack.aclose()
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to close the object storage client of a previous event loop", exc_info=True)
+
+    async def _ensure_bucket(self, client: Any) -> None:
+        try:
+            await client.head_bucket(Bucket=settings.minio.BUCKET)
+        except ClientError:
+            logger.info("Creating object storage bucket", bucket=settings.minio.BUCKET)
+            await client.create_bucket(Bucket=settings.minio.BUCKET)
+
+    async def stop(self) -> None:
+        stack, self._stack, self._client = self._stack, None, None
+        if stack is not None:
+            await stack.aclose()
+
+
+_storage = _ObjectStorage()
+
+
+def _observe_utilization(_: CallbackOptions) -> Iterable[Observation]:
+    yield Observation(_storage.in_flight / _storage.pool_size if _storage.pool_size else 0.0)
+
+
+meter.create_observable_gauge(
+    "storage.pool.utilization",
+    callbacks=[_observe_utilization],
+    unit="1",
+    description="Share of the object storage connection pool in use.",
+)
+
+
+async def get_s3_client() -> Any:
+    """Return the process wide S3 client, opening it on first use."""
+    return await _storage.start()
+
+
+@asynccontextmanager
+async def s3_operation(operation: str) -> AsyncIterator[Any]:
+    """Yield the S3 client and record the latency of the enclosed operation.
+
+    Args:
+        operation (str): Name of the operation, recorded as metric attribute
+    """
+    client = await get_s3_client()
+    _storage.in_flight += 1
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield client
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        _storage.in_flight -= 1
+        operation_duration.record(
+            time.perf_counter() - start, {"operation": operation, "status": status}
+        )
+
+
+HEAD_SIZE = 4096
+"""Number of leading bytes of a streamed upload kept in :attr:`StoredObject.head`."""
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    """Size and sha256 of an uploaded object, computed while it was streamed."""
+
+    size: int
+    sha256: str
+    head: bytes = b""
+    """The first :data:`HEAD_SIZE` bytes, enough to sniff the content type."""
+
+
+async def upload_stream(
+    key: str,
+    chunks: AsyncIterable[bytes],
+    content_type: str | None = None,
+    *,
+    bucket: str | None = None,
+    part_size: int | None = None,
+) -> StoredObject:
+    """Stream ``chunks`` into an object without holding more than one part in memory.
+
+    Objects smaller than one part are stored with a single ``put_object``. Larger ones
+    use a multipart upload with parts of ``part_size`` bytes, uploaded one at a time,
+    which is aborted when the stream or an upload fails.
+
+    Args:
+        key (str): Object key
+        chunks: Object content
+        content_type (str): Content type (optional)
+        bucket (str): Bucket, defaults to ``MINIO_BUCKET``
+        part_size (int): Part size, defaults to ``MINIO_UPLOAD_PART_SIZE``
+
+    Returns:
+        StoredObject: Size and sha256 of the stored content.
+    """
+    bucket = bucket or settings.minio.BUCKET
+    part_size = max(part_size or settings.minio.UPLOAD_PART_SIZE, 5 * 1024 * 1024)
+    content_type = content_type or "application/octet-stream"
+    digest = hashlib.sha256()
+    size = 0
+    buffer = bytearray()
+    upload_id: str | None = None
+    parts: list[dict[str, Any]] = []
+
+    async def _upload_part(data: bytes) -> None:
+        nonlocal upload_id
+        async with s3_operation("upload_part") as client:
+            if upload_id is None:
+                created = await client.create_multipart_upload(
+                    Bucket=bucket, Key=key, ContentType=content_type
+                )
+                upload_id = created["UploadId"]
+            number = len(parts) + 1
+            response = await client.upload_part(
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data
+            )
+            parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    head = b""
+    try:
+        async for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            if len(head) < HEAD_SIZE:
+                head += chunk[: HEAD_SIZE - len(head)]
+            buffer.extend(chunk)
+            while len(buffer) >= part_size:
+                data = bytes(buffer[:part_size])
+                del buffer[:part_size]
+                await _upload_part(data)
+
+        if upload_id is None:
+            async with s3_operation("put_object") as client:
+                await client.put_object(
+                    Bucket=bucket, Key=key, Body=bytes(buffer), ContentType=content_type
+                )
+        else:
+            if buffer:
+                await _upload_part(bytes(buffer))
+            async with s3_operation("complete_multipart_upload") as client:
+                await client.complete_multipart_upload(
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+    except BaseException:
+        if upload_id is not None:
+            try:
+                async with s3_operation("abort_multipart_upload") as client:
+                    await client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            except Exception:  # noqa: BLE001
+                logger.warning("Failed to abort multipart upload", key=key, exc_info=True)
+        raise
+
+    return StoredObject(size=size, sha256=digest.hexdigest(), head=head)
+
+
+BLOB_PREFIX = "blobs/"
+"""Key prefix of content addressed objects, see :func:`blob_key`."""
+
+
+def blob_key(sha256: str) -> str:
+    """Return the key of the content addressed object with the given sha256."""
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256}"
+
+
+async def _touch_if_exists(bucket: str, key: str) -> bool:
+    # copying an object onto itself refreshes LastModified, which keeps a blob that is
+    # about to be referenced again out of the garbage collector's grace period
+    try:
+        async with s3_operation("head_object") as client:
+            head = await client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 404:
+            return False
+        raise
+    async with s3_operation("copy_object") as client:
+        await client.copy_object(
+            Bucket=bucket,
+            Key=key,
+            CopySource={"Bucket": bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=head.get("ContentType") or "application/octet-stream",
+            Metadata=head.get("Metadata") or {},
+        )
+    return True
+
+
+async def put_blob(
+    content: bytes, content_type: str | None = None, *, bucket: str | None = None
+) -> tuple[str, StoredObject]:
+    """Store ``content`` under its content hash, unless an identical object exists.
+
+    Returns:
+        tuple[str, StoredObject]: The object key and the size and sha256 of the content.
+    """
+    bucket = bucket or settings.minio.BUCKET
+    stored = StoredObject(
+        size=len(content), sha256=hashlib.sha256(content).hexdigest(), head=content[:HEAD_SIZE]
+    )
+    key = blob_key(stored.sha256)
+    if not await _touch_if_exists(bucket, key):
+        async with s3_operation("put_object") as client:
+            await client.put_object(
+                Bucket=bucket,
+                Key=key,
+                Body=content,
+                ContentType=content_type or "application/octet-stream",
+            )
+    return key, stored
+
+
+async def promote_to_blob(
+    key: str, sha256: str, *, bucket: str | None = None, delete_source: bool = True
+) -> str:
+    """Move an object to its content addressed key with a server side copy.
+
+    The object is only copied when no identical blob exists. The source is deleted
+    unless ``delete_source`` is false.
+
+    Returns:
+        str: The blob key.
+    """
+    bucket = bucket or settings.minio.BUCKET
+    target = blob_key(sha256)
+    if key == target:
+        return target
+    if not await _touch_if_exists(bucket, target):
+        async with s3_operation("copy_object") as client:
+            await client.copy_object(
+                Bucket=bucket, Key=target, CopySource={"Bucket": bucket, "Key": key}
+            )
+    if delete_source:
+        await delete_objects([key], bucket=bucket)
+    return target
+
+
+async def upload_stream_as_blob(
+    chunks: AsyncIterable[bytes],
+    content_type: str | None = None,
+    *,
+    bucket: str | None = None,
+) -> tuple[str, StoredObject]:
+    """Stream ``chunks`` to a staging key and move them to their content addressed key.
+
+    The hash is only known once the stream ends, so the upload goes through
+    :func:`upload_stream` first and is then promoted with a server side copy.
+
+    Returns:
+        tuple[str, StoredObject]: The blob key and the size and sha256 of the content.
+    """
+    bucket = bucket or settings.minio.BUCKET
+    staging_key = f"staging/{uuid.uuid4().hex}"
+    try:
+        stored = await upload_stream(staging_key, chunks, content_type, bucket=bucket)
+        key = await promote_to_blob(staging_key, stored.sha256, bucket=bucket)
+    except BaseException:
+        try:
+            await delete_objects([staging_key], bucket=bucket)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to delete staged upload", key=staging_key, exc_info=True)
+        raise
+    return key, stored
+
+
+async def list_objects(
+    prefix: str, *, bucket: str | None = None
+) -> AsyncIterator[tuple[str, datetime]]:
+    """Yield the key and last modification time of every object under ``prefix``."""
+    client = await get_s3_client()
+    paginator = client.get_paginator("list_objects_v2")
+    async for page in paginator.paginate(Bucket=bucket or settings.minio.BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            yield obj["Key"], obj["LastModified"]
+
+
+async def delete_objects(keys: Iterable[str], *, bucket: str | None = None) -> int:
+    """Delete objects with batched ``delete_objects`` requests of up to 1000 keys.
+
+    Returns:
+        int: The number of keys that could not be deleted, errors are logged.
+    """
+    bucket = bucket or settings.minio.BUCKET
+    keys = list(keys)
+    failed = 0
+    for start in range(0, len(keys), 1000):
+        batch = keys[start : start + 1000]
+        async with s3_operation("delete_objects") as client:
+            response = await client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+        for error in response.get("Errors", []):
+            failed += 1
+            logger.warning(
+                "Failed to delete object", key=error.get("Key"), error=error.get("Message")
+            )
+    return failed
+
+
+_SINGLE_RANGE = re.compile(r"^bytes=(?:\d+-\d*|-\d+)$")
+
+
+@dataclass
+class ObjectStream:
+    """An object, part of it, or only its validators, ready to be sent as HTTP response.
+
+    ``status_code`` is 200, 206 (``Range``), 304 (validators matched) or 416 (range
+    outside the object). ``chunks`` is only set for 200 and 206.
+    """
+
+    status_code: int
+    headers: dict[str, str] = field(default_factory=dict)
+    content_type: str | None = None
+    chunks: AsyncIterator[bytes] | None = None
+
+
+def _validator_headers(metadata: dict[str, Any]) -> dict[str, str]:
+    headers = {"Accept-Ranges": "bytes"}
+    if etag := metadata.get("ETag"):
+        headers["ETag"] = etag
+    last_modified = metadata.get("LastModified")
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+async def open_object(
+    bucket: str,
+    key: str,
+    *,
+    byte_range: str | None = None,
+    if_none_match: str | None = None,
+    if_modified_since: datetime | None = None,
+    chunk_size: int = 64 * 1024,
+) -> ObjectStream:
+    """Open an object for streaming, honouring HTTP range and conditional headers.
+
+    The conditions and the range are evaluated by the object store, the body is read in
+    ``chunk_size`` chunks while the response is sent. Only single byte ranges are
+    supported; any other ``Range`` is ignored and the whole object is returned.
+
+    Args:
+        bucket (str): Bucket
+        key (str): Object key
+        byte_range (str): Value of the ``Range`` request header
+        if_none_match (str): Value of the ``If-None-Match`` request header
+        if_modified_since (datetime): Parsed ``If-Modified-Since`` request header
+        chunk_size (int): Size of the chunks read from the object body
+
+    Raises:
+        ClientError: When the object does not exist or can not be read.
+
+    Returns:
+        ObjectStream: The response status, headers and body.
+    """
+    params: dict[str, Any] = {"Bucket": bucket, "Key": key}
+    if byte_range and _SINGLE_RANGE.match(byte_range.replace(" ", "")):
+        params["Range"] = byte_range.replace(" ", "")
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    elif if_modified_since is not None:
+        params["IfModifiedSince"] = if_modified_since
+
+    try:
+        async with s3_operation("get_object") as client:
+            response = await client.get_object(**params)
+    except ClientError as e:
+        status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if status == 304:
+            # botocore lower cases the response header names
+            received = e.response["ResponseMetadata"].get("HTTPHeaders", {})
+            headers = {
+                name: received[name.lower()]
+                for name in ("ETag", "Last-Modified")
+                if name.lower() in received
+            }
+            return ObjectStream(status_code=304, headers=headers)
+        if status == 416:
+            async with s3_operation("head_object") as client:
+                head = await client.head_object(Bucket=bucket, Key=key)
+            headers = _validator_headers(head)
+            headers["Content-Range"] = f"bytes */{head['ContentLength']}"
+            return ObjectStream(status_code=416, headers=headers)
+        raise
+
+    headers = _validator_headers(response)
+    headers["Content-Length"] = str(response["ContentLength"])
+    if content_range := response.get("ContentRange"):
+        headers["Content-Range"] = content_range
+
+    async def _chunks() -> AsyncIterator[bytes]:
+        # the connection stays checked out of the pool until the body is consumed
+        _storage.in_flight += 1
+        try:
+            async with response["Body"] as body:
+                async for chunk in body.iter_chunks(chunk_size):
+                    yield chunk
+        finally:
+            _storage.in_flight -= 1
+
+    return ObjectStream(
+        status_code=206 if "Range" in params and response.get("ContentRange") else 200,
+        headers=headers,
+        content_type=response.get("ContentType"),
+        chunks=_chunks(),
+    )
+
+
+async def object_size(bucket: str, key: str) -> int | None:
+    """Return the size of an object, ``None`` when it does not exist."""
+    try:
+        async with s3_operation("head_object") as client:
+            head = await client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 404:
+            return None
+        raise
+    return int(head["ContentLength"])
+
+
+async def last_modified(bucket: str, key: str) -> datetime | None:
+    """Return the current modification time of an object, ``None`` when it does not exist."""
+    try:
+        async with s3_operation("head_object") as client:
+            head = await client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 404:
+            return None
+        raise
+    return head["LastModified"]
+
+
+@lru_cache(maxsize=2)
+def _presigning_client(endpoint_url: str) -> Any:
+    # the host is part of the signature, so URLs handed to browsers are signed for the
+    # public endpoint and URLs read by workers for the internal one. Signing is local,
+    # this client never opens a connection.
+    return botocore.session.get_session().create_client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=settings.minio.ROOT_USER,
+        aws_secret_access_key=settings.minio.ROOT_PASSWORD,
+        region_name="us-east-1",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+
+
+def presigned_url(
+    method: Literal["GET", "PUT"],
+    key: str,
+    *,
+    bucket: str | None = None,
+    expires_in: int | None = None,
+    content_type: str | None = None,
+    content_disposition: str | None = None,
+    internal: bool = False,
+) -> str:
+    """Sign a URL on ``MINIO_PUBLIC_ENDPOINT`` that reads or writes one object directly.
+
+    Args:
+        method (str): ``GET`` to download, ``PUT`` to upload
+        key (str): Object key
+        bucket (str): Bucket, defaults to ``MINIO_BUCKET``
+        expires_in (int): Lifetime in seconds, defaults to ``MINIO_PRESIGNED_URL_EXPIRY``
+        content_type (str): ``PUT``: Content type the upload must be sent with
+        content_disposition (str): ``GET``: ``Content-Disposition`` of the response
+        internal (bool): Sign for ``MINIO_ENDPOINT`` instead, for URLs read by our own processes
+
+    Returns:
+        str: The presigned URL.
+    """
+    params: dict[str, Any] = {"Bucket": bucket or settings.minio.BUCKET, "Key": key}
+    if method == "PUT":
+        operation = "put_object"
+        if content_type:
+            params["ContentType"] = content_type
+    else:
+        operation = "get_object"
+        if content_disposition:
+            params["ResponseContentDisposition"] = content_disposition
+    endpoint_url = settings.minio.ENDPOINT_URL if internal else settings.minio.PUBLIC_ENDPOINT_URL
+    return _presigning_client(endpoint_url).generate_presigned_url(
+        operation,
+        Params=params,
+        ExpiresIn=expires_in or settings.minio.PRESIGNED_URL_EXPIRY,
+        HttpMethod=method,
+    )
+
+
+def presigned_post(
+    key: str,
+    *,
+    max_size: int,
+    bucket: str | None = None,
+    expires_in: int | None = None,
+    content_type: str | None = None,
+) -> tuple[str, dict[str, str]]:
+    """Sign a browser form upload of one object on ``MINIO_PUBLIC_ENDPOINT``.
+
+    Unlike a presigned ``PUT``, the signed policy limits the size of the upload, so the
+    storage rejects larger files before they are stored.
+
+    Args:
+        key (str): Object key
+        max_size (int): Largest accepted upload in bytes
+        bucket (str): Bucket, defaults to ``MINIO_BUCKET``
+        expires_in (int): Lifetime in seconds, defaults to ``MINIO_PRESIGNED_URL_EXPIRY``
+        content_type (str): Content type the upload must be sent with
+
+    Returns:
+        tuple[str, dict[str, str]]: The URL to post to and the form fields to send before
+        the ``file`` field.
+    """
+    fields: dict[str, str] = {}
+    conditions: list[Any] = [["content-length-range", 0, max_size]]
+    if content_type:
+        fields["Content-Type"] = content_type
+        conditions.append({"Content-Type": content_type})
+    post = _presigning_client(settings.minio.PUBLIC_ENDPOINT_URL).generate_presigned_post(
+        Bucket=bucket or settings.minio.BUCKET,
+        Key=key,
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=expires_in or settings.minio.PRESIGNED_URL_EXPIRY,
+    )
+    return post["url"], post["fields"]
+
+
+async def start_object_storage(*_: Any) -> None:
+    """Open the S3 client and ensure the bucket. Usable as Litestar and SAQ startup hook.
+
+    A storage outage does not prevent the process from starting, the client is opened
+    again on first use.
+    """
+    try:
+        await _storage.start()
+    except Exception:  # noqa: BLE001
+        logger.warning("Failed to open object storage client", exc_info=True)
+
+
+async def stop_object_storage(*_: Any) -> None:
+    """Close the S3 client. Usable as Litestar and SAQ shutdown hook."""
+    await _storage.stop()
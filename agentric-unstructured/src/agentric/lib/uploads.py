@@ -0,0 +1,82 @@
+"""Streaming access to files posted as ``multipart/form-data``.
+
+Litestar parses a multipart body only after it has been read completely, so an
+``UploadFile`` parameter holds the whole upload in memory. Handlers that accept large
+files read ``request.stream()`` through :func:`open_file_upload` instead and receive the
+file content chunk by chunk as it arrives.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from litestar.exceptions import ClientException
+from multipart import MultipartSegment, ParserError, PushMultipartParser, parse_options_header
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, AsyncIterator
+
+    from litestar import Request
+
+__all__ = ("FileUpload", "open_file_upload")
+
+
+@dataclass
+class FileUpload:
+    """The first file of a multipart request, its content is read from ``chunks``."""
+
+    filename: str
+    content_type: str | None
+    chunks: AsyncIterator[bytes]
+
+
+async def _events(
+    request: Request, boundary: str
+) -> AsyncGenerator[MultipartSegment | bytes | None, None]:
+    try:
+        with PushMultipartParser(boundary, max_segment_count=16) as parser:
+            async for chunk in request.stream():
+                if not chunk:
+                    continue
+                for event in parser.parse(chunk):
+                    yield event
+            for event in parser.parse(b""):
+                yield event
+    except ParserError as e:
+        raise ClientException(detail=f"Invalid multipart body: {e}") from e
+
+
+async def open_file_upload(request: Request) -> FileUpload:
+    """Read the request up to the first file field and return a stream of its content.
+
+    Raises:
+        ClientException: When the body is not multipart or contains no file.
+    """
+    _, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get("boundary")
+    if not boundary:
+        raise ClientException(detail="Expected a multipart/form-data body")
+
+    events = _events(request, boundary)
+    async for event in events:
+        if isinstance(event, MultipartSegment) and event.filename:
+            segment = event
+            break
+    else:
+        raise ClientException(detail="No file in the request body")
+
+    async def _chunks() -> AsyncGenerator[bytes, None]:
+        try:
+            async for event in events:
+                if event is None:
+                    break
+                yield bytes(event)  # type: ignore[arg-type]
+        finally:
+            await events.aclose()
+
+    return FileUpload(
+        filename=segment.filename or "upload",
+        content_type=segment.content_type,
+        chunks=_chunks(),
+    )
@@ -5,11 +5,10 @@ import json
 import mimetypes
 import uuid
 from datetime import datetime
-from typing import cast
+from typing import TYPE_CHECKING, cast
+from urllib.parse import quote
 
-import aioboto3
 from anthropic import AsyncAnthropic
-from botocore.config import Config
 from litestar import Litestar
 from sqlalchemy import exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -21,9 +20,15 @@ from agentric.db import models as m
 from agentric.domain.customers.services import CustomerService
 from agentric.domain.requests.services import RequestService
 from agentric.lib import crypt
+from agentric.lib.storage import put_blob, s3_operation, upload_stream_as_blob
 
 from .naming_convention import document_mapping
 
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable
+
+    from agentric.lib.storage import StoredObject
+
 __all__ = [
     "classify_document_type",
     "get_email_send_date",
@@ -339,6 +344,14 @@ def parse_minio_url(s3_url: str) -> tuple[str, str]:
     return parts[0], parts[1]
 
 
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    """Build a ``Content-Disposition`` header value for ``filename``."""
+    quoted_filename = quote(filename)
+    if quoted_filename == filename:
+        return f'{disposition}; filename="{filename}"'
+    return f"{disposition}; filename*=utf-8''{quoted_filename}"
+
+
 async def read_minio_file(s3_url: str) -> bytes:
     """Read file content from MinIO.
 
@@ -350,17 +363,10 @@ async def read_minio_file(s3_url: str) -> bytes:
     """
     bucket_name, key = parse_minio_url(s3_url)
 
-    session = aioboto3.Session()
-
-    async with session.client(
-        "s3",
-        endpoint_url=MINIO_ENDPOINT_URL,
-        aws_access_key_id=MINIO_ROOT_USER,
-        aws_secret_access_key=MINIO_ROOT_PASSWORD,
-        config=Config(signature_version="s3v4"),
-    ) as s3_client:  # type: ignore
+    async with s3_operation("get_object") as s3_client:
         response = await s3_client.get_object(Bucket=bucket_name, Key=key)
-        return await response["Body"].read()
+        async with response["Body"] as body:
+            return await body.read()
 
 
 async def delete_minio_file(s3_url: str) -> None:
@@ -374,15 +380,7 @@ async def delete_minio_file(s3_url: str) -> None:
     """
     bucket_name, key = parse_minio_url(s3_url)
 
-    session = aioboto3.Session()
-
-    async with session.client(
-        "s3",
-        endpoint_url=MINIO_ENDPOINT_URL,
-        aws_access_key_id=MINIO_ROOT_USER,
-        aws_secret_access_key=MINIO_ROOT_PASSWORD,
-        config=Config(signature_version="s3v4"),
-    ) as s3_client:  # type: ignore
+    async with s3_operation("delete_object") as s3_client:
         response = await s3_client.delete_object(Bucket=bucket_name, Key=key)
 
         status_code = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
@@ -392,7 +390,10 @@ async def delete_minio_file(s3_url: str) -> None:
 
 
 async def save_file_to_minio(filename: str, content: bytes, content_type: str | None = None) -> str:
-    """Save file content to MinIO.
+    """Save file content to MinIO under its content hash.
+
+    Identical content is stored once, whatever the file name. The name is only used to
+    guess the content type and is kept on the attachment.
 
     Args:
         filename (str): File name
@@ -403,23 +404,27 @@ async def save_file_to_minio(filename: str, content: bytes, content_type: str |
         str: minio url of the saved file
     """
 
-    key = filename
-
-    s3_url = f"{BUCKET}/{key}"
     if content_type is None:
         content_type, _ = mimetypes.guess_type(filename)
+    key, _ = await put_blob(content, content_type, bucket=BUCKET)
+    return f"{BUCKET}/{key}"
+
+
+async def stream_file_to_minio(
+    filename: str, chunks: AsyncIterable[bytes], content_type: str | None = None
+) -> tuple[str, StoredObject]:
+    """Stream file content to MinIO under its content hash without buffering the whole file.
 
-    session = aioboto3.Session()
-
-    async with session.client(
-        "s3",
-        endpoint_url=MINIO_ENDPOINT_URL,
-        aws_access_key_id=MINIO_ROOT_USER,
-        aws_secret_access_key=MINIO_ROOT_PASSWORD,
-        config=Config(signature_version="s3v4"),
-    ) as s3_client:  # type: ignore
-        existing_buckets = await s3_client.list_buckets()
-        if not any(b["Name"] == BUCKET for b in existing_buckets["Buckets"]):
-            await s3_client.create_bucket(Bucket=BUCKET)
-        await s3_client.put_object(Bucket=BUCKET, Key=key, Body=content, ContentType=content_type)
-        return s3_url
\ No newline at end of file
+    Args:
+        filename (str): File name
+        chunks: File content
+        content_type (str): File content type (optional)
+
+    Returns:
+        tuple[str, StoredObject]: minio url of the saved file and its size and sha256
+    """
+
+    if content_type is None:
+        content_type, _ = mimetypes.guess_type(filename)
+    key, stored = await upload_stream_as_blob(chunks, content_type, bucket=BUCKET)
+    return f"{BUCKET}/{key}", stored
@@ -17,6 +17,8 @@ from litestar.stores.registry import StoreRegistry
 
 from agentric.config.app import open_telemetry_config
 from agentric.domain.accounts.services import UserRoleService
+from agentric.lib.executor import shutdown_process_pool
+from agentric.lib.storage import start_object_storage, stop_object_storage
 from agentric.lib.utils import seed_db
 
 if TYPE_CHECKING:
@@ -41,13 +43,14 @@ class ApplicationCore(InitPluginProtocol, CLIPluginProtocol):
     app_slug: str
 
     def on_cli_init(self, cli: Group) -> None:
-        from agentric.cli.commands import user_management_group
+        from agentric.cli.commands import claim_management_group, user_management_group
         from agentric.config import get_settings
 
         settings = get_settings()
         self.redis = settings.redis.get_client()
         self.app_slug = settings.app.slug
         cli.add_command(user_management_group)
+        cli.add_command(claim_management_group)
 
     def on_app_init(self, app_config: AppConfig) -> AppConfig:
         """Configure application for use with SQLAlchemy.
@@ -159,6 +162,8 @@ class ApplicationCore(InitPluginProtocol, CLIPluginProtocol):
         )
         app_config.stores = StoreRegistry(default_factory=self.redis_store_factory)
         app_config.on_shutdown.append(self.redis.aclose)  # type: ignore[attr-defined]
+        app_config.on_shutdown.append(shutdown_process_pool)
+        app_config.on_shutdown.append(stop_object_storage)
         # dependencies
         dependencies = {"current_user": Provide(provide_user)}
         app_config.dependencies.update(dependencies)
@@ -169,6 +174,7 @@ class ApplicationCore(InitPluginProtocol, CLIPluginProtocol):
             ],
         )
         app_config.on_startup=[
+            start_object_storage,
             seed_db
         ]
         otel_config = open_telemetry_config
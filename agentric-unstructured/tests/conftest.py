@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import pytest
+
+# the app config imports the task modules for its cron jobs, load it before any domain module
+import agentric.config.app  # noqa: F401
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from agentric.domain.requests import blobs
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+pytestmark = pytest.mark.anyio
+
+BUCKET = "test-bucket"
+GRACE_PERIOD = 3600
+
+
+class FakeStore:
+    """Objects of one bucket, listed from a snapshot taken before the collection starts."""
+
+    def __init__(self, objects: dict[str, datetime]) -> None:
+        self.listed = dict(objects)
+        self.current = dict(objects)
+        self.referenced: set[str] = set()
+        self.deleted: list[str] = []
+        self.failing_heads: set[str] = set()
+
+    async def list_objects(self, prefix: str, *, bucket: str | None = None) -> AsyncIterator[tuple[str, datetime]]:
+        for key, modified in self.listed.items():
+            if key.startswith(prefix):
+                yield key, modified
+
+    async def last_modified(self, bucket: str, key: str) -> datetime | None:
+        if key in self.failing_heads:
+            msg = "head failed"
+            raise RuntimeError(msg)
+        return self.current.get(key)
+
+    async def delete_objects(self, keys: Iterable[str], *, bucket: str | None = None) -> int:
+        self.deleted.extend(keys)
+        return 0
+
+    async def reference_counts(self, service: Any, urls: list[str]) -> dict[str, int]:
+        return {url: 1 for url in urls if url.removeprefix(f"{BUCKET}/") in self.referenced}
+
+
+class FakeService:
+    @classmethod
+    @asynccontextmanager
+    async def new(cls, **_: Any) -> AsyncIterator[FakeService]:
+        yield cls()
+
+
+@pytest.fixture
+def old() -> datetime:
+    return datetime.now(UTC) - timedelta(seconds=GRACE_PERIOD * 2)
+
+
+@pytest.fixture
+def recent() -> datetime:
+    return datetime.now(UTC) - timedelta(seconds=GRACE_PERIOD // 2)
+
+
+def use_store(monkeypatch: pytest.MonkeyPatch, store: FakeStore) -> None:
+    monkeypatch.setattr(blobs.settings.minio, "BUCKET", BUCKET)
+    monkeypatch.setattr(blobs, "RequestAttachmentService", FakeService)
+    monkeypatch.setattr(blobs, "list_objects", store.list_objects)
+    monkeypatch.setattr(blobs, "last_modified", store.last_modified)
+    monkeypatch.setattr(blobs, "delete_objects", store.delete_objects)
+    monkeypatch.setattr(blobs, "reference_counts", store.reference_counts)
+
+
+async def test_keeps_objects_within_grace_period(
+    monkeypatch: pytest.MonkeyPatch, old: datetime, recent: datetime
+) -> None:
+    store = FakeStore({"blobs/old": old, "blobs/recent": recent, "staging/recent": recent})
+    use_store(monkeypatch, store)
+
+    stats = await blobs.collect_unreferenced_objects(GRACE_PERIOD)
+
+    assert store.deleted == ["blobs/old"]
+    assert stats == {"scanned": 3, "deleted": 1, "failed": 0}
+
+
+async def test_keeps_referenced_objects_under_every_prefix(monkeypatch: pytest.MonkeyPatch, old: datetime) -> None:
+    keys = [f"{prefix}{name}" for prefix in blobs.GC_PREFIXES for name in ("kept", "garbage")]
+    store = FakeStore(dict.fromkeys(keys, old))
+    store.referenced = {key for key in keys if key.endswith("kept")}
+    use_store(monkeypatch, store)
+
+    stats = await blobs.collect_unreferenced_objects(GRACE_PERIOD)
+
+    assert sorted(store.deleted) == ["blobs/garbage", "staging/garbage", "uploads/garbage"]
+    assert stats == {"scanned": 6, "deleted": 3, "failed": 0}
+
+
+async def test_keeps_objects_refreshed_after_listing(
+    monkeypatch: pytest.MonkeyPatch, old: datetime, recent: datetime
+) -> None:
+    store = FakeStore({"blobs/reused": old, "blobs/gone": old, "blobs/garbage": old})
+    # reused by an upload after the listing, and deleted by someone else after the listing
+    store.current["blobs/reused"] = recent
+    del store.current["blobs/gone"]
+    use_store(monkeypatch, store)
+
+    stats = await blobs.collect_unreferenced_objects(GRACE_PERIOD)
+
+    assert store.deleted == ["blobs/garbage"]
+    assert stats == {"scanned": 3, "deleted": 1, "failed": 0}
+
+
+async def test_keeps_objects_that_cannot_be_read(monkeypatch: pytest.MonkeyPatch, old: datetime) -> None:
+    store = FakeStore({"uploads/unreadable": old, "uploads/garbage": old})
+    store.failing_heads = {"uploads/unreadable"}
+    use_store(monkeypatch, store)
+
+    stats = await blobs.collect_unreferenced_objects(GRACE_PERIOD)
+
+    assert store.deleted == ["uploads/garbage"]
+    assert stats == {"scanned": 2, "deleted": 1, "failed": 1}
+
+
+async def test_dry_run_deletes_nothing(monkeypatch: pytest.MonkeyPatch, old: datetime) -> None:
+    store = FakeStore({"blobs/garbage": old})
+    use_store(monkeypatch, store)
+
+    stats = await blobs.collect_unreferenced_objects(GRACE_PERIOD, dry_run=True)
+
+    assert store.deleted == []
+    assert stats == {"scanned": 1, "deleted": 1, "failed": 0}
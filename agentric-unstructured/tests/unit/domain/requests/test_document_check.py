@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import Any
+
+from agentric.domain.requests.rule_sets import cover_more_document_check
+from agentric.domain.requests.schemas import MissingStatus
+from agentric.domain.requests.utils import COVERMORE_LETTER_OF_EXPLANATION, prune_covermore_document_check
+
+ITINERARY = "Travel itinerary or summary of travel plans"
+RECEIPTS = "All invoices and receipts"
+FARE_SHEET = "Airline's fare sheet/rules (for international flights)"
+
+
+def verdict(*, applicable: bool = True, missing: bool = False, reason: str = "") -> dict[str, Any]:
+    return {"applicable": applicable, "missing": missing, "reason": reason}
+
+
+def check_result(**overrides: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """A model answer where no item applies, with the given ``{category: {item: verdict}}`` overrides."""
+    result = {
+        category: {item: verdict(applicable=False) for item in items}
+        for category, items in cover_more_document_check.items()
+    }
+    for category, items in overrides.items():
+        result[category].update(items)
+    return result
+
+
+def test_drops_items_that_do_not_apply() -> None:
+    result = check_result(
+        **{
+            "General": {ITINERARY: verdict(reason="itinerary.pdf")},
+            "Amendment or Cancellation Costs": {FARE_SHEET: verdict(reason="fares.pdf")},
+        }
+    )
+
+    outcome = prune_covermore_document_check(result)
+
+    assert [next(iter(entry)) for entry in outcome] == [ITINERARY, COVERMORE_LETTER_OF_EXPLANATION, FARE_SHEET]
+    assert outcome[0] == {ITINERARY: MissingStatus(missing=False, reason="itinerary.pdf")}
+
+
+def test_letter_of_explanation_is_not_required_when_nothing_is_missing() -> None:
+    result = check_result(
+        General={
+            ITINERARY: verdict(reason="itinerary.pdf"),
+            COVERMORE_LETTER_OF_EXPLANATION: verdict(missing=True, reason="No letter attached"),
+        }
+    )
+
+    outcome = dict(entry.popitem() for entry in prune_covermore_document_check(result))
+
+    assert outcome[COVERMORE_LETTER_OF_EXPLANATION].missing is False
+
+
+def test_letter_of_explanation_is_required_when_another_item_is_missing() -> None:
+    result = check_result(
+        General={COVERMORE_LETTER_OF_EXPLANATION: verdict(applicable=False, missing=True, reason="No letter")},
+        **{"Additional Expenses": {RECEIPTS: verdict(missing=True, reason="No receipts")}},
+    )
+
+    outcome = prune_covermore_document_check(result)
+
+    assert outcome == [
+        {COVERMORE_LETTER_OF_EXPLANATION: MissingStatus(missing=True, reason="No letter")},
+        {RECEIPTS: MissingStatus(missing=True, reason="No receipts")},
+    ]
+
+
+def test_keeps_an_item_per_category_it_applies_to() -> None:
+    result = check_result(
+        **{
+            "Overseas Medical and Dental": {RECEIPTS: verdict(reason="hospital.pdf")},
+            "Additional Expenses": {RECEIPTS: verdict(missing=True, reason="No taxi receipt")},
+        }
+    )
+
+    outcome = [entry for entry in prune_covermore_document_check(result) if RECEIPTS in entry]
+
+    assert outcome == [
+        {RECEIPTS: MissingStatus(missing=False, reason="hospital.pdf")},
+        {RECEIPTS: MissingStatus(missing=True, reason="No taxi receipt")},
+    ]
+
+
+def test_ignores_categories_missing_from_the_answer() -> None:
+    result = {"General": {ITINERARY: verdict(missing=True, reason="No itinerary")}}
+
+    assert prune_covermore_document_check(result) == [{ITINERARY: MissingStatus(missing=True, reason="No itinerary")}]
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from google.genai import types
+
+from agentric.domain.requests import file_registry
+from agentric.domain.requests.response_cache import ResponseCache
+
+pytestmark = pytest.mark.anyio
+
+MODEL = "gemini-2.5-pro"
+CONFIG = types.GenerateContentConfig(temperature=0, seed=42)
+
+
+class FakeRegistry:
+    def __init__(self, hashes: dict[str, str]) -> None:
+        self.hashes = hashes
+
+    async def content_hashes(self, uris: list[str]) -> list[str | None]:
+        return [self.hashes.get(uri) for uri in uris]
+
+
+@pytest.fixture
+def cache(monkeypatch: pytest.MonkeyPatch) -> ResponseCache:
+    # two live uploads of the same file, and one the registry does not know
+    registry = FakeRegistry({"files/a": "sha-claim-form", "files/b": "sha-claim-form", "files/c": "sha-receipt"})
+    monkeypatch.setattr(file_registry, "get_file_registry", lambda: registry)
+    return ResponseCache(None, namespace="test", ttl=60, max_entries=10, max_entry_size=1024)  # type: ignore[arg-type]
+
+
+def file(uri: str) -> types.Part:
+    return types.Part.from_uri(file_uri=uri, mime_type="application/pdf")
+
+
+async def key(cache: ResponseCache, contents: Any, config: types.GenerateContentConfig | None = CONFIG) -> str | None:
+    return await cache.key(MODEL, contents, config)
+
+
+async def test_only_deterministic_calls_have_a_key(cache: ResponseCache) -> None:
+    assert await key(cache, "Summarize the claim", None) is None
+    assert await key(cache, "Summarize the claim", types.GenerateContentConfig(temperature=1)) is None
+    assert await key(cache, "Summarize the claim", types.GenerateContentConfig()) is None
+    assert (await key(cache, "Summarize the claim") or "").startswith("test:")
+
+
+async def test_key_is_stable_across_content_shapes(cache: ResponseCache) -> None:
+    as_text = await key(cache, ["Summarize the claim", file("files/c")])
+    as_parts = await key(cache, [types.Part(text="Summarize the claim"), file("files/c")])
+    content = types.Content(role="user", parts=[types.Part(text="Summarize the claim"), file("files/c")])
+    as_content = await key(cache, content)
+
+    assert as_text == as_parts == as_content
+
+
+async def test_files_are_keyed_by_content(cache: ResponseCache) -> None:
+    assert await key(cache, [file("files/a"), "Check"]) == await key(cache, [file("files/b"), "Check"])
+    assert await key(cache, [file("files/a"), "Check"]) != await key(cache, [file("files/c"), "Check"])
+    # file order is part of the prompt
+    assert await key(cache, [file("files/a"), file("files/c")]) != await key(cache, [file("files/c"), file("files/a")])
+
+
+async def test_unregistered_files_are_keyed_by_uri(cache: ResponseCache) -> None:
+    assert await key(cache, [file("files/x"), "Check"]) != await key(cache, [file("files/y"), "Check"])
+    assert await key(cache, [file("files/x"), "Check"]) == await key(cache, [file("files/x"), "Check"])
+
+
+async def test_inline_data_is_keyed_by_content(cache: ResponseCache) -> None:
+    def image(data: bytes) -> types.Part:
+        return types.Part.from_bytes(data=data, mime_type="image/jpeg")
+
+    assert await key(cache, [image(b"receipt"), "Read"]) == await key(cache, [image(b"receipt"), "Read"])
+    assert await key(cache, [image(b"receipt"), "Read"]) != await key(cache, [image(b"invoice"), "Read"])
+
+
+async def test_prompt_config_and_schema_change_the_key(cache: ResponseCache) -> None:
+    base = await key(cache, "Summarize the claim")
+
+    assert await key(cache, "Summarise the claim") != base
+    assert await cache.key("gemini-2.5-flash", "Summarize the claim", CONFIG) != base
+    assert await key(cache, "Summarize the claim", CONFIG.model_copy(update={"seed": 7})) != base
+    assert await key(cache, "Summarize the claim", CONFIG.model_copy(update={"system_instruction": "Be brief"})) != base
+    schema = CONFIG.model_copy(update={"response_json_schema": {"type": "object"}})
+    assert await key(cache, "Summarize the claim", schema) != base
+
+
+async def test_cache_references_do_not_change_the_key(cache: ResponseCache) -> None:
+    config = CONFIG.model_copy(
+        update={"cached_content": "cachedContents/123", "http_options": types.HttpOptions(timeout=1000)}
+    )
+
+    assert await key(cache, "Summarize the claim", config) == await key(cache, "Summarize the claim")
+
+
+@pytest.mark.parametrize("finish_reason", [types.FinishReason.MAX_TOKENS, types.FinishReason.SAFETY, None])
+async def test_incomplete_responses_are_not_stored(cache: ResponseCache, finish_reason: types.FinishReason) -> None:
+    response = types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(role="model", parts=[types.Part(text="The claim is")]),
+                finish_reason=finish_reason,
+            )
+        ]
+    )
+
+    # the cache has no redis client, storing would fail
+    await cache.set("test:key", response)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pytest
+from google.genai import types
+
+from agentric.domain.requests.routing import (
+    DEFAULT_ROUTES,
+    TEAMS,
+    ModelRoute,
+    get_routes,
+    model_route,
+    parse_routes,
+    use_routes,
+)
+
+
+def test_empty_override_keeps_the_defaults() -> None:
+    table = parse_routes({})
+
+    assert set(table) == {"default", *TEAMS}
+    assert all(routes == DEFAULT_ROUTES for routes in table.values())
+
+
+def test_override_replaces_only_the_fields_it_sets() -> None:
+    table = parse_routes({"default": {"handle_claims": {"thinking_budget": 1024}}})
+
+    assert table["default"]["handle_claims"] == ModelRoute(DEFAULT_ROUTES["handle_claims"].model, 1024)
+    assert table["default"]["handle_missing"] == DEFAULT_ROUTES["handle_missing"]
+
+
+def test_teams_inherit_the_default_override() -> None:
+    table = parse_routes(
+        {
+            "default": {"extract_all_info": {"model": "gemini-2.5-flash", "max_output_tokens": 8192}},
+            "covermore": {"extract_all_info": {"thinking_budget": 0}},
+        }
+    )
+
+    assert table["travelguard"]["extract_all_info"] == ModelRoute("gemini-2.5-flash", max_output_tokens=8192)
+    assert table["covermore"]["extract_all_info"] == ModelRoute("gemini-2.5-flash", 0, 8192)
+    assert table["default"]["extract_all_info"].thinking_budget is None
+
+
+def test_does_not_change_the_defaults() -> None:
+    before = dict(DEFAULT_ROUTES)
+
+    parse_routes({"default": {"handle_claims": {"model": "gemini-2.5-flash"}}})
+
+    assert before == DEFAULT_ROUTES
+
+
+@pytest.mark.parametrize(
+    ("raw", "message"),
+    [
+        ({"allianz": {}}, "Unknown routing tables"),
+        ({"default": {"summarize": {"model": "gemini-2.5-flash"}}}, "Unknown stage 'summarize'"),
+        ({"covermore": {"handle_claims": {"temperature": 0}}}, "Invalid route covermore.handle_claims"),
+        ({"travelguard": {"handle_claims": "gemini-2.5-flash"}}, "must be an object"),
+    ],
+)
+def test_rejects_invalid_overrides(raw: dict, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        parse_routes(raw)
+
+
+def test_use_routes_overrides_the_configured_table() -> None:
+    table = parse_routes({"covermore": {"handle_claims": {"model": "gemini-2.5-flash"}}})
+
+    with use_routes(table):
+        assert model_route("handle_claims", "covermore").model == "gemini-2.5-flash"
+        assert model_route("handle_claims", "travelguard") == DEFAULT_ROUTES["handle_claims"]
+        assert model_route("handle_claims") == DEFAULT_ROUTES["handle_claims"]
+    assert model_route("handle_claims", "covermore") == get_routes()["covermore"]["handle_claims"]
+
+
+def test_apply_keeps_the_config_fields_the_route_does_not_set() -> None:
+    config = types.GenerateContentConfig(
+        temperature=0, thinking_config=types.ThinkingConfig(include_thoughts=True, thinking_budget=512)
+    )
+
+    routed = ModelRoute("gemini-2.5-pro", thinking_budget=2048, max_output_tokens=4096).apply(config)
+
+    assert routed.temperature == 0
+    assert routed.thinking_config == types.ThinkingConfig(include_thoughts=True, thinking_budget=2048)
+    assert routed.max_output_tokens == 4096
+    assert ModelRoute("gemini-2.5-pro").apply(config) == config
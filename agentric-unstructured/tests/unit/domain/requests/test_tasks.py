@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from agentric.domain.requests.tasks import _with_claim_reason
+
+CLAIM_REASON = {"claim_type": "trip_interruption", "claim_reason_type": "carrier", "type_of_loss": "Missed connection"}
+
+
+def test_extraction_uses_the_claim_reason_of_the_document_check() -> None:
+    extraction = {
+        "policy_data": {"policy_info": {}},
+        "claim_data": {
+            "claim_details": {"claim_number": "TG-1"},
+            "claim_reason": {"claim_type": "trip_delay", "claim_reason_type": "weather", "type_of_loss": "Delayed 9h"},
+        },
+    }
+
+    reconciled = _with_claim_reason(extraction, CLAIM_REASON)
+
+    assert reconciled["claim_data"]["claim_reason"] == {
+        "claim_type": "trip_interruption",
+        "claim_reason_type": "carrier",
+        "type_of_loss": "Delayed 9h",
+    }
+    assert reconciled["claim_data"]["claim_details"] == {"claim_number": "TG-1"}
+    assert reconciled["policy_data"] is extraction["policy_data"]
+    assert extraction["claim_data"]["claim_reason"]["claim_type"] == "trip_delay"
+
+
+def test_missing_claim_reason_is_filled_in() -> None:
+    reconciled = _with_claim_reason({"claim_data": {"claim_reason": None}}, CLAIM_REASON)
+
+    assert reconciled["claim_data"]["claim_reason"] == CLAIM_REASON
+
+
+def test_extraction_without_claim_data_is_kept() -> None:
+    extraction = {"claim_data": None}
+
+    assert _with_claim_reason(extraction, CLAIM_REASON) is extraction
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import io
+import re
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+
+import pytest
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from agentric.lib.parsing import RangedReader, pdf_pages_text, pdf_pages_text_from_url
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+PAGE_COUNT = 200
+BLOCK_SIZE = 16 * 1024
+
+
+def make_pdf(page_count: int, filler: int = 4096) -> bytes:
+    """A PDF whose pages read ``Page <n>``, padded so that every page takes ``filler`` bytes."""
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    font_reference = writer._add_object(font)  # noqa: SLF001
+    for number in range(1, page_count + 1):
+        writer.add_blank_page(612, 792)
+        page = writer.pages[-1]
+        content = DecodedStreamObject()
+        content.set_data(b"%" + b"x" * filler + f"\nBT /F1 12 Tf 72 720 Td (Page {number}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)  # noqa: SLF001
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font_reference})}
+        )
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+class RangeServer(ThreadingHTTPServer):
+    def __init__(self, content: bytes, *, ranges: bool = True) -> None:
+        super().__init__(("127.0.0.1", 0), RangeHandler)
+        self.content = content
+        self.ranges = ranges
+        self.requests: list[str] = []
+        self.sent = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/document.pdf"
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    server: RangeServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        content = self.server.content
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        self.server.requests.append(self.headers.get("Range", ""))
+        if not self.server.ranges or match is None:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            self.server.sent += len(content)
+            return
+        start, end = int(match.group(1)), min(int(match.group(2)), len(content) - 1)
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(content)}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(content[start : end + 1])
+        self.server.sent += end - start + 1
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+@contextmanager
+def serve(content: bytes, *, ranges: bool = True) -> Iterator[RangeServer]:
+    server = RangeServer(content, ranges=ranges)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="module")
+def document() -> bytes:
+    return make_pdf(PAGE_COUNT)
+
+
+@pytest.fixture
+def server(document: bytes) -> Iterator[RangeServer]:
+    with serve(document) as server:
+        yield server
+
+
+def test_first_pages_reads_a_fraction_of_the_document(server: RangeServer, document: bytes) -> None:
+    pages, fetched, size = pdf_pages_text_from_url(server.url, 2, block_size=BLOCK_SIZE)
+
+    assert [page.strip() for page in pages] == ["Page 1", "Page 2"]
+    assert size == len(document)
+    # the header block, the trailer with the cross reference table and the first pages
+    assert fetched <= 4 * BLOCK_SIZE
+    assert fetched * 10 < size
+    assert fetched == server.sent
+
+
+def test_first_pages_matches_a_full_parse(server: RangeServer, document: bytes) -> None:
+    pages, _, _ = pdf_pages_text_from_url(server.url, 3, block_size=BLOCK_SIZE)
+
+    assert pages == pdf_pages_text(document, 3)
+
+
+def test_first_pages_of_a_short_document() -> None:
+    with serve(make_pdf(1)) as server:
+        pages, fetched, size = pdf_pages_text_from_url(server.url, 2, block_size=BLOCK_SIZE)
+
+        assert [page.strip() for page in pages] == ["Page 1"]
+        assert fetched == size
+
+
+def test_ranged_reader_reads_like_a_file(server: RangeServer, document: bytes) -> None:
+    with RangedReader(server.url, block_size=1024, cache_blocks=4) as stream:
+        assert stream.size == len(document)
+        assert stream.read(10) == document[:10]
+        stream.seek(-2000, io.SEEK_END)
+        assert stream.read() == document[-2000:]
+        stream.seek(5000)
+        stream.seek(100, io.SEEK_CUR)
+        assert stream.read(3000) == document[5100:8100]
+        assert stream.tell() == 8100
+        # a block evicted from the cache is fetched again
+        stream.seek(0)
+        assert stream.read(10) == document[:10]
+        assert len(stream._blocks) <= 4  # noqa: SLF001
+
+
+def test_ranged_reader_fetches_missing_blocks_once(server: RangeServer, document: bytes) -> None:
+    with RangedReader(server.url, block_size=1024) as stream:
+        stream.seek(4096)
+        stream.read(4096)
+        stream.seek(4096)
+        stream.read(4096)
+
+        assert stream.fetched == 1024 + 4096
+        assert server.requests == ["bytes=0-1023", "bytes=4096-8191"]
+
+
+def test_ranged_reader_requires_range_support(document: bytes) -> None:
+    with serve(document, ranges=False) as server:
+        with pytest.raises(OSError, match="Range requests are not supported"):
+            RangedReader(server.url)
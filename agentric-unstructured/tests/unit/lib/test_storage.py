@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from agentric.lib import storage
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+pytestmark = pytest.mark.anyio
+
+MiB = 1024 * 1024
+
+
+class FakeS3:
+    def __init__(self, *, failing_part: int | None = None) -> None:
+        self.failing_part = failing_part
+        self.calls: list[str] = []
+        self.objects: dict[str, bytes] = {}
+        self.parts: dict[int, bytes] = {}
+
+    async def put_object(self, *, Bucket: str, Key: str, Body: bytes, ContentType: str) -> None:  # noqa: N803
+        self.calls.append("put_object")
+        self.objects[Key] = Body
+
+    async def create_multipart_upload(self, **_: Any) -> dict[str, str]:
+        self.calls.append("create_multipart_upload")
+        return {"UploadId": "upload-1"}
+
+    async def upload_part(self, *, PartNumber: int, Body: bytes, **_: Any) -> dict[str, str]:  # noqa: N803
+        self.calls.append("upload_part")
+        if PartNumber == self.failing_part:
+            msg = "connection reset"
+            raise OSError(msg)
+        self.parts[PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    async def complete_multipart_upload(
+        self, *, Key: str, MultipartUpload: dict[str, Any], **_: Any  # noqa: N803
+    ) -> None:
+        self.calls.append("complete_multipart_upload")
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        self.objects[Key] = b"".join(self.parts[number] for number in numbers)
+
+    async def abort_multipart_upload(self, **_: Any) -> None:
+        self.calls.append("abort_multipart_upload")
+
+
+@pytest.fixture
+def s3(monkeypatch: pytest.MonkeyPatch) -> FakeS3:
+    client = FakeS3()
+
+    async def get_s3_client() -> FakeS3:
+        return client
+
+    monkeypatch.setattr(storage, "get_s3_client", get_s3_client)
+    return client
+
+
+async def stream(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def content(size: int) -> bytes:
+    return bytes(index % 251 for index in range(size))
+
+
+async def test_small_objects_are_stored_with_one_request(s3: FakeS3) -> None:
+    data = content(300_000)
+
+    stored = await storage.upload_stream("staging/a", stream([data[:1000], data[1000:]]), bucket="test")
+
+    assert s3.calls == ["put_object"]
+    assert s3.objects["staging/a"] == data
+    assert stored == storage.StoredObject(300_000, hashlib.sha256(data).hexdigest(), data[: storage.HEAD_SIZE])
+
+
+async def test_large_objects_are_uploaded_in_parts(s3: FakeS3) -> None:
+    data = content(11 * MiB + 123)
+
+    stored = await storage.upload_stream(
+        "staging/b", stream(data[start : start + MiB] for start in range(0, len(data), MiB)), part_size=5 * MiB
+    )
+
+    assert s3.calls == ["create_multipart_upload", *["upload_part"] * 3, "complete_multipart_upload"]
+    assert [len(part) for part in s3.parts.values()] == [5 * MiB, 5 * MiB, MiB + 123]
+    assert s3.objects["staging/b"] == data
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.head == data[: storage.HEAD_SIZE]
+
+
+async def test_part_size_has_the_s3_minimum(s3: FakeS3) -> None:
+    data = content(6 * MiB)
+
+    await storage.upload_stream("staging/c", stream([data]), part_size=MiB)
+
+    assert s3.calls.count("upload_part") == 2
+
+
+async def test_failed_part_aborts_the_upload(s3: FakeS3) -> None:
+    s3.failing_part = 2
+
+    with pytest.raises(OSError, match="connection reset"):
+        await storage.upload_stream("staging/d", stream([content(12 * MiB)]), part_size=5 * MiB)
+
+    assert s3.calls[-1] == "abort_multipart_upload"
+    assert "staging/d" not in s3.objects
+
+
+async def test_failed_stream_aborts_the_upload(s3: FakeS3) -> None:
+    async def broken() -> AsyncIterator[bytes]:
+        yield content(6 * MiB)
+        msg = "client disconnected"
+        raise ConnectionError(msg)
+
+    with pytest.raises(ConnectionError):
+        await storage.upload_stream("staging/e", broken(), part_size=5 * MiB)
+
+    assert s3.calls == ["create_multipart_upload", "upload_part", "abort_multipart_upload"]
+
+
+class FakeClient:
+    def __init__(self, *, fail_on_close: bool = False) -> None:
+        self.fail_on_close = fail_on_close
+        self.open = False
+
+    async def __aenter__(self) -> FakeClient:
+        self.open = True
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        self.open = False
+        if self.fail_on_close:
+            msg = "Event loop is closed"
+            raise RuntimeError(msg)
+
+    async def head_bucket(self, **_: Any) -> None:
+        pass
+
+
+class FakeSession:
+    clients: list[FakeClient] = []
+    fail_on_close = False
+    """Whether the first client fails to close, as when its event loop is closed."""
+
+    def client(self, *_: Any, **__: Any) -> FakeClient:
+        client = FakeClient(fail_on_close=self.fail_on_close and not self.clients)
+        self.clients.append(client)
+        return client
+
+
+@pytest.fixture
+def sessions(monkeypatch: pytest.MonkeyPatch) -> type[FakeSession]:
+    monkeypatch.setattr(FakeSession, "clients", [])
+    monkeypatch.setattr(storage.aioboto3, "Session", FakeSession)
+    return FakeSession
+
+
+@pytest.mark.parametrize("fail_on_close", [False, True])
+def test_client_of_a_previous_event_loop_is_closed(
+    sessions: type[FakeSession], monkeypatch: pytest.MonkeyPatch, fail_on_close: bool
+) -> None:
+    monkeypatch.setattr(sessions, "fail_on_close", fail_on_close)
+    object_storage = storage._ObjectStorage()  # noqa: SLF001
+
+    async def start_twice() -> Any:
+        assert await object_storage.start() is await object_storage.start()
+        return await object_storage.start()
+
+    first = asyncio.run(start_twice())
+    second = asyncio.run(start_twice())
+
+    assert sessions.clients == [first, second]
+    assert not first.open
+    assert second.open
+    asyncio.run(object_storage.stop())
+    assert not second.open
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from litestar.exceptions import ClientException
+
+from agentric.lib.uploads import open_file_upload
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+pytestmark = pytest.mark.anyio
+
+BOUNDARY = "----agentric-boundary"
+
+
+class FakeRequest:
+    """The parts of a litestar request read by :func:`open_file_upload`, streamed in ``chunk_size`` chunks."""
+
+    def __init__(self, body: bytes, *, content_type: str | None = None, chunk_size: int = 7) -> None:
+        self.headers = {"content-type": content_type or f"multipart/form-data; boundary={BOUNDARY}"}
+        self.body = body
+        self.chunk_size = chunk_size
+        self.read = 0
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        for start in range(0, len(self.body), self.chunk_size):
+            chunk = self.body[start : start + self.chunk_size]
+            self.read += len(chunk)
+            yield chunk
+        yield b""
+
+
+def field(name: str, value: bytes, *, filename: str | None = None, content_type: str | None = None) -> bytes:
+    disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+    headers = f"Content-Disposition: {disposition}\r\n"
+    if content_type:
+        headers += f"Content-Type: {content_type}\r\n"
+    return f"--{BOUNDARY}\r\n{headers}\r\n".encode() + value + b"\r\n"
+
+
+def multipart(*fields: bytes) -> bytes:
+    return b"".join(fields) + f"--{BOUNDARY}--\r\n".encode()
+
+
+async def read(chunks: AsyncIterator[bytes]) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def test_streams_the_first_file() -> None:
+    content = b"%PDF-1.7\r\n" + bytes(range(256)) * 40
+    body = multipart(
+        field("note", b"receipts attached"),
+        field("file", content, filename="receipt.pdf", content_type="application/pdf"),
+        field("other", b"second file", filename="other.txt"),
+    )
+    request = FakeRequest(body)
+
+    upload = await open_file_upload(request)  # type: ignore[arg-type]
+
+    assert (upload.filename, upload.content_type) == ("receipt.pdf", "application/pdf")
+    # only the headers of the file have been read so far
+    assert request.read < len(body) // 2
+    assert await read(upload.chunks) == content
+
+
+async def test_stops_at_the_end_of_the_file() -> None:
+    body = multipart(field("file", b"first", filename="a.txt"), field("file", b"second", filename="b.txt"))
+    request = FakeRequest(body)
+
+    upload = await open_file_upload(request)  # type: ignore[arg-type]
+
+    assert await read(upload.chunks) == b"first"
+
+
+async def test_rejects_bodies_without_a_boundary() -> None:
+    request = FakeRequest(b"{}", content_type="application/json")
+
+    with pytest.raises(ClientException, match="Expected a multipart/form-data body"):
+        await open_file_upload(request)  # type: ignore[arg-type]
+
+
+async def test_rejects_bodies_without_a_file() -> None:
+    request = FakeRequest(multipart(field("note", b"no attachment")))
+
+    with pytest.raises(ClientException, match="No file in the request body"):
+        await open_file_upload(request)  # type: ignore[arg-type]
+
+
+async def test_rejects_malformed_bodies() -> None:
+    request = FakeRequest(b"not a multipart body at all")
+
+    with pytest.raises(ClientException, match="Invalid multipart body"):
+        await open_file_upload(request)  # type: ignore[arg-type]
+
+
+async def test_rejects_truncated_files() -> None:
+    body = multipart(field("file", b"x" * 1000, filename="a.txt"))
+    request = FakeRequest(body[: len(body) // 2])
+
+    upload = await open_file_upload(request)  # type: ignore[arg-type]
+
+    with pytest.raises(ClientException, match="Invalid multipart body"):
+        await read(upload.chunks)
@@ -0,0 +1,250 @@
+"""Latency, token and agreement benchmark of the Cover-More missing document check.
+
+Runs both versions of the check on the given sample claims (one directory per claim)
+against the Gemini API (``AGENT_API_KEY`` must be set). The files of a claim are
+uploaded once and shared by both versions:
+
+* ``chain``  - the former two call chain: a ``gemini-2.5-flash`` call listing every
+  item of ``cover_more_document_check``, whose output a ``gemini-2.5-pro`` call with the
+  files then verified and pruned to the applicable items. The first call is sent the
+  prompt only, as it was.
+* ``single`` - :func:`agentric.domain.requests.utils.check_missing_covermore_documents`,
+  one structured ``gemini-2.5-pro`` call with the files, pruned locally.
+
+Per claim the latency, input and output tokens, the number of kept items and the
+agreement of the ``missing`` flags on the items both versions kept are reported.
+
+Usage::
+
+    uv run python tools/benchmark_covermore_missing_check.py samples/covermore/*
+    uv run python tools/benchmark_covermore_missing_check.py samples/covermore/claim-01 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from google import genai
+from google.genai import types
+
+from agentric.domain.requests.rule_sets import cover_more_document_check
+from agentric.domain.requests.utils import (
+    COVERMORE_DOCUMENT_CHECK_PROMPT,
+    covermore_document_check_schema,
+    prune_covermore_document_check,
+)
+
+CHAIN_CHECK_PROMPT = """
+    You are an insurance claim triage assistant.
+
+    You will receive:
+    - Multiple attached claim-related files (any format).
+    - REQUIRED_DOCS: JSON mapping categories to a list of required document names (strings).
+
+    Your task:
+    1) Read the attached files (content-based, not just filenames).
+    2) For EACH category in REQUIRED_DOCS, and for EACH document item (string) in that category's list,
+    decide whether the document is present or missing across the provided files:
+    - missing = true  → no attached file clearly satisfies that document item
+    - missing = false → at least one attached file clearly satisfies that document item
+    3) Provide a short one-sentence "reason" for each item explaining your decision
+    (e.g., "found itinerary with flight and hotel details" or "no medical report or diagnosis document detected").
+
+    STRICT OUTPUT (MUST be valid JSON; no prose, no markdown, no extra keys):
+    {
+    "result": {
+        "missing_by_category": {
+        "<Category 1>": {
+            "<Document Item A>": { "missing": true,  "reason": "<short explanation>" },
+            "<Document Item B>": { "missing": false, "reason": "<short explanation>" }
+        },
+        "<Category 2>": {
+            "<Document Item C>": { "missing": true,  "reason": "<short explanation>" }
+        }
+        // Include EVERY document item from REQUIRED_DOCS for EVERY category — no more, no less.
+        }
+    }
+    }
+
+    Rules:
+    - You MUST include all categories and all document items exactly as listed in REQUIRED_DOCS.
+    - "missing" must be a boolean; "reason" must be a short sentence.
+    - Do NOT invent categories or document items.
+    - Output ONLY the JSON object above (no additional fields).
+
+    REQUIRED_DOCS:
+    <json>
+    {{req_files}}
+    </json>
+    """
+
+CHAIN_MAP_PROMPT = """
+    You are an Insurance Evidence Auditor.
+
+    INPUTS YOU WILL RECEIVE
+    1) <files>: a set of attached user files (PDFs, images, emails/EML, markdown, spreadsheets, etc.).
+    2) <incoming_requirements>: a JSON object that already contains categories and evidence items with provisional
+    {missing:boolean, reason:string} values. Treat this as the REQUIREMENTS SET to be verified and pruned.
+
+    YOUR GOALS
+    - Determine which requirement items actually apply to THIS case based on the files.
+    - Keep only applicable categories/items; remove all non-applicable items. If a category becomes empty, remove the category.
+    - For every kept item, verify presence in the files and set:
+    - "missing": true | false
+    - "reason": 1–2 factual sentences that reference the specific supporting file(s) (filename, page, brief quote/date) or explain what is absent.
+    - Do not rely on the provisional values in <incoming_requirements>; re-evaluate from the files.
+
+    APPLICABILITY RULES
+    - Keep an item only if it logically pertains to THIS case (e.g., dental-only items are not applicable for a fractured arm; cruise-only items are not applicable to a flight/hotel trip; domestic-flight items not applicable to international trips, etc.).
+    - Prefer explicit evidence in files (claim form, medical notes, receipts, cancellation emails, itineraries, policies, etc.).
+    - If the files clearly show the case context (e.g., health-related additional expenses), keep only those items relevant to that context.
+    - If unsure about applicability, keep the item and mark "missing" based on evidence check.
+
+    EVIDENCE MATCHING RULES
+    - Accept reasonable naming/format variants (e.g., "itinerary", "booking confirmation", "travel summary").
+    - A partial but sufficient document counts as present (e.g., confirmation email without letterhead).
+    - Only cite files that truly exist. Quote short phrases only when necessary.
+    - For page references, state the exact page number (1-based) only if you verified it.
+
+    SPECIAL RULE: CONDITIONAL ITEMS (CASE-WIDE)
+    - For items whose text includes a condition (e.g., "(if required documents are missing)", "(if due to health)", "(for domestic flights)", "(for cruises)"):
+    1) Evaluate the condition ACROSS THE ENTIRE CASE (all categories), unless the item explicitly limits scope.
+    2) For “Letter of explanation (if required documents are missing)”:
+        - If NO other evidence item ANYWHERE in the case is missing → set missing=false and reason="All required documents were provided; a letter of explanation is not required."
+        - If ANY other evidence item anywhere in the case is missing and no letter is found → set missing=true with a clear absence reason.
+        - If ANY other item is missing and a letter is found → set missing=false and cite the file that contains the letter.
+
+    STRICT OUTPUT RULES
+    - Output ONLY valid JSON. No extra text, no comments, no trailing commas.
+    - Preserve the same high-level shape as the input (result → missing_by_category → {Category} → {Item}).
+    - Include only the KEPT categories/items (pruned result).
+    - Do not invent filenames or facts.
+
+    VALIDATION (MUST DO BEFORE OUTPUT)
+    - Compute missing_count_casewide = total number of items with missing=true ACROSS ALL CATEGORIES, excluding any item whose name contains "Letter of explanation (if required documents are missing)".
+    - If missing_count_casewide == 0:
+    - For every “Letter of explanation (if required documents are missing)” item: set missing=false and reason="All required documents were provided; a letter of explanation is not required."
+    - If missing_count_casewide > 0:
+    - For every such “Letter of explanation” item with no found letter evidence: set missing=true with a concise absence reason.
+
+    OUTPUT SHAPE
+    {
+    "result": {
+        "missing_by_category": {
+        "<Kept Category>": {
+            "<Kept Item>": {
+            "missing": true|false,
+            "reason": "<concise factual justification with file references, or why absent/not required>"
+            }
+        }
+        }
+    }
+    }
+
+    BEGIN.
+
+    <incoming_requirements>
+    {{INCOMING_REQUIREMENTS_JSON}}
+    </incoming_requirements>
+
+    <files>
+    Read and analyze ALL provided files. Use their contents to determine applicability, presence/absence, and case-wide conditional requirements.
+    </files>
+    """
+
+
+def _run(
+    client: genai.Client, model: str, contents: list[Any], config: types.GenerateContentConfig
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    response = client.models.generate_content(model=model, contents=contents, config=config)
+    elapsed = time.perf_counter() - started
+    usage = response.usage_metadata
+    return {
+        "text": response.text or "{}",
+        "seconds": elapsed,
+        "input": (usage.prompt_token_count or 0) if usage else 0,
+        "output": ((usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)) if usage else 0,
+    }
+
+
+def _flags(result: dict[str, Any]) -> dict[str, bool]:
+    return {
+        item: bool(verdict.get("missing"))
+        for items in result.get("result", {}).get("missing_by_category", {}).values()
+        for item, verdict in items.items()
+    }
+
+
+def _chain(client: genai.Client, files: list[Any]) -> tuple[dict[str, bool], dict[str, float]]:
+    config = types.GenerateContentConfig(temperature=0.0, seed=42, response_mime_type="application/json")
+    check_prompt = CHAIN_CHECK_PROMPT.replace("{req_files}", json.dumps(cover_more_document_check))
+    check = _run(client, "gemini-2.5-flash", [{"role": "user", "parts": [{"text": check_prompt}]}], config)
+    map_prompt = CHAIN_MAP_PROMPT.replace("{{INCOMING_REQUIREMENTS_JSON}}", check["text"])
+    mapped = _run(client, "gemini-2.5-pro", [*files, map_prompt], config)
+    stats = {key: check[key] + mapped[key] for key in ("seconds", "input", "output")}
+    return _flags(json.loads(mapped["text"])), stats
+
+
+def _single(client: genai.Client, files: list[Any]) -> tuple[dict[str, bool], dict[str, float]]:
+    config = types.GenerateContentConfig(
+        temperature=0.0,
+        seed=42,
+        response_mime_type="application/json",
+        response_json_schema=covermore_document_check_schema(),
+    )
+    contents = [COVERMORE_DOCUMENT_CHECK_PROMPT, *files, "Check the attached files against the required documents."]
+    result = _run(client, "gemini-2.5-pro", contents, config)
+    outcome = prune_covermore_document_check(json.loads(result["text"]))
+    flags = {item: status.missing for entry in outcome for item, status in entry.items()}
+    return flags, {key: result[key] for key in ("seconds", "input", "output")}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Benchmark the Cover-More missing document check")
+    parser.add_argument("claims", nargs="+", type=Path, help="Sample claim directories.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs of each version per claim.")
+    args = parser.parse_args()
+
+    client = genai.Client(api_key=os.environ["AGENT_API_KEY"])
+    totals = {name: {"seconds": 0.0, "input": 0.0, "output": 0.0} for name in ("chain", "single")}
+    agreed = compared = 0
+
+    print(f"{'claim':<30}{'version':<8}{'seconds':>9}{'in_tok':>9}{'out_tok':>9}{'kept':>6}{'missing':>9}")  # noqa: T201
+    for claim in args.claims:
+        paths = sorted(path for path in claim.rglob("*") if path.is_file())
+        files = [client.files.upload(file=path) for path in paths]
+        try:
+            for _ in range(args.repeat):
+                runs = {"chain": _chain(client, files), "single": _single(client, files)}
+                for name, (flags, stats) in runs.items():
+                    for key, value in stats.items():
+                        totals[name][key] += value
+                    print(  # noqa: T201
+                        f"{claim.name[:29]:<30}{name:<8}{stats['seconds']:>9.1f}{stats['input']:>9.0f}"
+                        f"{stats['output']:>9.0f}{len(flags):>6}{sum(flags.values()):>9}"
+                    )
+                chain_flags, single_flags = runs["chain"][0], runs["single"][0]
+                shared = chain_flags.keys() & single_flags.keys()
+                compared += len(shared)
+                agreed += sum(chain_flags[item] == single_flags[item] for item in shared)
+        finally:
+            for file in files:
+                client.files.delete(name=file.name)
+
+    print()  # noqa: T201
+    for key in ("seconds", "input", "output"):
+        chain, single = totals["chain"][key], totals["single"][key]
+        saved = 1 - single / chain if chain else 0
+        print(f"{key:<8} chain={chain:>12.1f} single={single:>12.1f} saved={saved:>7.1%}")  # noqa: T201
+    if compared:
+        print(f"missing flags agreeing on items kept by both: {agreed}/{compared} ({agreed / compared:.1%})")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
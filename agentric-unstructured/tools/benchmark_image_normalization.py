@@ -0,0 +1,137 @@
+"""Upload size and image token benchmark for the normalisation of image attachments.
+
+Runs :func:`agentric.lib.parsing.normalize_image` on every image of the given sample
+claims (files or directories) and compares, per image and in total:
+
+* ``original``   - the file as it is stored, uploaded unchanged before normalisation.
+* ``normalized`` - the WebP sent now, at most ``--max-side`` pixels and without metadata.
+
+Image tokens are estimated offline with Gemini's tiling rule (258 tokens per 768x768
+tile, a single tile for images up to 384x384). Images with the same pixels as an
+earlier image of the same claim directory are reported as duplicates, they are not
+uploaded at all. Pass ``--live`` (with ``AGENT_API_KEY`` set) to upload both versions
+and count their tokens with the Gemini API instead.
+
+Usage::
+
+    uv run python tools/benchmark_image_normalization.py samples/claims
+    uv run python tools/benchmark_image_normalization.py samples/claims --max-side 1024 --live
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from PIL import Image
+
+from agentric.lib.parsing import normalize_image
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".tif", ".tiff", ".bmp"}
+
+
+def _estimated_tokens(width: int, height: int) -> int:
+    if width <= 384 and height <= 384:  # noqa: PLR2004
+        return 258
+    return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+
+def _images(paths: list[Path]) -> list[Path]:
+    files: list[Path] = []
+    for path in paths:
+        candidates = sorted(path.rglob("*")) if path.is_dir() else [path]
+        files.extend(file for file in candidates if file.suffix.lower() in IMAGE_SUFFIXES)
+    return files
+
+
+def _live_tokens(client: Any, model: str, content: bytes, mime_type: str) -> tuple[int, float]:
+    started = time.perf_counter()
+    file = client.files.upload(file=io.BytesIO(content), config={"mime_type": mime_type})
+    elapsed = time.perf_counter() - started
+    try:
+        tokens = client.models.count_tokens(model=model, contents=[file]).total_tokens or 0
+    finally:
+        client.files.delete(name=file.name)
+    return tokens, elapsed
+
+
+def main() -> None:  # noqa: C901
+    parser = argparse.ArgumentParser("Benchmark image attachment normalisation")
+    parser.add_argument("paths", nargs="+", type=Path, help="Sample claim files or directories.")
+    parser.add_argument("--max-side", type=int, default=1536, help="Longest side of normalized images.")
+    parser.add_argument("--quality", type=int, default=85, help="WebP quality of normalized images.")
+    parser.add_argument("--model", default="gemini-2.5-pro", help="Model used to count tokens with --live.")
+    parser.add_argument("--live", action="store_true", help="Upload to Gemini and count tokens with the API.")
+    args = parser.parse_args()
+
+    client = None
+    if args.live:
+        from google import genai
+
+        client = genai.Client(api_key=os.environ["AGENT_API_KEY"])
+
+    totals = {"original_bytes": 0, "normalized_bytes": 0, "original_tokens": 0, "normalized_tokens": 0}
+    totals.update({"original_upload_s": 0.0, "normalized_upload_s": 0.0, "normalize_s": 0.0})
+    seen: dict[tuple[Path, int], Path] = {}
+    duplicates = 0
+
+    print(f"{'file':<40}{'orig_kb':>10}{'norm_kb':>10}{'orig_tok':>10}{'norm_tok':>10}{'norm_ms':>10}")  # noqa: T201
+    for file in _images(args.paths):
+        content = file.read_bytes()
+        with Image.open(io.BytesIO(content)) as image:
+            width, height = image.size
+            original_mime_type = Image.MIME.get(image.format or "", "application/octet-stream")
+        started = time.perf_counter()
+        normalized = normalize_image(content, args.max_side, args.quality)
+        normalize_s = time.perf_counter() - started
+        if normalized is None:
+            print(f"{file.name[:39]:<40} multi frame image, sent unchanged")  # noqa: T201
+            continue
+
+        key = (file.parent, normalized.dhash, normalized.pixels_sha256)
+        if key in seen:
+            duplicates += 1
+            totals["original_bytes"] += len(content)
+            totals["original_tokens"] += _estimated_tokens(width, height)
+            print(f"{file.name[:39]:<40} duplicate of {seen[key].name}, skipped")  # noqa: T201
+            continue
+        seen[key] = file
+
+        original_tokens = _estimated_tokens(width, height)
+        normalized_tokens = _estimated_tokens(normalized.width, normalized.height)
+        if client is not None:
+            original_tokens, original_upload_s = _live_tokens(client, args.model, content, original_mime_type)
+            normalized_tokens, normalized_upload_s = _live_tokens(
+                client, args.model, normalized.content, normalized.mime_type
+            )
+            totals["original_upload_s"] += original_upload_s
+            totals["normalized_upload_s"] += normalized_upload_s
+
+        totals["original_bytes"] += len(content)
+        totals["normalized_bytes"] += len(normalized.content)
+        totals["original_tokens"] += original_tokens
+        totals["normalized_tokens"] += normalized_tokens
+        totals["normalize_s"] += normalize_s
+        print(  # noqa: T201
+            f"{file.name[:39]:<40}{len(content) / 1024:>10.0f}{len(normalized.content) / 1024:>10.0f}"
+            f"{original_tokens:>10}{normalized_tokens:>10}{normalize_s * 1000:>10.0f}"
+        )
+
+    print()  # noqa: T201
+    print(f"duplicates skipped: {duplicates}")  # noqa: T201
+    for name in ("bytes", "tokens", "upload_s"):
+        original, normalized_total = totals[f"original_{name}"], totals[f"normalized_{name}"]
+        if name == "upload_s" and client is None:
+            continue
+        saved = 1 - normalized_total / original if original else 0
+        print(f"{name:<10} original={original:>12.2f} normalized={normalized_total:>12.2f} saved={saved:>7.1%}")  # noqa: T201
+    print(f"normalize_s total={totals['normalize_s']:.2f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Jobs-per-worker throughput benchmark for the claim pipeline's Gemini calls.
+
+Runs ``--jobs`` simulated claim jobs on a single event loop, the same way one SAQ worker
+process with ``SAQ_CONCURRENCY`` >= ``--jobs`` would, and compares:
+
+* ``blocking`` - the previous behaviour, synchronous ``client.models.generate_content``
+  called from inside ``async def`` stages.
+* ``async``    - the current behaviour, ``client.aio.models.generate_content``.
+
+By default each model call is simulated with a fixed latency so the benchmark runs
+offline. Pass ``--live`` (with ``AGENT_API_KEY`` set) to issue real, tiny Gemini calls.
+
+Usage::
+
+    uv run python tools/benchmark_worker_throughput.py --jobs 8 --calls-per-job 4 --latency 2
+    uv run python tools/benchmark_worker_throughput.py --jobs 4 --calls-per-job 2 --live
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any
+
+PROMPT = "Reply with the single word: ok"
+
+
+def _blocking_call(args: argparse.Namespace, client: Any) -> None:
+    if client is None:
+        time.sleep(args.latency)
+        return
+    client.models.generate_content(model=args.model, contents=[PROMPT])
+
+
+async def _async_call(args: argparse.Namespace, client: Any) -> None:
+    if client is None:
+        await asyncio.sleep(args.latency)
+        return
+    await client.aio.models.generate_content(model=args.model, contents=[PROMPT])
+
+
+async def _job(mode: str, args: argparse.Namespace, client: Any) -> None:
+    for _ in range(args.calls_per_job):
+        if mode == "blocking":
+            _blocking_call(args, client)
+        else:
+            await _async_call(args, client)
+
+
+async def _run(mode: str, args: argparse.Namespace, client: Any) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(_job(mode, args, client) for _ in range(args.jobs)))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Benchmark jobs-per-worker throughput")
+    parser.add_argument("--jobs", type=int, default=8, help="Concurrent jobs on one worker process.")
+    parser.add_argument("--calls-per-job", type=int, default=4, help="Model calls per job (pipeline stages).")
+    parser.add_argument("--latency", type=float, default=2.0, help="Simulated seconds per model call.")
+    parser.add_argument("--model", default="gemini-2.5-flash", help="Model used with --live.")
+    parser.add_argument("--live", action="store_true", help="Call Gemini instead of simulating latency.")
+    args = parser.parse_args()
+
+    client = None
+    if args.live:
+        from google import genai
+
+        client = genai.Client(api_key=os.environ["AGENT_API_KEY"])
+
+    print(f"jobs={args.jobs} calls_per_job={args.calls_per_job} live={args.live}")  # noqa: T201
+    print(f"{'mode':<10}{'wall_s':>10}{'jobs/min':>12}")  # noqa: T201
+    for mode in ("blocking", "async"):
+        elapsed = asyncio.run(_run(mode, args, client))
+        print(f"{mode:<10}{elapsed:>10.2f}{args.jobs * 60 / elapsed:>12.2f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()